@@ -0,0 +1,147 @@
+"""
+Binary columnar responses
+
+Tabular endpoints (ranking table, category heatmap, product availability) also
+answer in a columnar format when the Accept header asks for one:
+
+    application/vnd.apache.arrow.stream    Arrow IPC stream (needs pyarrow)
+    application/msgpack                    MessagePack map of {column: [values]} (needs msgpack)
+
+Both encoders come with the "columnar" extra (pip install ".[columnar]"), which
+the Docker image installs.
+
+Both are encoded straight from the DataFrame the endpoint computes, so no
+per-row dicts are built and clients load the body with pyarrow.ipc.open_stream
+or msgpack.unpackb + pd.DataFrame instead of parsing JSON. Without an Accept
+header, or when JSON is acceptable, the endpoints return JSON as before.
+"""
+from typing import Dict, Optional, Sequence
+
+import pandas as pd
+from starlette.responses import Response
+
+from app.core.tracing import span
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Accept header media ranges of the columnar formats
+COLUMNAR_MEDIA_RANGES = {
+    "application/vnd.apache.arrow.stream": ARROW_STREAM_MEDIA_TYPE,
+    "application/msgpack": MSGPACK_MEDIA_TYPE,
+    "application/x-msgpack": MSGPACK_MEDIA_TYPE,
+    "application/vnd.msgpack": MSGPACK_MEDIA_TYPE
+}
+JSON_MEDIA_RANGES = ("application/json", "application/*", "*/*")
+
+# OpenAPI description of the alternative 200 bodies (responses= of a route)
+COLUMNAR_RESPONSES: Dict = {
+    200: {
+        "content": {
+            ARROW_STREAM_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            MSGPACK_MEDIA_TYPE: {"schema": {"type": "string", "format": "binary"}}
+        },
+        "description": "JSON, or the same table as an Arrow IPC stream or MessagePack columns (see the Accept header)"
+    }
+}
+
+
+class NotAcceptable(Exception):
+    """The client only accepts columnar formats whose encoder is not installed"""
+
+
+def _available(media_type: str) -> bool:
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return pa is not None
+    return msgpack is not None
+
+
+def _media_ranges(accept: str):
+    """(media range, q) of an Accept header, most preferred first"""
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [piece.strip() for piece in part.split(";")]
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_range.lower(), quality))
+    return sorted(ranges, key=lambda item: -item[1])
+
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """
+    Columnar media type to answer with, or None for JSON
+
+    Raises NotAcceptable when the client asked for a columnar format this
+    installation cannot produce and did not accept JSON either.
+    """
+    if not accept:
+        return None
+    unavailable = False
+    for media_range, quality in _media_ranges(accept):
+        if quality <= 0:
+            continue
+        if media_range in JSON_MEDIA_RANGES:
+            return None
+        media_type = COLUMNAR_MEDIA_RANGES.get(media_range)
+        if media_type is not None:
+            if _available(media_type):
+                return media_type
+            unavailable = True
+    if unavailable:
+        raise NotAcceptable(accept)
+    return None
+
+
+def _arrow_stream(frame: pd.DataFrame, map_columns: Sequence[str]) -> bytes:
+    table = pa.Table.from_pandas(frame.drop(columns=list(map_columns)), preserve_index=False)
+    for column in map_columns:
+        values = pa.array(
+            [list(value.items()) for value in frame[column]],
+            type=pa.map_(pa.string(), pa.int64())
+        )
+        table = table.add_column(frame.columns.get_loc(column), column, values)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _msgpack_columns(frame: pd.DataFrame) -> bytes:
+    return msgpack.packb({column: frame[column].tolist() for column in frame.columns}, use_bin_type=True)
+
+
+class ColumnarResponse(Response):
+    """
+    A DataFrame encoded in a columnar media type, recorded as 'serialize'
+
+    map_columns hold {str: int} dicts, sent as Arrow map<string, int64> columns.
+    """
+
+    def __init__(self, frame: pd.DataFrame, media_type: str, map_columns: Sequence[str] = ()):
+        self.map_columns = tuple(map_columns)
+        super().__init__(frame, media_type=media_type, headers={"Vary": "Accept"})
+
+    def render(self, frame: pd.DataFrame) -> bytes:
+        with span('serialize'):
+            if self.media_type == ARROW_STREAM_MEDIA_TYPE:
+                return _arrow_stream(frame, self.map_columns)
+            return _msgpack_columns(frame)
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Union
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
 from functools import lru_cache
@@ -23,6 +23,10 @@ class Settings(BaseSettings):
     PORT: int = 8000
     DEBUG: bool = True
     RELOAD: bool = True
+    # Production launcher (python -m app.server)
+    WORKERS: int = 0  # 0: one per available CPU
+    GRACEFUL_TIMEOUT: int = 30  # Seconds a stopping worker may spend on in-flight requests
+    PRELOAD_DATASETS: bool = True  # Load the datasets in the parent before forking workers
     
     # CORS Settings - Can accept both string (from .env) or list (from code)
     CORS_ORIGINS: Union[str, List[str]] = "http://localhost:3000,http://127.0.0.1:3000"
@@ -65,10 +69,155 @@ class Settings(BaseSettings):
     @property
     def EXCEL_FILE_3(self) -> Path:
         return DATA_DIR / self.EXCEL_FILE_3_NAME
-    
+
+    # Ranking Pipeline Settings
+    SCORES_CSV_NAME: str = "Normalized_Scores.csv"
+    PIPELINE_CACHE_DIR_NAME: str = ".pipeline_cache"
+
+    @property
+    def SCORES_CSV(self) -> Path:
+        return DATA_DIR / self.SCORES_CSV_NAME
+
+    @property
+    def PIPELINE_CACHE_DIR(self) -> Path:
+        return DATA_DIR / self.PIPELINE_CACHE_DIR_NAME
+
+    # Scoring Settings
+    # "precomputed" serves EXCEL_FILE_1 as-is, "live" derives scores and ranks from EXCEL_FILE_2
+    RANKING_SOURCE: str = "precomputed"
+    # Points for answer position 1, 2, 3, ... (positions past the end of the list earn 0).
+    # Left empty, positions earn SCORE_TOP_POINTS minus SCORE_POSITION_STEP per position below the top.
+    SCORE_POSITION_WEIGHTS: Union[str, List[float]] = ""
+    SCORE_TOP_POINTS: float = 100
+    SCORE_POSITION_STEP: float = 5
+
+    @field_validator('SCORE_POSITION_WEIGHTS', mode='before')
+    @classmethod
+    def parse_position_weights(cls, v):
+        """Parse SCORE_POSITION_WEIGHTS from comma-separated string to list"""
+        if isinstance(v, str):
+            return [float(weight) for weight in v.split(',') if weight.strip()]
+        elif isinstance(v, list):
+            return [float(weight) for weight in v]
+        return []
+
+    # Analytics Engine Settings
+    # "legacy" runs the original per-category loops, "vectorized" the grouped
+    # implementations in app/services/analytics_engine.py (see benchmarks/equivalence.py)
+    ANALYTICS_ENGINE: str = "legacy"
+    # Marketplace the insights are computed for when a request does not pass ?focus=
+    FOCUS_MARKETPLACE: str = "amazon"
+    # Most categories or competitors one batch request may ask for
+    BATCH_MAX_ITEMS: int = 200
+    # Currency the price comparisons are made in when a request does not pass ?currency=,
+    # and the relative error of the price / delivery quantiles (see app/services/price_sketches.py)
+    PRICE_CURRENCY: str = "INR"
+    PRICE_SKETCH_RELATIVE_ACCURACY: float = 0.01
+
+    # Upload Settings
+    # Uploads and their job records require this token in X-Admin-Token (or ?admin_token=).
+    # Empty disables the upload and job endpoints entirely.
+    UPLOAD_TOKEN: str = ""
+    UPLOAD_DIR_NAME: str = ".uploads"
+    # Largest upload request body (multipart framing included)
+    UPLOAD_MAX_BYTES: int = 200 * 1024 * 1024
+    UPLOAD_CHUNK_ROWS: int = 5000
+    UPLOAD_JOB_HISTORY: int = 100
+    # Seconds between dataset version checks while clients are subscribed to /data/events,
+    # and between SSE keep-alive comments
+    DATASET_WATCH_INTERVAL: float = 2.0
+    EVENTS_KEEPALIVE_INTERVAL: float = 15.0
+
+    @property
+    def UPLOAD_DIR(self) -> Path:
+        return DATA_DIR / self.UPLOAD_DIR_NAME
+
+    # Text Store Settings
+    TEXT_STORE_DIR_NAME: str = ".text_store"
+
+    @property
+    def TEXT_STORE_DIR(self) -> Path:
+        return DATA_DIR / self.TEXT_STORE_DIR_NAME
+
+    # Shared Dataset Settings
+    # Publish loaded frames as memory-mapped columns that every worker process attaches to
+    SHARED_DATASETS: bool = True
+    SHARED_DATASET_DIR_NAME: str = ".shared_datasets"
+
+    @property
+    def SHARED_DATASET_DIR(self) -> Path:
+        return DATA_DIR / self.SHARED_DATASET_DIR_NAME
+
+    # Pre-rendered Payload Settings
+    # Serve the bodies rendered by `python -m app.services.snapshot` for parameterless
+    # dashboard requests while the dataset version they were rendered from is current
+    PRERENDERED_PAYLOADS: bool = True
+    PAYLOAD_DIR_NAME: str = ".payloads"
+    # Also store the payloads gzip-compressed (and brotli / zstd when those packages
+    # are installed), served according to Accept-Encoding. Bodies shorter than
+    # MIN_BYTES, or that do not shrink to MAX_RATIO of their size, stay uncompressed
+    PAYLOAD_COMPRESSION: bool = True
+    PAYLOAD_COMPRESSION_MIN_BYTES: int = 1024
+    PAYLOAD_COMPRESSION_MAX_RATIO: float = 0.9
+
+    @property
+    def PAYLOAD_DIR(self) -> Path:
+        return DATA_DIR / self.PAYLOAD_DIR_NAME
+
+    # Profiler Settings
+    # Requests carrying this token in X-Admin-Token (or ?admin_token=) may ask to be profiled
+    # with X-Profile / ?profile= set to "pstats" or "collapsed". Empty disables profiling entirely.
+    PROFILER_TOKEN: str = ""
+    PROFILER_SAMPLE_INTERVAL: float = 0.001
+    PROFILE_DIR_NAME: str = ".profiles"
+    PROFILE_HISTORY: int = 50
+
+    @property
+    def PROFILE_DIR(self) -> Path:
+        return DATA_DIR / self.PROFILE_DIR_NAME
+
+    # Tracing Settings
+    # Return per-request span timings in the Server-Timing header, with an X-Request-ID
+    SERVER_TIMING: bool = True
+    # Also log each request's spans as a structured JSON line
+    TRACE_LOG: bool = False
+    # Validate every response against its response_model before rendering it
+    # (debugging aid; by default endpoint results are rendered directly)
+    RESPONSE_VALIDATION: bool = False
+
+    # Metrics Settings
+    # Under the production launcher each worker writes its metrics here for /metrics to
+    # merge, at most this many seconds after a request (see app/core/metrics.py)
+    METRICS_DIR_NAME: str = ".metrics"
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    @property
+    def METRICS_DIR(self) -> Path:
+        return DATA_DIR / self.METRICS_DIR_NAME
+
     # Logging Settings
     LOG_LEVEL: str = "INFO"
-    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    # %(request_id)s is the X-Request-ID of the request being served ('-' outside requests)
+    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+    # Hand records to a background thread for formatting and output
+    LOG_ASYNC: bool = True
+    # Share of INFO/DEBUG records kept per logger, e.g. "app.routers.analytics_router=0.1"
+    LOG_SAMPLE_RATES: Union[str, Dict[str, float]] = ""
+
+    @field_validator('LOG_SAMPLE_RATES', mode='before')
+    @classmethod
+    def parse_log_sample_rates(cls, v):
+        """Parse LOG_SAMPLE_RATES from comma-separated name=rate pairs to a dict"""
+        if isinstance(v, str):
+            rates = {}
+            for pair in v.split(','):
+                if pair.strip():
+                    name, rate = pair.split('=', 1)
+                    rates[name.strip()] = float(rate)
+            return rates
+        elif isinstance(v, dict):
+            return {name: float(rate) for name, rate in v.items()}
+        return {}
     
     class Config:
         env_file = ".env"
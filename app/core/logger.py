@@ -1,76 +1,190 @@
+import atexit
+import copy
+import itertools
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
+from typing import Dict, Optional
 from app.core.config import settings
 
 
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves formatting to the listener thread
+
+    The %-style arguments are still interpolated into the message in the calling
+    thread, as the stock QueueHandler does, so a dict or frame mutated right after
+    the call is logged as it was when it was logged. Applying the formatter (the
+    timestamp, the LOG_FORMAT layout and any traceback) is left to the listener
+    thread, off the request path.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep one in every N records of each message template
+
+    Counting per template (the unformatted message) keeps rare messages of a
+    logger from being starved by its frequent ones. Warnings and errors are
+    never dropped.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counters: Dict[str, itertools.count] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if not self.every:
+            return False
+        counter = self._counters.get(record.msg)
+        if counter is None:
+            counter = self._counters.setdefault(record.msg, itertools.count())
+        return next(counter) % self.every == 0
+
+
+_config_lock = threading.Lock()
+_queue_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _create_output_handler() -> logging.Handler:
+    """Console handler with the configured format"""
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+    console_handler.setFormatter(
+        logging.Formatter(settings.LOG_FORMAT, datefmt='%Y-%m-%d %H:%M:%S', defaults={'request_id': '-'})
+    )
+    return console_handler
+
+
+def _start_listener() -> None:
+    global _listener
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, _create_output_handler(), respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_listener_in_child() -> None:
+    # The listener thread does not survive fork(); forked workers get their own
+    global _listener
+    if _listener is not None:
+        _start_listener()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _config_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _shared_handler() -> logging.Handler:
+    """The handler every application logger writes to, created on first use"""
+    global _queue_handler
+    if _queue_handler is None:
+        with _config_lock:
+            if _queue_handler is None:
+                if settings.LOG_ASYNC:
+                    handler = DeferredQueueHandler(queue.SimpleQueue())
+                    _queue_handler = handler
+                    _start_listener()
+                    atexit.register(stop_logging)
+                    os.register_at_fork(after_in_child=_restart_listener_in_child)
+                else:
+                    _queue_handler = _create_output_handler()
+    return _queue_handler
+
+
+def add_record_filter(record_filter: logging.Filter) -> None:
+    """
+    Filter (or annotate) every application record in the calling thread
+
+    The filter runs before a record is queued, so it sees the caller's context
+    variables, e.g. the request being served.
+    """
+    handler = _shared_handler()
+    if record_filter not in handler.filters:
+        handler.addFilter(record_filter)
+
+
 def setup_logger(name: str = __name__) -> logging.Logger:
     """
     Setup and configure logger with custom formatting
-    
+
+    All loggers share one handler, created once. With LOG_ASYNC (the default) it
+    queues records for a background listener thread that formats and writes them.
+    Calling this again for the same name returns the configured logger unchanged.
+
     Args:
         name: Logger name (usually __name__)
-    
+
     Returns:
         Configured logger instance
     """
-    # Create logger
     logger = logging.getLogger(name)
+    handler = _shared_handler()
+    if handler in logger.handlers:
+        return logger
+
     logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
-    # Remove existing handlers to avoid duplicates
-    logger.handlers.clear()
-    
-    # Create console handler with formatting
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        settings.LOG_FORMAT,
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    
-    # Add handler to logger
-    logger.addHandler(console_handler)
-    
+    logger.handlers = [handler]
+
+    rate = settings.LOG_SAMPLE_RATES.get(name)
+    if rate is not None and rate < 1:
+        logger.addFilter(SamplingFilter(rate))
+
     # Prevent propagation to avoid duplicate logs
     logger.propagate = False
-    
+
     return logger
 
 
+logger = setup_logger(__name__)
+
+
 def log_excel_loading(file_path: Path, rows: int, columns: int, sheet_name: str = "Sheet1") -> None:
     """
     Log Excel file loading information
-    
+
     Args:
         file_path: Path to the Excel file
         rows: Number of rows loaded
         columns: Number of columns loaded
         sheet_name: Name of the sheet loaded
     """
-    logger = setup_logger(__name__)
+    if not logger.isEnabledFor(logging.INFO):
+        return
     logger.info("=" * 80)
-    logger.info(f"📊 Loading Excel File: {file_path.name}")
-    logger.info(f"📁 Path: {file_path}")
-    logger.info(f"📋 Sheet: {sheet_name}")
-    logger.info(f"📈 Rows: {rows:,}")
-    logger.info(f"📉 Columns: {columns}")
+    logger.info("📊 Loading Excel File: %s", file_path.name)
+    logger.info("📁 Path: %s", file_path)
+    logger.info("📋 Sheet: %s", sheet_name)
+    logger.info("📈 Rows: %s", format(rows, ','))
+    logger.info("📉 Columns: %s", columns)
     logger.info("=" * 80)
 
 
 def log_app_startup() -> None:
     """Log application startup information"""
-    logger = setup_logger(__name__)
     logger.info("🚀 Starting AEO/GEO Analytics API")
-    logger.info(f"🔧 Environment: {'Development' if settings.DEBUG else 'Production'}")
-    logger.info(f"🌐 Host: {settings.HOST}:{settings.PORT}")
-    logger.info(f"📚 API Version: {settings.API_VERSION}")
+    logger.info("🔧 Environment: %s", 'Development' if settings.DEBUG else 'Production')
+    logger.info("🌐 Host: %s:%s", settings.HOST, settings.PORT)
+    logger.info("📚 API Version: %s", settings.API_VERSION)
 
 
 def log_app_shutdown() -> None:
     """Log application shutdown information"""
-    logger = setup_logger(__name__)
     logger.info("🛑 Shutting down AEO/GEO Analytics API")
@@ -0,0 +1,499 @@
+"""
+Prometheus-format metrics
+
+A small in-process registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format (version 0.0.4) by the /metrics endpoint.
+
+The registry lives in one process. Under the production launcher (app.server)
+every worker is a process of its own and a scrape reaches just one of them, so
+the launcher turns on multi-process mode (enable_multiprocess) before forking.
+Each process then writes a snapshot of its registry to <pid>-<token>.json in
+METRICS_DIR, when it starts serving, at most METRICS_FLUSH_INTERVAL seconds
+after each request and when it exits, and /metrics reports all of them:
+
+    counters, histograms   Summed over every process, including workers that have
+                           exited, so totals never go backwards when one is replaced
+    gauges                 One series per live process, labelled with its pid
+
+Whichever worker answers, a scrape covers the whole server, at most
+METRICS_FLUSH_INTERVAL seconds behind. Forked workers start their counters and
+histograms from zero; what the parent counted while preloading is reported under
+the parent's own snapshot. A single process (python main.py) reports itself.
+"""
+import json
+import os
+import resource
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Default latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def items(self) -> List[Tuple[LabelValues, Any]]:
+        """Current value of every series, sorted by labels"""
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Forget the series (and any lock state) inherited from a parent process"""
+        self._lock = threading.Lock()
+
+    def render(self, items: Optional[List[Tuple[LabelValues, Any]]] = None) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return sorted(self._values.items())
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+    def render(self, items: Optional[List[Tuple[LabelValues, float]]] = None) -> List[str]:
+        if items is None:
+            items = self.items()
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, either set directly or read from a callback at scrape time"""
+    metric_type = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable[[], Dict[LabelValues, float]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        if self._callback is not None:
+            try:
+                return sorted(self._callback().items())
+            except Exception:
+                return []
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self, items: Optional[List[Tuple[LabelValues, float]]] = None,
+               labelnames: Optional[Sequence[str]] = None) -> List[str]:
+        if items is None:
+            items = self.items()
+        labelnames = self.labelnames if labelnames is None else labelnames
+        return self.header() + [
+            f"{self.name}{_format_labels(labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets"""
+    metric_type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # [bucket counts..., sum, count]
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def items(self) -> List[Tuple[LabelValues, List[float]]]:
+        with self._lock:
+            return sorted((key, list(series)) for key, series in self._series.items())
+
+    def reset(self) -> None:
+        super().reset()
+        self._series = {}
+
+    def render(self, items: Optional[List[Tuple[LabelValues, List[float]]]] = None) -> List[str]:
+        if items is None:
+            items = self.items()
+
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(series[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def __iter__(self):
+        return iter(self._metrics)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def render_merged(self, snapshots: Dict[int, Dict[str, list]]) -> str:
+        """Render the snapshots of several processes ({pid: snapshot}) as one registry"""
+        live = {pid for pid in snapshots if _pid_alive(pid)}
+        lines = []
+        for metric in self._metrics:
+            per_process = [(pid, snapshot.get(metric.name, [])) for pid, snapshot in sorted(snapshots.items())]
+            if isinstance(metric, Gauge):
+                items = sorted(
+                    (tuple(key) + (str(pid),), value)
+                    for pid, series in per_process if pid in live for key, value in series
+                )
+                lines.extend(metric.render(items, labelnames=metric.labelnames + ('pid',)))
+            else:
+                lines.extend(metric.render(_summed(series for _, series in per_process)))
+        return "\n".join(lines) + "\n"
+
+
+def _summed(per_process: Iterable[list]) -> List[Tuple[LabelValues, Any]]:
+    """Add up the series of several processes (counter values, or histogram buckets element-wise)"""
+    totals: Dict[LabelValues, Any] = {}
+    for series in per_process:
+        for key, value in series:
+            key = tuple(key)
+            if key not in totals:
+                totals[key] = list(value) if isinstance(value, list) else value
+            elif isinstance(value, list):
+                totals[key] = [total + part for total, part in zip(totals[key], value)]
+            else:
+                totals[key] += value
+    return sorted(totals.items())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+    return registry.register(Gauge(name, documentation, labelnames, callback=callback))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+REQUEST_LATENCY = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status")
+)
+
+REQUEST_STAGE_LATENCY = histogram(
+    "http_request_stage_duration_seconds",
+    "Time requests spend in each stage, from the Server-Timing spans (dataset, compute, validate, serialize)",
+    ("stage",)
+)
+
+DATASET_LOAD_DURATION = histogram(
+    "dataset_load_duration_seconds",
+    "Time spent loading a dataset from its source files",
+    ("dataset",)
+)
+DATASET_ROWS = gauge("dataset_rows", "Rows in the currently loaded dataset", ("dataset",))
+DATASET_COLUMNS = gauge("dataset_columns", "Columns in the currently loaded dataset", ("dataset",))
+DATASET_CACHE_REQUESTS = counter(
+    "dataset_cache_requests_total",
+    "Dataset lookups served from memory (hit) or loaded from source (miss)",
+    ("dataset", "result")
+)
+
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    ratios = {}
+    for (dataset, result), hits in list(DATASET_CACHE_REQUESTS._values.items()):
+        if result != "hit":
+            continue
+        total = hits + DATASET_CACHE_REQUESTS.value(dataset=dataset, result="miss")
+        ratios[(dataset,)] = hits / total if total else 0.0
+    return ratios
+
+
+DATASET_CACHE_HIT_RATIO = gauge(
+    "dataset_cache_hit_ratio",
+    "Share of dataset lookups served from memory since start",
+    ("dataset",),
+    callback=_cache_hit_ratios
+)
+
+
+def _thread_pool_statistics() -> Dict[LabelValues, float]:
+    # The limiter lives in the event loop's context, so this is read from the /metrics handler
+    from anyio.to_thread import current_default_thread_limiter
+
+    stats = current_default_thread_limiter().statistics()
+    return {
+        ("busy",): stats.borrowed_tokens,
+        ("max",): stats.total_tokens,
+        ("waiting",): stats.tasks_waiting
+    }
+
+
+THREAD_POOL = gauge(
+    "threadpool_workers",
+    "Worker thread pool: busy threads, max threads and tasks queued waiting for a thread",
+    ("state",),
+    callback=_thread_pool_statistics
+)
+
+
+def _resident_memory() -> Dict[LabelValues, float]:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return {(): pages * os.sysconf("SC_PAGE_SIZE")}
+    except (OSError, ValueError, IndexError):
+        # Peak RSS, in KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {(): peak if os.uname().sysname == "Darwin" else peak * 1024}
+
+
+PROCESS_RSS = gauge(
+    "process_resident_memory_bytes",
+    "Resident memory of this worker process",
+    callback=_resident_memory
+)
+
+
+# Multi-process mode: directory the processes write their snapshots to (None: off)
+_multiprocess_dir: Optional[Path] = None
+_flush_interval = 5.0
+_snapshot_name = ""
+_last_flush = 0.0
+_flush_pending = False
+
+
+def enable_multiprocess(directory: Path, flush_interval: float) -> None:
+    """
+    Report every process forked from now on in /metrics (see the module docstring)
+
+    Called by the launcher's parent process before it forks its workers; snapshots
+    left by earlier runs are removed.
+    """
+    global _multiprocess_dir, _flush_interval, _snapshot_name
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        path.unlink(missing_ok=True)
+    _multiprocess_dir = directory
+    _flush_interval = flush_interval
+    _snapshot_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+    flush_metrics()
+
+
+def flush_metrics() -> None:
+    """Write this process's snapshot (multi-process mode only)"""
+    global _last_flush, _flush_pending
+    if _multiprocess_dir is None:
+        return
+    _last_flush = time.monotonic()
+    _flush_pending = False
+    snapshot = {metric.name: [[list(key), value] for key, value in metric.items()] for metric in registry}
+    tmp_path = _multiprocess_dir / f".{_snapshot_name}.tmp"
+    try:
+        tmp_path.write_text(json.dumps(snapshot))
+        os.replace(tmp_path, _multiprocess_dir / _snapshot_name)
+    except OSError:
+        # Metrics must never fail a request; the next flush tries again
+        pass
+
+
+def _flush_soon() -> None:
+    """Flush now if the last flush is old enough, otherwise once it is (on the running event loop)"""
+    global _flush_pending
+    if _multiprocess_dir is None or _flush_pending:
+        return
+    wait = _flush_interval - (time.monotonic() - _last_flush)
+    if wait <= 0:
+        flush_metrics()
+        return
+    import asyncio
+    asyncio.get_running_loop().call_later(wait, flush_metrics)
+    _flush_pending = True
+
+
+def _read_snapshots() -> Dict[int, Dict[str, list]]:
+    snapshots: Dict[int, Dict[str, list]] = {}
+    for path in _multiprocess_dir.glob("*.json"):
+        try:
+            pid = int(path.stem.split('-')[0])
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        # A pid reused by a later process: keep both snapshots under it
+        for name, series in snapshot.items():
+            snapshots.setdefault(pid, {}).setdefault(name, []).extend(series)
+    return snapshots
+
+
+def _reset_in_child() -> None:
+    global _snapshot_name, _last_flush, _flush_pending
+    if _multiprocess_dir is None:
+        return
+    # Counters and histograms restart from zero (the parent reports its own); gauges
+    # such as the loaded dataset sizes still describe this process
+    for metric in registry:
+        if isinstance(metric, Gauge):
+            metric._lock = threading.Lock()
+        else:
+            metric.reset()
+    _snapshot_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+    _last_flush = 0.0
+    _flush_pending = False
+
+
+os.register_at_fork(after_in_child=_reset_in_child)
+
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text format (of every worker in multi-process mode)"""
+    if _multiprocess_dir is None:
+        return registry.render()
+    flush_metrics()
+    return registry.render_merged(_read_snapshots())
+
+
+class MetricsMiddleware:
+    """Records latency of every request under its route template (e.g. /insights/competitor/{competitor_name})"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        method = scope.get("method", "")
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - started,
+                method=method,
+                route=route_path,
+                status=str(status["code"])
+            )
+            _flush_soon()
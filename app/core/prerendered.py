@@ -0,0 +1,247 @@
+"""
+Pre-rendered dashboard payloads
+
+The dashboard's parameterless GET endpoints (ranking table, heatmap, all-insights,
+...) return the same body for as long as the datasets do not change. The build
+step (`python -m app.services.snapshot`) renders them once into PAYLOAD_DIR:
+
+    <key>/manifest.json    {request path: {content coding: file name}}
+    <key>/<file>.json      Response body exactly as the endpoint renders it
+    <key>/<file>.json.gz   The body gzip-compressed (also .br / .zst with brotli / zstandard installed)
+
+The key covers the dataset version, the settings that shape the responses and
+the application source. PrerenderedPayloadMiddleware answers a GET without a query string from those
+files while their key is current; any other request (including one whose Accept
+header asks for a columnar format), or any request after an upload or file
+change, goes to the endpoint as usual.
+
+Bodies are compressed once, when they are written, and only kept compressed
+when they are at least PAYLOAD_COMPRESSION_MIN_BYTES long and shrink to at most
+PAYLOAD_COMPRESSION_MAX_RATIO of their size. Each request gets the smallest
+variant its Accept-Encoding allows, so serving a cached payload never
+compresses anything.
+"""
+import gzip
+import hashlib
+import json
+import shutil
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.columnar import NotAcceptable, negotiate
+from app.core.config import BASE_DIR, settings
+from app.core.logger import setup_logger
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = setup_logger(__name__)
+
+# Bump when the payload layout changes so older payloads are ignored
+PAYLOAD_FORMAT_VERSION = 2
+
+JSON_MEDIA_TYPE = b"application/json"
+IDENTITY = "identity"
+
+# Content codings the payloads are stored in: file suffix and compressor (maximum
+# compression levels, as the bodies are compressed once at build time)
+COMPRESSORS: Dict[str, Tuple[str, Callable[[bytes], bytes]]] = {
+    "gzip": (".gz", lambda body: gzip.compress(body, compresslevel=9, mtime=0))
+}
+if brotli is not None:
+    COMPRESSORS["br"] = (".br", lambda body: brotli.compress(body, quality=11))
+if zstandard is not None:
+    COMPRESSORS["zstd"] = (".zst", lambda body: zstandard.ZstdCompressor(level=19).compress(body))
+
+# Source tree covered by the code fingerprint
+APP_DIR = BASE_DIR / "app"
+
+
+@lru_cache()
+def code_fingerprint() -> str:
+    """Digest of the application source, so payloads never outlive the code that rendered them"""
+    digest = hashlib.sha1()
+    for path in sorted(APP_DIR.rglob("*.py")):
+        digest.update(path.relative_to(APP_DIR).as_posix().encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def payload_key() -> str:
+    """Identifies the responses the current datasets, settings and code produce"""
+    # Imported here so importing this module never loads the services
+    from app.services.dataset_store import dataset_store
+    from app.services.scoring_engine import weights_signature
+
+    key = (
+        f"{PAYLOAD_FORMAT_VERSION};{code_fingerprint()};{dataset_store.version};"
+        f"{settings.RANKING_SOURCE};{settings.FOCUS_MARKETPLACE};{weights_signature()};"
+        f"{settings.PRICE_CURRENCY};{settings.PRICE_SKETCH_RELATIVE_ACCURACY}"
+    )
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def compress_payload(body: bytes) -> Dict[str, bytes]:
+    """The body in every content coding worth storing ({IDENTITY: body} at least)"""
+    variants = {IDENTITY: body}
+    if not settings.PAYLOAD_COMPRESSION or len(body) < settings.PAYLOAD_COMPRESSION_MIN_BYTES:
+        return variants
+    for coding, (_, compress) in COMPRESSORS.items():
+        compressed = compress(body)
+        if len(compressed) <= len(body) * settings.PAYLOAD_COMPRESSION_MAX_RATIO:
+            variants[coding] = compressed
+    return variants
+
+
+def write_payloads(key: str, payloads: Dict[str, bytes]) -> Path:
+    """Store rendered bodies (and their compressed variants) under a key, replacing older payload sets"""
+    settings.PAYLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    directory = settings.PAYLOAD_DIR / key
+    tmp_dir = settings.PAYLOAD_DIR / f".tmp-{uuid.uuid4().hex}"
+    tmp_dir.mkdir()
+
+    manifest = {}
+    for i, (path, body) in enumerate(sorted(payloads.items())):
+        manifest[path] = {}
+        for coding, variant in compress_payload(body).items():
+            name = f"{i}.json" + (COMPRESSORS[coding][0] if coding != IDENTITY else "")
+            (tmp_dir / name).write_bytes(variant)
+            manifest[path][coding] = name
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    shutil.rmtree(directory, ignore_errors=True)
+    tmp_dir.rename(directory)
+    for path in settings.PAYLOAD_DIR.iterdir():
+        if path != directory and path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+    return directory
+
+
+def read_payloads(key: str) -> Dict[str, Dict[str, bytes]]:
+    """Bodies stored under a key, per content coding ({} if none were rendered for it)"""
+    directory = settings.PAYLOAD_DIR / key
+    try:
+        manifest = json.loads((directory / "manifest.json").read_text())
+        return {
+            path: {coding: (directory / name).read_bytes() for coding, name in files.items()}
+            for path, files in manifest.items()
+        }
+    except (OSError, ValueError, AttributeError):
+        return {}
+
+
+def _accepted_codings(accept_encoding: str) -> Dict[str, float]:
+    """{content coding: q} of an Accept-Encoding header"""
+    codings = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = coding.lower()
+        codings["gzip" if coding == "x-gzip" else coding] = quality
+    return codings
+
+
+def choose_coding(accept_encoding: Optional[str], variants: Dict[str, bytes]) -> str:
+    """Content coding to send: the smallest variant among the most preferred ones the client accepts"""
+    if not accept_encoding or len(variants) == 1:
+        return IDENTITY
+    accepted = _accepted_codings(accept_encoding)
+    default = accepted.get("*", 0.0)
+    best, best_rank = IDENTITY, None
+    for coding, body in variants.items():
+        if coding == IDENTITY:
+            continue
+        quality = accepted.get(coding, default)
+        if quality > 0 and (best_rank is None or (quality, -len(body)) > best_rank):
+            best, best_rank = coding, (quality, -len(body))
+    return best
+
+
+class PrerenderedPayloadMiddleware:
+    """Serves pre-rendered bodies for parameterless GET requests while they are current"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._loaded: Tuple[Optional[str], Dict[str, Dict[str, bytes]]] = (None, {})
+        self._routes = None
+
+    def _payload(self, path: str) -> Optional[Dict[str, bytes]]:
+        key = payload_key()
+        loaded_key, payloads = self._loaded
+        if key != loaded_key:
+            payloads = read_payloads(key)
+            self._loaded = (key, payloads)
+            if payloads:
+                logger.info("📦 Serving %s pre-rendered payloads (key %s)", len(payloads), key)
+        return payloads.get(path)
+
+    def _route(self, scope: Scope, path: str):
+        # Set on the scope like the router would, so metrics and profiles name the route
+        if self._routes is None:
+            app = scope.get("app")
+            routes = getattr(getattr(app, "router", None), "routes", [])
+            self._routes = {getattr(route, "path", None): route for route in routes}
+        return self._routes.get(path)
+
+    @staticmethod
+    def _header(scope: Scope, name: bytes) -> Optional[str]:
+        for key, value in scope.get("headers") or []:
+            if key == name:
+                return value.decode("latin-1")
+        return None
+
+    def _wants_json(self, scope: Scope) -> bool:
+        accept = self._header(scope, b"accept")
+        try:
+            return negotiate(accept) is None
+        except NotAcceptable:
+            return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or scope.get("query_string") or not self._wants_json(scope):
+            await self.app(scope, receive, send)
+            return
+
+        variants = self._payload(scope["path"])
+        if variants is None:
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope, scope["path"])
+        if route is not None:
+            scope["route"] = route
+        coding = choose_coding(self._header(scope, b"accept-encoding"), variants)
+        body = variants[coding]
+        headers = [
+            (b"content-length", str(len(body)).encode()),
+            (b"content-type", JSON_MEDIA_TYPE),
+            (b"vary", b"Accept, Accept-Encoding")
+        ]
+        if coding != IDENTITY:
+            headers.append((b"content-encoding", coding.encode()))
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": headers
+        })
+        await send({"type": "http.response.body", "body": body})
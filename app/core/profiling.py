@@ -0,0 +1,185 @@
+"""
+Opt-in per-request profiling
+
+An admin can ask for a single request to be profiled by sending the configured
+PROFILER_TOKEN in the X-Admin-Token header (or ?admin_token=) together with
+X-Profile (or ?profile=) set to one of:
+
+    pstats     Deterministic profile (cProfile), saved as a .pstats file
+    collapsed  Sampled call stacks of the serving thread, saved in the collapsed
+               format read by flamegraph.pl and speedscope
+
+Profiles are written to PROFILE_DIR, named after the route template and the
+dataset version, and the file name is returned in the X-Profile-File header.
+
+The endpoints run their pandas work on the event loop thread, so both profilers
+watch that thread. Requests served concurrently on the same loop show up in the
+profile too; profile on an otherwise idle worker for clean results. Only one
+request is profiled at a time.
+
+When PROFILER_TOKEN is empty the middleware is not installed at all.
+"""
+import cProfile
+import hmac
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+PROFILE_MODES = ('pstats', 'collapsed')
+
+# Only one profiler may be active per process
+_profile_lock = threading.Lock()
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval"""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format, one "frame;frame;... count" line per stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _requested_mode(scope: Scope) -> Optional[str]:
+    """Profile mode asked for by an authorized request, if any"""
+    headers = dict(scope.get("headers") or [])
+    mode = headers.get(b"x-profile", b"").decode()
+    token = headers.get(b"x-admin-token", b"").decode()
+
+    if (not mode or not token) and scope.get("query_string"):
+        query = parse_qs(scope["query_string"].decode())
+        mode = mode or query.get("profile", [""])[0]
+        token = token or query.get("admin_token", [""])[0]
+
+    if not mode:
+        return None
+    if not hmac.compare_digest(token.encode(), settings.PROFILER_TOKEN.encode()):
+        logger.warning("⚠️ Ignoring profile request for %s: invalid admin token", scope.get('path'))
+        return None
+    if mode not in PROFILE_MODES:
+        logger.warning("⚠️ Ignoring profile request: unknown mode '%s' (expected %s)", mode, ', '.join(PROFILE_MODES))
+        return None
+    return mode
+
+
+def profile_path(route: str, dataset_version: str, mode: str) -> Path:
+    """File a profile is saved to"""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+    suffix = ".pstats" if mode == "pstats" else ".collapsed"
+    return settings.PROFILE_DIR / f"{stamp}-{slug}-{dataset_version}{suffix}"
+
+
+def _prune_profiles() -> None:
+    """Keep only the newest PROFILE_HISTORY profiles"""
+    profiles = sorted(settings.PROFILE_DIR.glob("*.*"), reverse=True)
+    for path in profiles[settings.PROFILE_HISTORY:]:
+        path.unlink(missing_ok=True)
+
+
+class ProfilerMiddleware:
+    """Runs admin-requested requests under a profiler and saves the result"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        mode = _requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not _profile_lock.acquire(blocking=False):
+            logger.warning("⚠️ Profiler busy; serving %s unprofiled", scope.get('path'))
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(mode, scope, receive, send)
+        finally:
+            _profile_lock.release()
+
+    async def _profile(self, mode: str, scope: Scope, receive: Receive, send: Send) -> None:
+        # Imported here so importing this module never loads the datasets
+        from app.services.dataset_store import dataset_store
+
+        # The route is only known once the router has matched, and the file name is
+        # sent with the response headers, so the path is fixed at response start
+        saved = {}
+
+        def start_profiler():
+            if mode == "pstats":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                return profiler
+            sampler = StackSampler(threading.get_ident(), settings.PROFILER_SAMPLE_INTERVAL)
+            sampler.start()
+            return sampler
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+                saved["path"] = profile_path(route, dataset_store.version, mode)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-file", saved["path"].name.encode())
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        profiler = start_profiler()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if mode == "pstats":
+                profiler.disable()
+            else:
+                profiler.stop()
+            elapsed = time.perf_counter() - started
+
+            path = saved.get("path")
+            if path is not None:
+                settings.PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+                if mode == "pstats":
+                    profiler.dump_stats(path)
+                else:
+                    path.write_text(profiler.collapsed())
+                _prune_profiles()
+                logger.info("🔬 Profiled %s in %.3fs -> %s", scope.get('path'), elapsed, path.name)
@@ -0,0 +1,43 @@
+"""
+JSON rendering of API responses
+
+Response bodies are rendered with orjson (a project dependency), which encodes
+dicts, lists, numpy values and datetimes natively; anything else (pydantic
+models, ...) goes through FastAPI's jsonable_encoder. In an environment without
+orjson the bodies are rendered exactly like starlette's JSONResponse renders them.
+"""
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return jsonable_encoder(value)
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        """Compact UTF-8 JSON body of content"""
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    def dumps(content: Any) -> bytes:
+        """Compact UTF-8 JSON body of content"""
+        return json.dumps(
+            content,
+            default=_default,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":")
+        ).encode("utf-8")
@@ -0,0 +1,285 @@
+"""
+Per-request tracing with Server-Timing breakdowns
+
+ServerTimingMiddleware opens a trace for every HTTP request and returns its
+spans in the Server-Timing response header (shown per request in the browser
+devtools Timing tab), together with an X-Request-ID:
+
+    dataset    Acquiring frames from the dataset store (cache lookups and loads)
+    compute    The endpoint's own work, excluding dataset time
+    validate   Request parsing and response-model validation
+    serialize  Rendering the response body to JSON
+    total      Time until the response headers were sent
+
+Spans nest and each reports its exclusive time, so the phases add up to the
+total (minus middleware overhead). Code outside a request pays only a context
+variable lookup per span. Application log records carry the request id as
+%(request_id)s (see LOG_FORMAT). Every request's span times also feed the
+http_request_stage_duration_seconds histogram of /metrics, by stage.
+"""
+import inspect
+import json
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Any, Callable, Coroutine, Dict, List, Optional
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.dependencies.models import Dependant
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import add_record_filter, setup_logger
+from app.core.metrics import REQUEST_STAGE_LATENCY
+from app.core.serialization import dumps
+
+logger = setup_logger(__name__)
+
+# Header order and devtools descriptions of the known spans
+SPAN_DESCRIPTIONS = {
+    'dataset': 'Dataset acquisition',
+    'compute': 'Service computation',
+    'validate': 'Request parsing and response validation',
+    'serialize': 'JSON serialization',
+    'total': 'Total'
+}
+
+# Longest accepted client-supplied request id
+MAX_REQUEST_ID_LENGTH = 128
+
+
+class Trace:
+    """Accumulated span timings of one request"""
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        # [span start, time spent in child spans] for each open span
+        self._stack: List[List[float]] = []
+
+    def enter(self) -> None:
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def exit(self, name: str) -> None:
+        started, child_time = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.durations[name] = self.durations.get(name, 0.0) + elapsed - child_time
+        if self._stack:
+            self._stack[-1][1] += elapsed
+
+    def server_timing(self, total: float) -> str:
+        """Server-Timing header value (durations in milliseconds)"""
+        durations = dict(self.durations, total=total)
+        names = [name for name in SPAN_DESCRIPTIONS if name in durations]
+        names += [name for name in durations if name not in SPAN_DESCRIPTIONS]
+        return ", ".join(
+            f'{name};desc="{SPAN_DESCRIPTIONS.get(name, name)}";dur={durations[name] * 1000:.2f}'
+            for name in names
+        )
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('current_trace', default=None)
+
+
+class span:
+    """
+    Time a block as a named span of the current request's trace
+
+    Usage:
+        with span('dataset'):
+            frame = load()
+    """
+    __slots__ = ('name', 'trace')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.trace = _current_trace.get()
+
+    def __enter__(self) -> 'span':
+        if self.trace is not None:
+            self.trace.enter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self.trace is not None:
+            self.trace.exit(self.name)
+
+
+def untraced(call: Callable, *args, **kwargs) -> Any:
+    """
+    Call outside the current request's trace
+
+    For work that runs concurrently with the request's other spans (e.g. on worker
+    threads), whose span nesting would otherwise interleave with theirs.
+    """
+    token = _current_trace.set(None)
+    try:
+        return call(*args, **kwargs)
+    finally:
+        _current_trace.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    """Id of the request being served, if any"""
+    trace = _current_trace.get()
+    return trace.request_id if trace is not None else None
+
+
+class RequestIdFilter(logging.Filter):
+    """Tag log records with the id of the request being served ('-' outside requests)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or '-'
+        return True
+
+
+add_record_filter(RequestIdFilter())
+
+
+# Parameter the rendered path receives FastAPI's sub-response through, for endpoints
+# that do not take a Response themselves
+RENDERED_RESPONSE_PARAM = '_rendered_response'
+
+
+def _rendered_call(call: Callable, response_class: type, status_code: Optional[int], dependant: Dependant) -> Callable:
+    """
+    Wrap an endpoint so whatever it returns is rendered into a response of the route's class
+
+    Headers and a status code that the endpoint or its dependencies set on an injected
+    Response are carried over, as FastAPI does for the content it renders itself.
+    """
+    if dependant.response_param_name is None:
+        dependant.response_param_name = RENDERED_RESPONSE_PARAM
+    param = dependant.response_param_name
+    owned = param == RENDERED_RESPONSE_PARAM
+
+    def respond(content: Any, sub_response: Response) -> Response:
+        if isinstance(content, Response):
+            return content
+        code = sub_response.status_code or status_code
+        response = response_class(content, **({'status_code': code} if code is not None else {}))
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
+
+    if inspect.iscoroutinefunction(call):
+        async def rendered(*args, **kwargs):
+            sub_response = kwargs.pop(param) if owned else kwargs[param]
+            return respond(await call(*args, **kwargs), sub_response)
+    else:
+        def rendered(*args, **kwargs):
+            sub_response = kwargs.pop(param) if owned else kwargs[param]
+            return respond(call(*args, **kwargs), sub_response)
+    return rendered
+
+
+def _timed_call(call: Callable, name: str) -> Callable:
+    """Wrap an endpoint so its execution is recorded as a span, keeping it sync or async"""
+    if inspect.iscoroutinefunction(call):
+        async def timed(*args, **kwargs):
+            with span(name):
+                return await call(*args, **kwargs)
+    else:
+        def timed(*args, **kwargs):
+            with span(name):
+                return call(*args, **kwargs)
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    Route that records the endpoint as 'compute' and the rest of the handler as 'validate'
+
+    Unless RESPONSE_VALIDATION is set, what a JSON endpoint returns is trusted to
+    match its response_model already and is rendered straight to bytes, skipping
+    the model validation and jsonable_encoder passes. The response_model still
+    documents the endpoint, so the OpenAPI schema is the same either way.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        call = _timed_call(self.dependant.call, 'compute')
+        response_class = self.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        if not settings.RESPONSE_VALIDATION and issubclass(response_class, TimedJSONResponse):
+            call = _rendered_call(call, response_class, self.status_code, self.dependant)
+        self.dependant.call = call
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request) -> Response:
+            with span('validate'):
+                return await handler(request)
+
+        return timed_handler
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSON response whose rendering (see app.core.serialization) is recorded as 'serialize'"""
+
+    def render(self, content: Any) -> bytes:
+        with span('serialize'):
+            return dumps(content)
+
+
+def _request_id(scope: Scope) -> str:
+    for key, value in scope.get("headers") or []:
+        if key == b"x-request-id":
+            request_id = value.decode('latin-1').strip()
+            if 0 < len(request_id) <= MAX_REQUEST_ID_LENGTH:
+                return request_id
+    return uuid.uuid4().hex
+
+
+class ServerTimingMiddleware:
+    """
+    Opens a trace per request and reports it in the Server-Timing header
+
+    Every response carries an X-Request-ID (the client's own, if it sent one), which
+    is also the id used in the TRACE_LOG line.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(_request_id(scope))
+        token = _current_trace.set(trace)
+        status = {}
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - trace.started
+                status["code"] = message["status"]
+                status["total"] = total
+                headers = list(message.get("headers", []))
+                if settings.SERVER_TIMING:
+                    headers.append((b"server-timing", trace.server_timing(total).encode()))
+                headers.append((b"x-request-id", trace.request_id.encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            for name, duration in trace.durations.items():
+                REQUEST_STAGE_LATENCY.observe(duration, stage=name)
+            if settings.TRACE_LOG and "total" in status:
+                route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+                logger.info("trace %s", json.dumps({
+                    'request_id': trace.request_id,
+                    'method': scope.get("method"),
+                    'route': route,
+                    'status': status["code"],
+                    'spans_ms': {name: round(value * 1000, 3) for name, value in trace.durations.items()},
+                    'total_ms': round(status["total"] * 1000, 3)
+                }))
@@ -137,6 +137,55 @@ class RankPrediction(BaseModel):
     roi_multiplier: float
 
 
+class MetricQuantiles(BaseModel):
+    """Quantiles of a price or delivery metric (None without any listed value)"""
+    count: int  # Listings with a value
+    p10: Optional[float] = None
+    median: Optional[float] = None
+    p90: Optional[float] = None
+
+
+class PriceDeliveryStats(BaseModel):
+    """Price and delivery fee (in the requested currency) and delivery time in days"""
+    price: MetricQuantiles
+    delivery_fee: MetricQuantiles
+    delivery_days: MetricQuantiles
+
+
+class PriceDeliveryComparison(BaseModel):
+    """Price and delivery competitiveness of the focus marketplace in a category"""
+    category: str
+    currency: str
+    focus: PriceDeliveryStats
+    competitors: PriceDeliveryStats  # All other marketplaces of the category combined
+    competitor_count: int
+    price_index: Optional[float] = None  # Focus median price as % of the competitors' (100 = on par)
+    delivery_days_gap: Optional[float] = None  # Focus median delivery days minus the competitors' (> 0: slower)
+
+
+class MarketplacePriceDelivery(BaseModel):
+    """Price and delivery quantiles of one marketplace in a category"""
+    marketplace: str
+    is_focus: bool
+    price: MetricQuantiles
+    delivery_fee: MetricQuantiles
+    delivery_days: MetricQuantiles
+    price_index: Optional[float] = None  # Median price as % of the focus marketplace's
+    delivery_days_gap: Optional[float] = None  # Median delivery days minus the focus marketplace's
+
+
+class CategoryPriceDelivery(BaseModel):
+    """Price and delivery comparison of one category, per marketplace"""
+    category: str
+    currency: str
+    focus: PriceDeliveryStats
+    competitors: PriceDeliveryStats
+    competitor_count: int
+    price_index: Optional[float] = None
+    delivery_days_gap: Optional[float] = None
+    marketplaces: List[MarketplacePriceDelivery]
+
+
 class AllAdditionalData(BaseModel):
     """All additional analytics data"""
     citation_visibility: CitationVisibilityScore
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class IngestionJob(BaseModel):
+    """Background ingestion job for an uploaded dataset file"""
+    job_id: str
+    dataset: str  # "rankings", "details", "no-rank"
+    filename: str
+    status: str  # "queued", "running", "succeeded", "failed"
+    rows: Optional[int] = None
+    columns: Optional[List[str]] = None
+    error: Optional[str] = None
+    dataset_version: Optional[str] = None  # Version published by this job
+    derived_rebuilt: bool = False  # Ranking pipeline re-run after a details upload
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
 
+from app.core.config import settings
+
 
 class OverviewMetrics(BaseModel):
     """Executive dashboard overview metrics"""
@@ -122,3 +124,31 @@ class CategoryBattle(BaseModel):
     product_count: int
     amazon_product_count: int
     missing_product_count: int
+
+
+class BatchItemError(BaseModel):
+    """Why one item of a batch request has no result"""
+    status_code: int  # 500 failed to compute
+    detail: str
+
+
+class CategoryBattleBatchRequest(BaseModel):
+    """Categories to compare in one request"""
+    categories: List[str] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+
+class CategoryBattleBatch(BaseModel):
+    """Battle analysis per requested category"""
+    results: Dict[str, CategoryBattle]
+    errors: Dict[str, BatchItemError]
+
+
+class CompetitorBatchRequest(BaseModel):
+    """Competitors to compare in one request"""
+    competitors: List[str] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+
+class CompetitorBatch(BaseModel):
+    """Competitor analysis per requested competitor"""
+    results: Dict[str, CompetitorDetail]
+    errors: Dict[str, BatchItemError]
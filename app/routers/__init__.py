@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from app.routers import analytics_router, insights_router
 from app.routers import additional_router
+from app.routers import data_router
 
 # Create a main router that includes all sub-routers
 api_router = APIRouter()
@@ -26,5 +27,12 @@ api_router.include_router(
     tags=["Additional"]
 )
 
+# Include Data router
+api_router.include_router(
+    data_router.router,
+    prefix="/data",
+    tags=["Data Management"]
+)
+
 # Add more routers here as needed
 # api_router.include_router(other_router.router, prefix="/other", tags=["Other"])
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from functools import lru_cache
+from pydantic import TypeAdapter
+from typing import List, Optional
 from app.services.additional_service import (
     calculate_citation_visibility,
     calculate_source_authority_mapping,
     calculate_official_store_scores,
     calculate_trust_signals,
     calculate_product_availability_matrix,
+    product_availability_frame,
     calculate_niche_opportunities,
     calculate_category_associations,
     calculate_competitor_specialties,
     calculate_intent_alignments,
-    predict_rank_movement
+    predict_rank_movement,
+    calculate_price_delivery_comparison,
+    get_category_price_delivery
 )
 from app.models.additional_schemas import (
     CitationVisibilityScore,
@@ -23,17 +28,23 @@ from app.models.additional_schemas import (
     CompetitorSpecialty,
     IntentAlignment,
     RankPrediction,
+    PriceDeliveryComparison,
+    CategoryPriceDelivery,
     AllAdditionalData
 )
+from app.core.config import settings
+from app.core.columnar import COLUMNAR_RESPONSES, ColumnarResponse
 from app.core.logger import setup_logger
+from app.core.tracing import TimedJSONResponse, TimedRoute
+from app.routers.dependencies import Fieldset, columnar_format, focus_marketplace, price_currency, requested_fieldset
 
 logger = setup_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute, default_response_class=TimedJSONResponse)
 
 
 @router.get("/citation-visibility", response_model=CitationVisibilityScore)
-async def get_citation_visibility():
+async def get_citation_visibility(focus: str = Depends(focus_marketplace)):
     """
     Get citation frequency comparison across marketplaces
     
@@ -42,11 +53,11 @@ async def get_citation_visibility():
     """
     try:
         logger.info("📊 API: Fetching citation visibility...")
-        data = calculate_citation_visibility()
+        data = calculate_citation_visibility(focus)
         logger.info("✅ API: Successfully returned citation visibility")
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching citation visibility - {str(e)}")
+        logger.error("❌ API: Error fetching citation visibility - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -64,12 +75,12 @@ async def get_source_authority_map():
         logger.info("✅ API: Successfully returned source authority mapping")
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching source authority - {str(e)}")
+        logger.error("❌ API: Error fetching source authority - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/official-store-scores", response_model=List[OfficialStoreScore])
-async def get_official_store_scores():
+async def get_official_store_scores(focus: str = Depends(focus_marketplace)):
     """
     Get official store recognition scores by category
     
@@ -78,11 +89,11 @@ async def get_official_store_scores():
     """
     try:
         logger.info("📊 API: Fetching official store scores...")
-        data = calculate_official_store_scores()
-        logger.info(f"✅ API: Successfully returned {len(data)} official store scores")
+        data = calculate_official_store_scores(focus)
+        logger.info("✅ API: Successfully returned %s official store scores", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching official store scores - {str(e)}")
+        logger.error("❌ API: Error fetching official store scores - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -97,33 +108,39 @@ async def get_trust_signals():
     try:
         logger.info("📊 API: Fetching trust signals...")
         data = calculate_trust_signals()
-        logger.info(f"✅ API: Successfully returned {len(data)} trust signals")
+        logger.info("✅ API: Successfully returned %s trust signals", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching trust signals - {str(e)}")
+        logger.error("❌ API: Error fetching trust signals - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/product-availability-matrix", response_model=List[ProductAvailabilityRow])
-async def get_product_availability_matrix():
+@router.get("/product-availability-matrix", response_model=List[ProductAvailabilityRow], responses=COLUMNAR_RESPONSES)
+async def get_product_availability_matrix(
+    focus: str = Depends(focus_marketplace),
+    columnar: Optional[str] = Depends(columnar_format)
+):
     """
     Get product availability matrix by category
     
     Returns:
         List of ProductAvailabilityRow with missing product analysis
+        (as columns for an Arrow / MessagePack Accept header)
     """
     try:
         logger.info("📊 API: Fetching product availability matrix...")
-        data = calculate_product_availability_matrix()
-        logger.info(f"✅ API: Successfully returned {len(data)} category availability data")
+        if columnar:
+            return ColumnarResponse(product_availability_frame(focus), columnar, map_columns=['competitor_availability'])
+        data = calculate_product_availability_matrix(focus)
+        logger.info("✅ API: Successfully returned %s category availability data", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching product availability - {str(e)}")
+        logger.error("❌ API: Error fetching product availability - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/niche-opportunities", response_model=List[NicheCategoryOpportunity])
-async def get_niche_opportunities():
+async def get_niche_opportunities(focus: str = Depends(focus_marketplace)):
     """
     Get niche category opportunity analysis
     
@@ -132,11 +149,11 @@ async def get_niche_opportunities():
     """
     try:
         logger.info("📊 API: Fetching niche opportunities...")
-        data = calculate_niche_opportunities()
-        logger.info(f"✅ API: Successfully returned {len(data)} niche opportunities")
+        data = calculate_niche_opportunities(focus)
+        logger.info("✅ API: Successfully returned %s niche opportunities", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching niche opportunities - {str(e)}")
+        logger.error("❌ API: Error fetching niche opportunities - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -151,15 +168,15 @@ async def get_category_association():
     try:
         logger.info("📊 API: Fetching category associations...")
         data = calculate_category_associations()
-        logger.info(f"✅ API: Successfully returned {len(data)} category associations")
+        logger.info("✅ API: Successfully returned %s category associations", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching category associations - {str(e)}")
+        logger.error("❌ API: Error fetching category associations - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/competitor-specialty", response_model=List[CompetitorSpecialty])
-async def get_competitor_specialty():
+async def get_competitor_specialty(focus: str = Depends(focus_marketplace)):
     """
     Get competitor specialty pattern analysis
     
@@ -168,16 +185,16 @@ async def get_competitor_specialty():
     """
     try:
         logger.info("📊 API: Fetching competitor specialties...")
-        data = calculate_competitor_specialties()
-        logger.info(f"✅ API: Successfully returned {len(data)} competitor specialties")
+        data = calculate_competitor_specialties(focus)
+        logger.info("✅ API: Successfully returned %s competitor specialties", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching competitor specialties - {str(e)}")
+        logger.error("❌ API: Error fetching competitor specialties - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/intent-alignment", response_model=List[IntentAlignment])
-async def get_intent_alignment():
+async def get_intent_alignment(focus: str = Depends(focus_marketplace)):
     """
     Get user intent to marketplace alignment
     
@@ -186,11 +203,11 @@ async def get_intent_alignment():
     """
     try:
         logger.info("📊 API: Fetching intent alignments...")
-        data = calculate_intent_alignments()
-        logger.info(f"✅ API: Successfully returned {len(data)} intent alignments")
+        data = calculate_intent_alignments(focus)
+        logger.info("✅ API: Successfully returned %s intent alignments", len(data))
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error fetching intent alignments - {str(e)}")
+        logger.error("❌ API: Error fetching intent alignments - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -198,7 +215,8 @@ async def get_intent_alignment():
 async def get_rank_prediction(
     category: str = Query(..., description="Product category name"),
     products_to_add: int = Query(5, ge=0, le=50, description="Number of products to add"),
-    citations_needed: int = Query(10, ge=0, le=100, description="Number of citation mentions needed")
+    citations_needed: int = Query(10, ge=0, le=100, description="Number of citation mentions needed"),
+    focus: str = Depends(focus_marketplace)
 ):
     """
     Predict rank movement and ROI based on actions
@@ -207,45 +225,126 @@ async def get_rank_prediction(
         category: Product category to analyze
         products_to_add: Number of products to add to catalog
         citations_needed: Number of citation mentions to target
+        focus: Marketplace to predict for (default: Amazon)
     
     Returns:
         RankPrediction with timeline and ROI estimates
     """
     try:
-        logger.info(f"📊 API: Predicting rank for {category}...")
-        data = predict_rank_movement(category, products_to_add, citations_needed)
+        logger.info("📊 API: Predicting rank for %s...", category)
+        data = predict_rank_movement(category, products_to_add, citations_needed, focus)
         logger.info("✅ API: Successfully returned rank prediction")
         return data
     except Exception as e:
-        logger.error(f"❌ API: Error predicting rank - {str(e)}")
+        logger.error("❌ API: Error predicting rank - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/price-delivery", response_model=List[PriceDeliveryComparison])
+async def get_price_delivery(
+    focus: str = Depends(focus_marketplace),
+    currency: str = Depends(price_currency)
+):
+    """
+    Get price and delivery competitiveness of the focus marketplace by category
+    
+    Returns:
+        List of PriceDeliveryComparison with p10 / median / p90 price, delivery
+        fee and delivery days of the focus marketplace and of its competitors
+    """
+    try:
+        logger.info("📊 API: Fetching price and delivery comparison...")
+        data = calculate_price_delivery_comparison(focus, currency)
+        logger.info("✅ API: Successfully returned %s price and delivery comparisons", len(data))
+        return data
+    except Exception as e:
+        logger.error("❌ API: Error fetching price and delivery comparison - %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/price-delivery/{category}", response_model=CategoryPriceDelivery)
+async def get_price_delivery_by_category(
+    category: str,
+    focus: str = Depends(focus_marketplace),
+    currency: str = Depends(price_currency)
+):
+    """
+    Get the price and delivery comparison of one category, per marketplace
+    
+    Args:
+        category: Product category name
+    
+    Returns:
+        CategoryPriceDelivery with the focus / competitor comparison and the
+        quantiles of every marketplace listed in the category
+    """
+    try:
+        logger.info("📊 API: Fetching price and delivery comparison for %s...", category)
+        data = get_category_price_delivery(category, focus, currency)
+        logger.info("✅ API: Successfully returned price and delivery comparison for %s", category)
+        return data
+    except ValueError as e:
+        logger.error("❌ API: Category not found - %s", e)
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("❌ API: Error fetching price and delivery comparison - %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Sections of /all-additional, in response order
+ALL_ADDITIONAL_SECTIONS = {
+    'citation_visibility': calculate_citation_visibility,
+    'source_authority': lambda focus: calculate_source_authority_mapping(),
+    'official_store_scores': calculate_official_store_scores,
+    'trust_signals': lambda focus: calculate_trust_signals(),
+    'product_availability': calculate_product_availability_matrix,
+    'niche_opportunities': calculate_niche_opportunities,
+    'category_associations': lambda focus: calculate_category_associations(),
+    'competitor_specialties': calculate_competitor_specialties,
+    'intent_alignments': calculate_intent_alignments
+}
+
+
+@lru_cache()
+def _section_adapter(section: str) -> TypeAdapter:
+    return TypeAdapter(AllAdditionalData.model_fields[section].annotation)
+
+
 @router.get("/all-additional", response_model=AllAdditionalData)
-async def get_all_additional():
+async def get_all_additional(
+    focus: str = Depends(focus_marketplace),
+    fieldset: Fieldset = Depends(requested_fieldset)
+):
     """
     Get all additional analytics data in one call (for preloading)
     
+    Only the sections listed in sections= are computed; fields= trims the
+    records of the returned sections. A selection returns just those keys (each
+    validated against its AllAdditionalData field when RESPONSE_VALIDATION is set).
+    
     Returns:
-        AllAdditionalData with all analytics combined
+        AllAdditionalData with all analytics combined (or the requested part of it)
     """
     try:
         logger.info("📊 API: Fetching all additional analytics...")
         
-        data = AllAdditionalData(
-            citation_visibility=calculate_citation_visibility(),
-            source_authority=calculate_source_authority_mapping(),
-            official_store_scores=calculate_official_store_scores(),
-            trust_signals=calculate_trust_signals(),
-            product_availability=calculate_product_availability_matrix(),
-            niche_opportunities=calculate_niche_opportunities(),
-            category_associations=calculate_category_associations(),
-            competitor_specialties=calculate_competitor_specialties(),
-            intent_alignments=calculate_intent_alignments()
-        )
+        sections = fieldset.select(ALL_ADDITIONAL_SECTIONS)
+        data = {section: ALL_ADDITIONAL_SECTIONS[section](focus) for section in sections}
+        if not fieldset.partial:
+            logger.info("✅ API: Successfully returned all additional analytics")
+            return data
         
-        logger.info("✅ API: Successfully returned all additional analytics")
-        return data
+        content = {}
+        for section, value in data.items():
+            if settings.RESPONSE_VALIDATION:
+                adapter = _section_adapter(section)
+                value = adapter.dump_python(adapter.validate_python(value), mode='json')
+            content[section] = fieldset.project(section, value)
+        
+        logger.info("✅ API: Successfully returned %s additional analytics sections", len(content))
+        return TimedJSONResponse(content)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ API: Error fetching all additional analytics - {str(e)}")
+        logger.error("❌ API: Error fetching all additional analytics - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,19 +1,26 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, Optional
 from app.services.analytics import (
     get_marketplace_rankings, 
+    get_marketplace_rankings_frame,
     get_ranking_statistics,
     get_product_category_details
 )
+from app.core.columnar import COLUMNAR_RESPONSES, ColumnarResponse
 from app.core.logger import setup_logger
+from app.core.tracing import TimedJSONResponse, TimedRoute
+from app.routers.dependencies import columnar_format
 
 logger = setup_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute, default_response_class=TimedJSONResponse)
 
 
-@router.get("/ranking-table")
-async def get_ranking_table(top_n: int = 5) -> Dict[str, Dict[str, int]]:
+@router.get("/ranking-table", responses=COLUMNAR_RESPONSES)
+async def get_ranking_table(
+    top_n: int = 5,
+    columnar: Optional[str] = Depends(columnar_format)
+) -> Dict[str, Dict[str, int]]:
     """
     Get marketplace rankings table for all product categories
     
@@ -26,27 +33,31 @@ async def get_ranking_table(top_n: int = 5) -> Dict[str, Dict[str, int]]:
             'Product Category': {'marketplace1': rank1, 'marketplace2': rank2, ...},
             ...
         }
+        or, for an Arrow / MessagePack Accept header, the columns category,
+        marketplace and rank
     """
     try:
-        logger.info(f"📊 API: Fetching ranking table (top {top_n})...")
+        logger.info("📊 API: Fetching ranking table (top %s)...", top_n)
+        if columnar:
+            return ColumnarResponse(get_marketplace_rankings_frame(top_n=top_n), columnar)
         rankings = get_marketplace_rankings(top_n=top_n)
-        logger.info(f"✅ API: Successfully returned rankings for {len(rankings)} products")
+        logger.info("✅ API: Successfully returned rankings for %s products", len(rankings))
         return rankings
         
     except FileNotFoundError as e:
-        logger.error(f"❌ API: File not found - {str(e)}")
+        logger.error("❌ API: File not found - %s", e)
         raise HTTPException(
             status_code=404,
             detail="Ranking data file not found. Please ensure the Excel file is in the correct location."
         )
     except ValueError as e:
-        logger.error(f"❌ API: Invalid data - {str(e)}")
+        logger.error("❌ API: Invalid data - %s", e)
         raise HTTPException(
             status_code=400,
             detail=f"Invalid data format: {str(e)}"
         )
     except Exception as e:
-        logger.error(f"❌ API: Unexpected error - {str(e)}")
+        logger.error("❌ API: Unexpected error - %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
@@ -70,25 +81,25 @@ async def get_product_category_analytics(category: str) -> Dict:
         - total_marketplaces: Number of marketplaces
     """
     try:
-        logger.info(f"📊 API: Fetching product category details for '{category}'...")
+        logger.info("📊 API: Fetching product category details for '%s'...", category)
         details = get_product_category_details(category)
-        logger.info(f"✅ API: Successfully returned details for '{category}'")
+        logger.info("✅ API: Successfully returned details for '%s'", category)
         return details
         
     except ValueError as e:
-        logger.error(f"❌ API: Category not found - {str(e)}")
+        logger.error("❌ API: Category not found - %s", e)
         raise HTTPException(
             status_code=404,
             detail=f"Product category not found: {category}"
         )
     except FileNotFoundError as e:
-        logger.error(f"❌ API: File not found - {str(e)}")
+        logger.error("❌ API: File not found - %s", e)
         raise HTTPException(
             status_code=404,
             detail="Data file not found. Please ensure the Excel files are in the correct location."
         )
     except Exception as e:
-        logger.error(f"❌ API: Unexpected error - {str(e)}")
+        logger.error("❌ API: Unexpected error - %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
@@ -110,7 +121,7 @@ async def get_statistics() -> Dict:
         return stats
         
     except Exception as e:
-        logger.error(f"❌ API: Error fetching statistics - {str(e)}")
+        logger.error("❌ API: Error fetching statistics - %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error fetching statistics: {str(e)}"
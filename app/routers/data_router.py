@@ -0,0 +1,270 @@
+import asyncio
+import hmac
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pathlib import Path
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from typing import AsyncIterator, List, Optional
+from app.core.config import settings
+from app.core.serialization import dumps
+from app.services.dataset_events import dataset_watcher
+from app.services.dataset_store import dataset_store
+from app.services.ingestion_service import (
+    DATASET_SPECS,
+    SUPPORTED_EXTENSIONS,
+    create_job,
+    get_job,
+    list_jobs,
+    new_upload_path,
+    run_ingestion_job
+)
+from app.models.ingestion_schemas import IngestionJob
+from app.core.logger import setup_logger
+from app.core.tracing import TimedJSONResponse, TimedRoute
+
+logger = setup_logger(__name__)
+
+router = APIRouter(route_class=TimedRoute, default_response_class=TimedJSONResponse)
+
+# Bytes read from the request per write to the temporary file
+UPLOAD_READ_SIZE = 1024 * 1024
+
+# Request body of the upload endpoint (parsed by the endpoint itself, so it is documented here)
+UPLOAD_REQUEST_BODY = {
+    'required': True,
+    'content': {
+        'multipart/form-data': {
+            'schema': {
+                'type': 'object',
+                'required': ['file'],
+                'properties': {
+                    'file': {'type': 'string', 'format': 'binary', 'description': 'Workbook (.xlsx) or CSV file'}
+                }
+            }
+        }
+    }
+}
+
+
+class UploadTooLarge(MultiPartException):
+    """The request body grew past UPLOAD_MAX_BYTES while it was being read"""
+
+
+def require_upload_token(
+    x_admin_token: Optional[str] = Header(None, description="Admin token (UPLOAD_TOKEN)"),
+    admin_token: Optional[str] = Query(None, description="Admin token, if it cannot be sent as X-Admin-Token")
+) -> None:
+    """Reject requests without the configured upload token (the endpoints do not exist without one)"""
+    if not settings.UPLOAD_TOKEN:
+        raise HTTPException(status_code=404, detail="Dataset uploads are disabled")
+    token = x_admin_token or admin_token or ""
+    if not hmac.compare_digest(token.encode(), settings.UPLOAD_TOKEN.encode()):
+        logger.warning("⚠️ API: Rejected dataset upload request: invalid admin token")
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def limit_upload_size(content_length: Optional[int] = Header(None, include_in_schema=False)) -> None:
+    """Reject uploads whose declared size is over UPLOAD_MAX_BYTES before any of the body is read"""
+    if content_length is not None and content_length > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Upload exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+
+
+async def _limited_body(request: Request) -> AsyncIterator[bytes]:
+    """The request body, failing as soon as it passes UPLOAD_MAX_BYTES (whatever Content-Length said)"""
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.UPLOAD_MAX_BYTES:
+            raise UploadTooLarge(f"Upload exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+        yield chunk
+
+
+async def _read_upload_file(request: Request) -> UploadFile:
+    """Parse the multipart body and return its file field (spooled to a temporary file)"""
+    if not request.headers.get('content-type', '').startswith('multipart/form-data'):
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body with a file field")
+    parser = MultiPartParser(request.headers, _limited_body(request), max_files=1, max_fields=10)
+    try:
+        form = await parser.parse()
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=e.message)
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    file = form.get('file')
+    if not isinstance(file, UploadFile):
+        await form.close()
+        raise HTTPException(status_code=422, detail="Missing file field")
+    return file
+
+
+@router.post(
+    "/upload/{dataset}",
+    response_model=IngestionJob,
+    status_code=202,
+    dependencies=[Depends(require_upload_token), Depends(limit_upload_size)],
+    openapi_extra={'requestBody': UPLOAD_REQUEST_BODY}
+)
+async def upload_dataset(
+    dataset: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    rebuild_derived: bool = Query(False, description="After a details upload, rebuild rankings and no-rank data from it")
+):
+    """
+    Upload a new ranking, details or no-rank dataset file
+
+    The file is stored, then parsed and validated in the background. Poll the
+    returned job until its status is "succeeded" or "failed". Requires the
+    UPLOAD_TOKEN in X-Admin-Token (or ?admin_token=).
+
+    The multipart body is only read once the token, dataset and Content-Length
+    are accepted, and reading stops (413) as soon as it passes UPLOAD_MAX_BYTES.
+
+    Args:
+        dataset: "rankings", "details" or "no-rank"
+        request: Multipart body with the workbook (.xlsx) or CSV file as "file"
+        rebuild_derived: Re-run the ranking pipeline after a details upload
+
+    Returns:
+        IngestionJob with status "queued"
+    """
+    if dataset not in DATASET_SPECS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown dataset '{dataset}'. Expected one of: {', '.join(DATASET_SPECS)}"
+        )
+
+    file = await _read_upload_file(request)
+    filename = file.filename or "upload"
+    if Path(filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+        await file.close()
+        raise HTTPException(status_code=400, detail=f"Unsupported file type. Expected one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+
+    upload_path = new_upload_path(filename)
+    try:
+        logger.info("📥 API: Receiving %s upload '%s'...", dataset, filename)
+        size = 0
+        with open(upload_path, 'wb') as out:
+            while chunk := await file.read(UPLOAD_READ_SIZE):
+                size += len(chunk)
+                # Disk writes would block the event loop for every other request
+                await run_in_threadpool(out.write, chunk)
+    except Exception as e:
+        upload_path.unlink(missing_ok=True)
+        logger.error("❌ API: Error receiving upload - %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await file.close()
+
+    job = create_job(dataset, filename)
+    background_tasks.add_task(run_ingestion_job, job['job_id'], dataset, upload_path, rebuild_derived)
+    logger.info("✅ API: Queued ingestion job %s (%s bytes)", job['job_id'], format(size, ','))
+    return job
+
+
+@router.get("/jobs", response_model=List[IngestionJob], dependencies=[Depends(require_upload_token)])
+async def get_ingestion_jobs():
+    """
+    List recent ingestion jobs
+
+    Returns:
+        List of IngestionJob, newest first
+    """
+    return list_jobs()
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJob, dependencies=[Depends(require_upload_token)])
+async def get_ingestion_job(job_id: str):
+    """
+    Get the status of an ingestion job
+
+    Args:
+        job_id: Job id returned by the upload endpoint
+
+    Returns:
+        IngestionJob with current status
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+async def _dataset_event_stream() -> AsyncIterator[bytes]:
+    queue = dataset_watcher.subscribe()
+    logger.info("📡 API: Dataset event subscriber connected (%s subscribed)", dataset_watcher.subscribers)
+    try:
+        yield _sse("version", {'version': dataset_store.version})
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                # Comment line, so proxies keep the idle connection open
+                yield b": keep-alive\n\n"
+                continue
+            yield _sse("dataset-changed", event)
+    finally:
+        dataset_watcher.unsubscribe(queue)
+        logger.info("📡 API: Dataset event subscriber disconnected (%s subscribed)", dataset_watcher.subscribers)
+
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events"}}
+)
+async def dataset_events():
+    """
+    Subscribe to dataset changes (Server-Sent Events)
+
+    Sends a "version" event with the current dataset version, then a
+    "dataset-changed" event with the new version and the changed categories
+    whenever the data changes, so dashboards refetch only what changed instead
+    of polling.
+    """
+    return StreamingResponse(
+        _dataset_event_stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@router.websocket("/events/ws")
+async def dataset_events_ws(websocket: WebSocket):
+    """
+    Subscribe to dataset changes (WebSocket)
+
+    Same events as /data/events, as JSON text messages:
+    {"event": "version" | "dataset-changed", "data": {...}}
+    """
+    await websocket.accept()
+    queue = dataset_watcher.subscribe()
+    logger.info("📡 API: Dataset event WebSocket connected (%s subscribed)", dataset_watcher.subscribers)
+    # Notice disconnects while waiting for events (clients are not expected to send anything)
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        await websocket.send_text(dumps({'event': 'version', 'data': {'version': dataset_store.version}}).decode())
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                getter.cancel()
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.ensure_future(websocket.receive())
+            if getter in done:
+                await websocket.send_text(dumps({'event': 'dataset-changed', 'data': getter.result()}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        dataset_watcher.unsubscribe(queue)
+        logger.info("📡 API: Dataset event WebSocket closed (%s subscribed)", dataset_watcher.subscribers)
@@ -0,0 +1,131 @@
+"""Request parameters shared by the insights and additional routers"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from fastapi import HTTPException, Query, Request, Response
+
+from app.core.columnar import NotAcceptable, negotiate
+from app.core.config import settings
+from app.services.marketplace_matrix import load_marketplace_matrix, normalize_marketplace
+from app.services.price_sketches import normalize_currency
+
+
+def focus_marketplace(
+    focus: Optional[str] = Query(
+        None,
+        description="Marketplace whose point of view the insights take, e.g. 'flipkart' (case-insensitive; default: Amazon)"
+    )
+) -> str:
+    """Resolve the focus marketplace of a request, rejecting marketplaces that are not in the rankings"""
+    if focus is None:
+        return normalize_marketplace(settings.FOCUS_MARKETPLACE)
+    if not load_marketplace_matrix().has_marketplace(focus):
+        raise HTTPException(status_code=404, detail=f"Marketplace not found: {focus}")
+    return normalize_marketplace(focus)
+
+
+def price_currency(
+    currency: Optional[str] = Query(
+        None,
+        description="Currency of the price and delivery fee quantiles, e.g. 'USD' (case-insensitive; default: INR)"
+    )
+) -> str:
+    """Currency the price comparisons of a request are made in"""
+    return normalize_currency(currency)
+
+
+def columnar_format(request: Request, response: Response) -> Optional[str]:
+    """
+    Columnar media type the Accept header asks for (None to answer with JSON)
+
+    Every response of a negotiated route, JSON included, varies by Accept, so caches
+    keep the representations apart.
+    """
+    response.headers['Vary'] = 'Accept'
+    accept = request.headers.get('accept')
+    try:
+        return negotiate(accept)
+    except NotAcceptable:
+        raise HTTPException(
+            status_code=406,
+            detail=f"Cannot produce {accept}: install the columnar extra (pyarrow, msgpack), or accept application/json",
+            headers={'Vary': 'Accept'}
+        )
+
+
+class Fieldset:
+    """
+    Sections and fields a client asked an aggregate endpoint for
+
+    sections=a,b limits the response to (and the work to) those sections.
+    fields=name,... keeps only the named keys of each section's object, or of
+    every object in a section's list (or in each list of a section's object of
+    lists, like the priority categories by severity); prefix a field with its
+    section (quick_wins.category) to apply it to that section only.
+    """
+
+    def __init__(self, sections: Optional[List[str]], fields: Dict[Optional[str], Set[str]]):
+        self.sections = sections
+        self.fields = fields
+
+    @property
+    def partial(self) -> bool:
+        return self.sections is not None or bool(self.fields)
+
+    def select(self, available: Iterable[str]) -> List[str]:
+        """Requested sections in response order (all of them by default)"""
+        available = list(available)
+        unknown_prefixes = [section for section in self.fields if section is not None and section not in available]
+        if unknown_prefixes:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sections in fields: {', '.join(unknown_prefixes)}. Available: {', '.join(available)}"
+            )
+        if self.sections is None:
+            return available
+        unknown = [section for section in self.sections if section not in available]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sections: {', '.join(unknown)}. Available: {', '.join(available)}"
+            )
+        return [section for section in available if section in self.sections]
+
+    @staticmethod
+    def _records(items: List[Any], keep: Set[str]) -> List[Any]:
+        return [
+            {key: field for key, field in item.items() if key in keep} if isinstance(item, dict) else item
+            for item in items
+        ]
+
+    def project(self, section: str, value: Any) -> Any:
+        """Drop the fields of a section's value that were not asked for"""
+        keep = self.fields.get(section, set()) | self.fields.get(None, set())
+        if not keep:
+            return value
+        if isinstance(value, dict):
+            if value and all(isinstance(items, list) for items in value.values()):
+                # Records grouped by key (e.g. priority categories by severity): trim the records, keep the groups
+                return {key: self._records(items, keep) for key, items in value.items()}
+            return {key: item for key, item in value.items() if key in keep}
+        if isinstance(value, list):
+            return self._records(value, keep)
+        return value
+
+
+def requested_fieldset(
+    sections: Optional[str] = Query(None, description="Comma-separated sections to compute and return (default: all)"),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to keep in each section's records, optionally prefixed by "
+                    "the section, e.g. 'category,quick_wins.gap_percentage' (default: all)"
+    )
+) -> Fieldset:
+    selected = [section.strip() for section in sections.split(',') if section.strip()] if sections is not None else None
+    kept: Dict[Optional[str], Set[str]] = {}
+    for field in (fields or '').split(','):
+        field = field.strip()
+        if not field:
+            continue
+        section, _, name = field.rpartition('.')
+        kept.setdefault(section or None, set()).add(name)
+    return Fieldset(selected, kept)
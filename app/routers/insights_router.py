@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, List
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Dict, List, Optional
 from app.services.insights_service import (
     calculate_overview_metrics,
     generate_performance_quadrants,
@@ -8,10 +12,13 @@ from app.services.insights_service import (
     analyze_no_rank_products,
     extract_citation_sources,
     generate_category_heatmap,
+    category_heatmap_frame,
     identify_quick_wins,
     identify_battlegrounds,
     get_competitor_details,
-    get_category_battle_details
+    get_competitor_details_batch,
+    get_category_battle_details,
+    get_category_battle_batch
 )
 from app.models.insights_schemas import (
     OverviewMetrics,
@@ -24,17 +31,25 @@ from app.models.insights_schemas import (
     QuickWin,
     BattlegroundCategory,
     CompetitorDetail,
-    CategoryBattle
+    CompetitorBatch,
+    CompetitorBatchRequest,
+    CategoryBattle,
+    CategoryBattleBatch,
+    CategoryBattleBatchRequest
 )
+from app.core.columnar import COLUMNAR_RESPONSES, ColumnarResponse
 from app.core.logger import setup_logger
+from app.core.serialization import dumps
+from app.core.tracing import TimedJSONResponse, TimedRoute, untraced
+from app.routers.dependencies import Fieldset, columnar_format, focus_marketplace, requested_fieldset
 
 logger = setup_logger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute, default_response_class=TimedJSONResponse)
 
 
 @router.get("/overview", response_model=OverviewMetrics)
-async def get_overview():
+async def get_overview(focus: str = Depends(focus_marketplace)):
     """
     Get executive dashboard overview metrics
     
@@ -43,16 +58,16 @@ async def get_overview():
     """
     try:
         logger.info("📊 API: Fetching overview metrics...")
-        metrics = calculate_overview_metrics()
+        metrics = calculate_overview_metrics(focus)
         logger.info("✅ API: Successfully returned overview metrics")
         return metrics
     except Exception as e:
-        logger.error(f"❌ API: Error fetching overview - {str(e)}")
+        logger.error("❌ API: Error fetching overview - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/performance-quadrants", response_model=List[PerformanceQuadrant])
-async def get_performance_quadrants():
+async def get_performance_quadrants(focus: str = Depends(focus_marketplace)):
     """
     Get 2x2 performance quadrant matrix data
     
@@ -61,16 +76,16 @@ async def get_performance_quadrants():
     """
     try:
         logger.info("📊 API: Fetching performance quadrants...")
-        quadrants = generate_performance_quadrants()
-        logger.info(f"✅ API: Successfully returned {len(quadrants)} quadrant data points")
+        quadrants = generate_performance_quadrants(focus)
+        logger.info("✅ API: Successfully returned %s quadrant data points", len(quadrants))
         return quadrants
     except Exception as e:
-        logger.error(f"❌ API: Error fetching quadrants - {str(e)}")
+        logger.error("❌ API: Error fetching quadrants - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/competitor-analysis", response_model=List[CompetitorThreat])
-async def get_competitor_analysis():
+async def get_competitor_analysis(focus: str = Depends(focus_marketplace)):
     """
     Get competitor threat analysis
     
@@ -79,16 +94,16 @@ async def get_competitor_analysis():
     """
     try:
         logger.info("📊 API: Fetching competitor analysis...")
-        threats = analyze_competitor_threats()
-        logger.info(f"✅ API: Successfully returned {len(threats)} competitor threats")
+        threats = analyze_competitor_threats(focus)
+        logger.info("✅ API: Successfully returned %s competitor threats", len(threats))
         return threats
     except Exception as e:
-        logger.error(f"❌ API: Error fetching competitor analysis - {str(e)}")
+        logger.error("❌ API: Error fetching competitor analysis - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/priority-categories")
-async def get_priority_categories():
+async def get_priority_categories(focus: str = Depends(focus_marketplace)):
     """
     Get categories categorized by severity (Critical/Medium/Low)
     
@@ -97,21 +112,22 @@ async def get_priority_categories():
     """
     try:
         logger.info("📊 API: Fetching priority categories...")
-        categories = categorize_by_priority()
-        logger.info(f"✅ API: Successfully returned priority categories")
+        categories = categorize_by_priority(focus)
+        logger.info("✅ API: Successfully returned priority categories")
         return categories
     except Exception as e:
-        logger.error(f"❌ API: Error fetching priority categories - {str(e)}")
+        logger.error("❌ API: Error fetching priority categories - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/priority-categories/{severity}", response_model=List[PriorityCategory])
-async def get_priority_categories_by_severity(severity: str):
+async def get_priority_categories_by_severity(severity: str, focus: str = Depends(focus_marketplace)):
     """
     Get categories by specific severity level
     
     Args:
         severity: "critical", "medium", or "low"
+        focus: Marketplace whose gaps are categorized (default: Amazon)
     
     Returns:
         List of categories with that severity level
@@ -121,77 +137,93 @@ async def get_priority_categories_by_severity(severity: str):
         if severity_lower not in ['critical', 'medium', 'low']:
             raise HTTPException(status_code=400, detail="Severity must be 'critical', 'medium', or 'low'")
         
-        logger.info(f"📊 API: Fetching {severity_lower} priority categories...")
-        all_categories = categorize_by_priority()
-        categories = all_categories.get(severity_lower, [])
-        logger.info(f"✅ API: Successfully returned {len(categories)} {severity_lower} categories")
+        logger.info("📊 API: Fetching %s priority categories...", severity_lower)
+        all_categories = categorize_by_priority(focus)
+        # In PriorityCategory field order (the service lists the severity last)
+        categories = [
+            {field: category[field] for field in PriorityCategory.model_fields}
+            for category in all_categories.get(severity_lower, [])
+        ]
+        logger.info("✅ API: Successfully returned %s %s categories", len(categories), severity_lower)
         return categories
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ API: Error fetching {severity} categories - {str(e)}")
+        logger.error("❌ API: Error fetching %s categories - %s", severity, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/no-rank-analysis", response_model=NoRankAnalysis)
-async def get_no_rank_analysis():
+async def get_no_rank_analysis(focus: str = Depends(focus_marketplace)):
     """
-    Get analysis of products where Amazon has no presence
+    Get analysis of products where the focus marketplace has no presence
+    
+    Args:
+        focus: Marketplace the missing products are found for (default: Amazon; only
+            Amazon's missing products come with citations)
     
     Returns:
         NoRankAnalysis with total missing products, top opportunity categories, etc.
     """
     try:
         logger.info("📊 API: Fetching no-rank analysis...")
-        analysis = analyze_no_rank_products()
+        analysis = analyze_no_rank_products(focus)
         logger.info("✅ API: Successfully returned no-rank analysis")
         return analysis
     except Exception as e:
-        logger.error(f"❌ API: Error fetching no-rank analysis - {str(e)}")
+        logger.error("❌ API: Error fetching no-rank analysis - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/citation-sources", response_model=List[CitationSource])
-async def get_citation_sources(top_n: int = Query(50, ge=1, le=100)):
+async def get_citation_sources(top_n: int = Query(50, ge=1, le=100), focus: str = Depends(focus_marketplace)):
     """
     Get top citation sources from ChatGPT responses
     
     Args:
         top_n: Number of top sources to return (default: 50, max: 100)
+        focus: Marketplace whose missing products the citations are for (default: Amazon;
+            no other marketplace has citations, so the list is empty for them)
     
     Returns:
         List of citation sources with frequency and impact scores
     """
     try:
-        logger.info(f"📊 API: Fetching top {top_n} citation sources...")
-        sources = extract_citation_sources()
-        logger.info(f"✅ API: Successfully returned {len(sources[:top_n])} citation sources")
+        logger.info("📊 API: Fetching top %s citation sources...", top_n)
+        sources = extract_citation_sources(focus)
+        logger.info("✅ API: Successfully returned %s citation sources", len(sources[:top_n]))
         return sources[:top_n]
     except Exception as e:
-        logger.error(f"❌ API: Error fetching citation sources - {str(e)}")
+        logger.error("❌ API: Error fetching citation sources - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/category-heatmap", response_model=List[CategoryHeatmapRow])
-async def get_category_heatmap():
+@router.get("/category-heatmap", response_model=List[CategoryHeatmapRow], responses=COLUMNAR_RESPONSES)
+async def get_category_heatmap(
+    focus: str = Depends(focus_marketplace),
+    columnar: Optional[str] = Depends(columnar_format)
+):
     """
     Get category performance heatmap data
     
     Returns:
         List of all categories with Amazon rank, score, gap, and status color
+        (as columns for an Arrow / MessagePack Accept header)
     """
     try:
         logger.info("📊 API: Fetching category heatmap...")
-        heatmap = generate_category_heatmap()
-        logger.info(f"✅ API: Successfully returned heatmap for {len(heatmap)} categories")
+        if columnar:
+            return ColumnarResponse(category_heatmap_frame(focus), columnar)
+        heatmap = generate_category_heatmap(focus)
+        logger.info("✅ API: Successfully returned heatmap for %s categories", len(heatmap))
         return heatmap
     except Exception as e:
-        logger.error(f"❌ API: Error fetching category heatmap - {str(e)}")
+        logger.error("❌ API: Error fetching category heatmap - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/quick-wins", response_model=List[QuickWin])
-async def get_quick_wins():
+async def get_quick_wins(focus: str = Depends(focus_marketplace)):
     """
     Get quick win opportunities (low-hanging fruit with <15% gap)
     
@@ -200,16 +232,16 @@ async def get_quick_wins():
     """
     try:
         logger.info("📊 API: Fetching quick wins...")
-        wins = identify_quick_wins()
-        logger.info(f"✅ API: Successfully returned {len(wins)} quick wins")
+        wins = identify_quick_wins(focus)
+        logger.info("✅ API: Successfully returned %s quick wins", len(wins))
         return wins
     except Exception as e:
-        logger.error(f"❌ API: Error fetching quick wins - {str(e)}")
+        logger.error("❌ API: Error fetching quick wins - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/battlegrounds", response_model=List[BattlegroundCategory])
-async def get_battlegrounds():
+async def get_battlegrounds(focus: str = Depends(focus_marketplace)):
     """
     Get strategic battleground categories (medium gaps with high potential)
     
@@ -218,81 +250,213 @@ async def get_battlegrounds():
     """
     try:
         logger.info("📊 API: Fetching battleground categories...")
-        battlegrounds = identify_battlegrounds()
-        logger.info(f"✅ API: Successfully returned {len(battlegrounds)} battlegrounds")
+        battlegrounds = identify_battlegrounds(focus)
+        logger.info("✅ API: Successfully returned %s battlegrounds", len(battlegrounds))
         return battlegrounds
     except Exception as e:
-        logger.error(f"❌ API: Error fetching battlegrounds - {str(e)}")
+        logger.error("❌ API: Error fetching battlegrounds - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/competitor/{competitor_name}", response_model=CompetitorDetail)
-async def get_competitor_detail(competitor_name: str):
+async def get_competitor_detail(competitor_name: str, focus: str = Depends(focus_marketplace)):
     """
     Get detailed analysis for a specific competitor
     
     Args:
         competitor_name: Name of the competitor
+        focus: Marketplace the competitor is compared with (default: Amazon)
     
     Returns:
         CompetitorDetail with all categories, gaps, and strength areas
     """
     try:
-        logger.info(f"📊 API: Fetching details for competitor '{competitor_name}'...")
-        details = get_competitor_details(competitor_name)
-        logger.info(f"✅ API: Successfully returned details for '{competitor_name}'")
+        logger.info("📊 API: Fetching details for competitor '%s'...", competitor_name)
+        details = get_competitor_details(competitor_name, focus)
+        logger.info("✅ API: Successfully returned details for '%s'", competitor_name)
         return details
     except Exception as e:
-        logger.error(f"❌ API: Error fetching competitor details - {str(e)}")
+        logger.error("❌ API: Error fetching competitor details - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/category-battle/{category_name}", response_model=CategoryBattle)
-async def get_category_battle(category_name: str):
+async def get_category_battle(category_name: str, focus: str = Depends(focus_marketplace)):
     """
     Get detailed battle analysis for a specific category
     
     Args:
         category_name: Name of the category
+        focus: Marketplace the competitors are compared with (default: Amazon)
     
     Returns:
         CategoryBattle with top 5 competitors, product counts, and missing products
     """
     try:
-        logger.info(f"📊 API: Fetching battle details for category '{category_name}'...")
-        battle = get_category_battle_details(category_name)
-        logger.info(f"✅ API: Successfully returned battle details for '{category_name}'")
+        logger.info("📊 API: Fetching battle details for category '%s'...", category_name)
+        battle = get_category_battle_details(category_name, focus)
+        logger.info("✅ API: Successfully returned battle details for '%s'", category_name)
         return battle
     except Exception as e:
-        logger.error(f"❌ API: Error fetching category battle - {str(e)}")
+        logger.error("❌ API: Error fetching category battle - %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/competitor/batch", response_model=CompetitorBatch)
+async def get_competitor_batch(request: CompetitorBatchRequest, focus: str = Depends(focus_marketplace)):
+    """
+    Get detailed analysis for several competitors in one call
+    
+    Args:
+        request: Competitor names (at most BATCH_MAX_ITEMS)
+        focus: Marketplace the competitors are compared with (default: Amazon)
+    
+    Returns:
+        CompetitorBatch keyed by competitor name (unknown competitors get the same
+        empty details as GET /competitor/{name}); failed items are listed under
+        errors instead of failing the whole batch
+    """
+    try:
+        logger.info("📊 API: Fetching details for %s competitors...", len(request.competitors))
+        batch = get_competitor_details_batch(request.competitors, focus)
+        logger.info("✅ API: Successfully returned %s competitor details", len(batch['results']))
+        return batch
+    except Exception as e:
+        logger.error("❌ API: Error fetching competitor batch - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/category-battle/batch", response_model=CategoryBattleBatch)
+async def get_category_battle_batch_details(request: CategoryBattleBatchRequest, focus: str = Depends(focus_marketplace)):
+    """
+    Get detailed battle analysis for several categories in one call
+    
+    Args:
+        request: Category names (at most BATCH_MAX_ITEMS)
+        focus: Marketplace the competitors are compared with (default: Amazon)
+    
+    Returns:
+        CategoryBattleBatch keyed by category name (unknown categories get the same
+        empty battle as GET /category-battle/{name}); failed items are listed under
+        errors instead of failing the whole batch
+    """
+    try:
+        logger.info("📊 API: Fetching battle details for %s categories...", len(request.categories))
+        batch = get_category_battle_batch(request.categories, focus)
+        logger.info("✅ API: Successfully returned %s category battles", len(batch['results']))
+        return batch
+    except Exception as e:
+        logger.error("❌ API: Error fetching category battle batch - %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Sections of /all-insights, in response order
+ALL_INSIGHTS_SECTIONS = {
+    'overview': calculate_overview_metrics,
+    'performance_quadrants': generate_performance_quadrants,
+    'competitor_analysis': analyze_competitor_threats,
+    'priority_categories': categorize_by_priority,
+    'no_rank_analysis': analyze_no_rank_products,
+    'citation_sources': lambda focus: extract_citation_sources(focus)[:50],
+    'category_heatmap': generate_category_heatmap,
+    'quick_wins': identify_quick_wins,
+    'battlegrounds': identify_battlegrounds
+}
+
+
 @router.get("/all-insights")
-async def get_all_insights():
+async def get_all_insights(
+    focus: str = Depends(focus_marketplace),
+    fieldset: Fieldset = Depends(requested_fieldset)
+):
     """
     Get all insights data in one call (for preloading)
     
+    Only the sections listed in sections= are computed; fields= trims the
+    records of the returned sections.
+    
     Returns:
-        Dictionary with all insights data
+        Dictionary with all (or the requested) insights data
     """
     try:
         logger.info("📊 API: Fetching all insights data...")
         
         data = {
-            'overview': calculate_overview_metrics(),
-            'performance_quadrants': generate_performance_quadrants(),
-            'competitor_analysis': analyze_competitor_threats(),
-            'priority_categories': categorize_by_priority(),
-            'no_rank_analysis': analyze_no_rank_products(),
-            'citation_sources': extract_citation_sources()[:50],
-            'category_heatmap': generate_category_heatmap(),
-            'quick_wins': identify_quick_wins(),
-            'battlegrounds': identify_battlegrounds()
+            section: fieldset.project(section, ALL_INSIGHTS_SECTIONS[section](focus))
+            for section in fieldset.select(ALL_INSIGHTS_SECTIONS)
         }
         
         logger.info("✅ API: Successfully returned all insights data")
         return data
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ API: Error fetching all insights - {str(e)}")
+        logger.error("❌ API: Error fetching all insights - %s", e)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def _stream_record(record: Dict, sse: bool, event: str = "section") -> bytes:
+    if sse:
+        return b"event: " + event.encode() + b"\ndata: " + dumps(record) + b"\n\n"
+    return dumps(record) + b"\n"
+
+
+async def _stream_sections(sections: List[str], focus: str, fieldset: Fieldset, sse: bool) -> AsyncIterator[bytes]:
+    """Compute the sections concurrently and yield each one as soon as it is done"""
+    tasks = {
+        asyncio.ensure_future(run_in_threadpool(untraced, ALL_INSIGHTS_SECTIONS[section], focus)): section
+        for section in sections
+    }
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=lambda task: sections.index(tasks[task])):
+                section = tasks[task]
+                try:
+                    record = {'section': section, 'data': fieldset.project(section, task.result())}
+                except Exception as e:
+                    logger.error("❌ API: Error streaming insights section %s - %s", section, e)
+                    record = {'section': section, 'error': str(e)}
+                yield _stream_record(record, sse, event="section" if 'data' in record else "section-error")
+        if sse:
+            yield _stream_record({'sections': len(sections)}, sse, event="end")
+        logger.info("✅ API: Streamed %s insights sections", len(sections))
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+@router.get(
+    "/all-insights/stream",
+    response_class=StreamingResponse,
+    responses={200: {
+        "content": {NDJSON_MEDIA_TYPE: {}, SSE_MEDIA_TYPE: {}},
+        "description": "One {section, data} (or {section, error}) record per section, in completion order"
+    }}
+)
+async def stream_all_insights(
+    request: Request,
+    focus: str = Depends(focus_marketplace),
+    fieldset: Fieldset = Depends(requested_fieldset)
+):
+    """
+    Stream the all-insights sections as they are computed
+    
+    The sections are computed concurrently and each one is sent as soon as it is
+    ready, so a dashboard can render the fast panels before the slow ones finish.
+    Records are NDJSON lines, or Server-Sent Events (events "section", "section-error" and
+    a final "end") when the Accept header asks for text/event-stream.
+    """
+    logger.info("📊 API: Streaming all insights data...")
+    sections = fieldset.select(ALL_INSIGHTS_SECTIONS)
+    sse = SSE_MEDIA_TYPE in request.headers.get('accept', '')
+    return StreamingResponse(
+        _stream_sections(sections, focus, fieldset, sse),
+        media_type=SSE_MEDIA_TYPE if sse else NDJSON_MEDIA_TYPE,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,304 @@
+"""
+Production server launcher
+
+Runs the API on several worker processes that are forked from one preloaded
+parent:
+
+- The parent imports the app and loads the datasets (app.services.preload)
+  with the garbage collector disabled, then freezes the collector's view of
+  those objects just before forking. Workers start warm, re-enable the
+  collector for their own objects only, and share the loaded pages
+  copy-on-write instead of each paying the warm-up.
+- Workers accept connections from one listening socket bound by the parent.
+- The worker count defaults to the CPUs available to the process (affinity and
+  cgroup CPU quota included); uvloop and httptools are used when installed.
+- Metrics are aggregated over all workers: each writes snapshots that /metrics
+  merges, whichever worker answers the scrape (see app.core.metrics).
+- The parent respawns workers that die. SIGHUP triggers a rolling restart: the
+  parent reloads changed datasets, then replaces workers one at a time, each new
+  worker serving before the old one is asked to finish its in-flight requests.
+  SIGTERM/SIGINT shut every worker down gracefully.
+
+Requires fork (Linux/macOS). For development use `python main.py`, which runs a
+single auto-reloading server.
+
+Usage:
+    python -m app.server [--host 0.0.0.0] [--port 8000] [--workers N]
+"""
+import argparse
+import gc
+import importlib.util
+import math
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.logger import setup_logger, stop_logging
+from app.core.metrics import enable_multiprocess, flush_metrics
+
+logger = setup_logger(__name__)
+
+# Seconds a new worker may take to start serving during a rolling restart
+WORKER_READY_TIMEOUT = 60
+
+# Workers that die sooner than this after starting are respawned with a delay
+MIN_WORKER_LIFETIME = 1.0
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on, honoring CPU affinity and a cgroup v2 CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def event_loop_implementation() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_implementation() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+class WorkerServer(uvicorn.Server):
+    """Uvicorn server that tells the parent once it is accepting connections"""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class Supervisor:
+    """Forks, watches and restarts the worker processes"""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.worker_count = workers
+        self.sock: Optional[socket.socket] = None
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.signals: List[int] = []
+        self._wakeup_r, self._wakeup_w = os.pipe()
+
+    # Parent side
+
+    def run(self) -> None:
+        self.sock = self.config.bind_socket()
+        self.sock.set_inheritable(True)
+
+        for fd in (self._wakeup_r, self._wakeup_w):
+            os.set_blocking(fd, False)
+        signal.set_wakeup_fd(self._wakeup_w)
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+        # Objects loaded so far live as long as the parent; moving them to the permanent
+        # generation keeps the workers' collectors from touching (and so copying) their pages
+        gc.freeze()
+
+        enable_multiprocess(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+
+        logger.info(
+            "🚀 Starting %s workers (loop: %s, http: %s)",
+            self.worker_count, self.config.loop, self.config.http
+        )
+        for _ in range(self.worker_count):
+            self.spawn()
+
+        try:
+            self.supervise()
+        finally:
+            self.stop()
+            self.sock.close()
+
+    def _on_signal(self, signum, frame) -> None:
+        self.signals.append(signum)
+
+    def supervise(self) -> None:
+        while True:
+            select.select([self._wakeup_r], [], [], 1.0)
+            try:
+                while os.read(self._wakeup_r, 1024):
+                    pass
+            except BlockingIOError:
+                pass
+
+            while self.signals:
+                signum = self.signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    logger.info("🛑 Received %s, stopping workers", signal.Signals(signum).name)
+                    return
+                if signum == signal.SIGHUP:
+                    self.rolling_restart()
+
+            self.reap()
+
+    def reap(self) -> None:
+        """Collect exited workers and replace them"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            logger.warning("⚠️ Worker %s exited with status %s, replacing it", pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+    def spawn(self) -> int:
+        """Fork a worker; returns its pid once it serves (or the ready timeout passes)"""
+        ready_r, ready_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._run_worker(ready_w)
+
+        os.close(ready_w)
+        self.workers[pid] = time.monotonic()
+        ready, _, _ = select.select([ready_r], [], [], WORKER_READY_TIMEOUT)
+        if not ready or not os.read(ready_r, 1):
+            logger.warning("⚠️ Worker %s did not report ready", pid)
+        os.close(ready_r)
+        return pid
+
+    def rolling_restart(self) -> None:
+        """Replace every worker, one at a time, without dropping capacity"""
+        logger.info("🔄 Rolling restart of %s workers", len(self.workers))
+        if settings.PRELOAD_DATASETS:
+            from app.services.preload import preload
+            # The collector stays off in the parent; freezing after the reload adds the new
+            # datasets to the permanent generation that every worker spawned below inherits.
+            # Objects frozen earlier stay frozen (the old datasets are freed by reference
+            # counting once the store drops them)
+            preload()
+            gc.freeze()
+            # The reload's dataset metrics are the parent's to report
+            flush_metrics()
+
+        for old_pid in list(self.workers):
+            self.spawn()
+            self.workers.pop(old_pid, None)
+            self._terminate(old_pid)
+        logger.info("✅ Rolling restart complete")
+
+    def _terminate(self, pid: int) -> None:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def stop(self) -> None:
+        """Ask every worker to finish its in-flight requests and wait for them"""
+        for pid in self.workers:
+            self._terminate(pid)
+
+        deadline = time.monotonic() + settings.GRACEFUL_TIMEOUT + 5
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+            else:
+                self.workers.pop(pid, None)
+
+        for pid in self.workers:
+            logger.warning("⚠️ Worker %s did not stop in time, killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+        self.workers.clear()
+
+    # Worker side
+
+    def _run_worker(self, ready_fd: int) -> None:
+        """Body of a forked worker; never returns"""
+        signal.set_wakeup_fd(-1)
+        os.close(self._wakeup_r)
+        os.close(self._wakeup_w)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        # Restarts and hangups are the parent's business
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        # Uvicorn handles SIGTERM/SIGINT while serving and re-raises them on exit;
+        # a no-op here lets the worker finish its cleanup below
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda signum, frame: None)
+        # Collect the worker's own objects; the parent's stay in the frozen generation
+        gc.enable()
+        flush_metrics()
+
+        exit_code = 0
+        try:
+            WorkerServer(self.config, ready_fd).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("❌ Worker %s crashed", os.getpid())
+            exit_code = 1
+        finally:
+            from app.services import shared_frames
+            shared_frames.release_all()
+            flush_metrics()
+            stop_logging()
+            os._exit(exit_code)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the API on preloaded, pre-forked workers")
+    parser.add_argument("--host", default=settings.HOST, help="Bind address")
+    parser.add_argument("--port", type=int, default=settings.PORT, help="Bind port")
+    parser.add_argument("--workers", type=int, default=settings.WORKERS, help="Worker processes (0: one per available CPU)")
+    args = parser.parse_args()
+
+    workers = args.workers or available_cpus()
+
+    # Importing the app and loading the data here means every worker inherits them.
+    # The collector stays off until the workers fork, so it never walks (and, after
+    # fork, copies) the pages of the loaded objects
+    gc.disable()
+    from main import app
+    if settings.PRELOAD_DATASETS:
+        from app.services.preload import preload
+        preload()
+
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop=event_loop_implementation(),
+        http=http_implementation(),
+        workers=workers,
+        log_level=settings.LOG_LEVEL.lower(),
+        timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT
+    )
+    Supervisor(config, workers).run()
+    stop_logging()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
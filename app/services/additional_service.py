@@ -1,29 +1,40 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 from collections import defaultdict, Counter
 import re
 from urllib.parse import urlparse
 
 from app.core.config import settings
 from app.core.logger import setup_logger
+from app.services import analytics_engine
 from app.services.analytics import load_ranking_data, load_product_details_data
+from app.services.dataset_store import dataset_store
+from app.services.insights_service import NO_RANK_MARKETPLACE, load_missing_products
+from app.services.marketplace_matrix import load_marketplace_matrix, normalize_marketplace
+from app.services.price_sketches import PRICE_METRICS, PriceSketches, load_price_sketches, normalize_currency
+from app.services.quantile_sketch import QuantileSketch
 
 logger = setup_logger(__name__)
 
 
 def load_no_rank_data() -> pd.DataFrame:
-    """Load products without Amazon with citations"""
+    """Load products without Amazon with citations (cached until the file changes; treat as read-only)"""
+    return dataset_store.get_frame('no_rank', [settings.EXCEL_FILE_3], _read_no_rank_data)
+
+
+def _read_no_rank_data() -> pd.DataFrame:
+    """Read Excel file 3"""
     try:
         file_path = settings.EXCEL_FILE_3
         if not file_path.exists():
             raise FileNotFoundError(f"Excel file not found: {file_path}")
         
         df = pd.read_excel(file_path)
-        logger.info(f"✅ Loaded {len(df)} no-rank products with citations")
+        logger.info("✅ Loaded %s no-rank products with citations", len(df))
         return df
     except Exception as e:
-        logger.error(f"Error loading no-rank data: {str(e)}")
+        logger.error("Error loading no-rank data: %s", e)
         raise
 
 
@@ -49,22 +60,23 @@ def calculate_sentiment_score(text: str, positive_keywords: List[str], negative_
     return (positive_count / total) * 100
 
 
-def calculate_citation_visibility() -> Dict:
-    """Calculate citation frequency index"""
+def calculate_citation_visibility(focus: str = 'amazon') -> Dict:
+    """Calculate citation frequency index of the focus marketplace's domains against all others"""
     try:
         logger.info("🔄 Calculating citation visibility...")
         
         df_no_rank = load_no_rank_data()
+        focus = normalize_marketplace(focus)
         
         # Extract all domains
         all_domains = extract_domains_from_citations(df_no_rank['Citations'])
         domain_counts = Counter(all_domains)
         
-        # Count Amazon mentions
-        amazon_mentions = sum(count for domain, count in domain_counts.items() if 'amazon' in domain.lower())
+        # Count focus marketplace mentions
+        amazon_mentions = sum(count for domain, count in domain_counts.items() if focus in domain.lower())
         
-        # Count competitor mentions (all non-Amazon)
-        competitor_mentions = sum(count for domain, count in domain_counts.items() if 'amazon' not in domain.lower())
+        # Count competitor mentions (all other domains)
+        competitor_mentions = sum(count for domain, count in domain_counts.items() if focus not in domain.lower())
         
         total_citations = amazon_mentions + competitor_mentions
         
@@ -78,26 +90,26 @@ def calculate_citation_visibility() -> Dict:
         source_breakdown = {}
         for domain, count in domain_counts.most_common(15):
             source_breakdown[domain] = {
-                'amazon': count if 'amazon' in domain.lower() else 0,
-                'competitors': count if 'amazon' not in domain.lower() else 0
+                'amazon': count if focus in domain.lower() else 0,
+                'competitors': count if focus not in domain.lower() else 0
             }
         
         result = {
             'amazon_mentions': amazon_mentions,
             'competitor_mentions': competitor_mentions,
             'total_citations': total_citations,
-            'amazon_percentage': (amazon_mentions / total_citations * 100) if total_citations > 0 else 0,
-            'competitor_percentage': (competitor_mentions / total_citations * 100) if total_citations > 0 else 0,
-            'visibility_ratio': (competitor_mentions / amazon_mentions) if amazon_mentions > 0 else 0,
+            'amazon_percentage': (amazon_mentions / total_citations * 100) if total_citations > 0 else 0.0,
+            'competitor_percentage': (competitor_mentions / total_citations * 100) if total_citations > 0 else 0.0,
+            'visibility_ratio': (competitor_mentions / amazon_mentions) if amazon_mentions > 0 else 0.0,
             'top_sources': top_sources,
             'source_breakdown': source_breakdown
         }
         
-        logger.info(f"✅ Citation visibility: Amazon {amazon_mentions}, Competitors {competitor_mentions}")
+        logger.info("✅ Citation visibility: Amazon %s, Competitors %s", amazon_mentions, competitor_mentions)
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error calculating citation visibility: {str(e)}")
+        logger.error("❌ Error calculating citation visibility: %s", e)
         raise
 
 
@@ -152,21 +164,22 @@ def calculate_source_authority_mapping() -> Dict:
             'total_flows': len(links)
         }
         
-        logger.info(f"✅ Source authority mapping: {len(nodes)} nodes, {len(links)} flows")
+        logger.info("✅ Source authority mapping: %s nodes, %s flows", len(nodes), len(links))
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error calculating source authority: {str(e)}")
+        logger.error("❌ Error calculating source authority: %s", e)
         raise
 
 
-def calculate_official_store_scores() -> List[Dict]:
+def calculate_official_store_scores(focus: str = 'amazon') -> List[Dict]:
     """Calculate official store recognition"""
     try:
         logger.info("🔄 Calculating official store scores...")
         
         df_details = load_product_details_data()
         df_rankings = load_ranking_data()
+        focus = normalize_marketplace(focus)
         
         scores = []
         
@@ -181,7 +194,7 @@ def calculate_official_store_scores() -> List[Dict]:
             
             for _, row in cat_details.iterrows():
                 extra_text = str(row.get('extra', '')).lower()
-                is_amazon = 'amazon' in str(row['source_normalized']).lower()
+                is_amazon = focus in str(row['source_normalized']).lower()
                 
                 official_count = extra_text.count('official') + extra_text.count('authorized')
                 
@@ -193,7 +206,7 @@ def calculate_official_store_scores() -> List[Dict]:
                         max_competitor_mentions = official_count
                         top_competitor = row['source_normalized']
             
-            gap_score = ((competitor_official - amazon_official) / max(competitor_official, 1)) * 100 if competitor_official > 0 else 0
+            gap_score = ((competitor_official - amazon_official) / max(competitor_official, 1)) * 100 if competitor_official > 0 else 0.0
             
             recommendation = "Establish official partnership" if gap_score > 30 else "Maintain current status"
             
@@ -206,11 +219,11 @@ def calculate_official_store_scores() -> List[Dict]:
                 'recommendation': recommendation
             })
         
-        logger.info(f"✅ Calculated official store scores for {len(scores)} categories")
+        logger.info("✅ Calculated official store scores for %s categories", len(scores))
         return scores
         
     except Exception as e:
-        logger.error(f"❌ Error calculating official store scores: {str(e)}")
+        logger.error("❌ Error calculating official store scores: %s", e)
         raise
 
 
@@ -262,128 +275,156 @@ def calculate_trust_signals() -> List[Dict]:
         # Sort by trust score
         trust_signals.sort(key=lambda x: -x['trust_score'])
         
-        logger.info(f"✅ Calculated trust signals for {len(trust_signals)} marketplaces")
+        logger.info("✅ Calculated trust signals for %s marketplaces", len(trust_signals))
         return trust_signals
         
     except Exception as e:
-        logger.error(f"❌ Error calculating trust signals: {str(e)}")
+        logger.error("❌ Error calculating trust signals: %s", e)
         raise
 
 
-def calculate_product_availability_matrix() -> List[Dict]:
+def calculate_product_availability_matrix(focus: str = 'amazon') -> List[Dict]:
     """Calculate product availability by category"""
+    return product_availability_frame(focus).to_dict('records')
+
+
+def product_availability_frame(focus: str = 'amazon') -> pd.DataFrame:
+    """Product availability matrix as a frame, one row per category"""
     try:
         logger.info("🔄 Calculating product availability matrix...")
         
         df_details = load_product_details_data()
-        df_no_rank = load_no_rank_data()
         df_rankings = load_ranking_data()
-        
-        availability = []
+        focus = normalize_marketplace(focus)
+        df_missing = load_missing_products(focus)
+        # The no-rank data lists products absent from the product details; any other
+        # marketplace's missing products are already counted among the listed ones
+        missing_listed = focus != NO_RANK_MARKETPLACE
+        
+        availability = {
+            'category': [],
+            'total_products': [],
+            'amazon_available': [],
+            'amazon_percentage': [],
+            'competitor_availability': [],
+            'missing_products': [],
+            'revenue_opportunity': []
+        }
         
         for category in df_rankings['Product'].unique()[:20]:
             cat_details = df_details[df_details['Product'] == category]
-            cat_no_rank = df_no_rank[df_no_rank['Product Category'] == category]
+            cat_missing = df_missing[df_missing['Product Category'] == category]
             
-            total_products = cat_details['product_name'].nunique() + len(cat_no_rank)
-            amazon_available = cat_details[cat_details['source_normalized'].str.lower() == 'amazon']['product_name'].nunique()
+            total_products = cat_details['product_name'].nunique() + (0 if missing_listed else len(cat_missing))
+            amazon_available = cat_details[cat_details['source_normalized'].str.strip().str.lower() == focus]['product_name'].nunique()
             
             # Competitor availability
             competitor_avail = {}
             for mp in cat_details['source_normalized'].unique():
-                if 'amazon' not in mp.lower():
+                if focus not in mp.lower():
                     count = cat_details[cat_details['source_normalized'] == mp]['product_name'].nunique()
                     competitor_avail[mp] = count
             
-            missing_products = cat_no_rank['Product Name'].tolist()[:10]  # Top 10
+            missing_products = cat_missing['Product Name'].tolist()[:10]  # Top 10
             
             # Estimate revenue (placeholder calculation)
-            revenue_opportunity = len(cat_no_rank) * 5000  # ₹5000 per product/month avg
+            revenue_opportunity = float(len(cat_missing) * 5000)  # ₹5000 per product/month avg
             
-            availability.append({
-                'category': category,
-                'total_products': total_products,
-                'amazon_available': amazon_available,
-                'amazon_percentage': round((amazon_available / total_products * 100) if total_products > 0 else 0, 1),
-                'competitor_availability': dict(list(competitor_avail.items())[:5]),
-                'missing_products': missing_products,
-                'revenue_opportunity': revenue_opportunity
-            })
+            availability['category'].append(category)
+            availability['total_products'].append(total_products)
+            availability['amazon_available'].append(amazon_available)
+            availability['amazon_percentage'].append(
+                round((amazon_available / total_products * 100) if total_products > 0 else 0.0, 1)
+            )
+            availability['competitor_availability'].append(dict(list(competitor_avail.items())[:5]))
+            availability['missing_products'].append(missing_products)
+            availability['revenue_opportunity'].append(revenue_opportunity)
         
-        logger.info(f"✅ Calculated availability for {len(availability)} categories")
-        return availability
+        logger.info("✅ Calculated availability for %s categories", len(availability['category']))
+        return pd.DataFrame(availability)
         
     except Exception as e:
-        logger.error(f"❌ Error calculating product availability: {str(e)}")
+        logger.error("❌ Error calculating product availability: %s", e)
         raise
 
 
-def calculate_niche_opportunities() -> List[Dict]:
+def calculate_niche_opportunities(focus: str = 'amazon') -> List[Dict]:
     """Calculate niche category opportunities"""
     try:
         logger.info("🔄 Calculating niche opportunities...")
         
         df_rankings = load_ranking_data()
-        df_no_rank = load_no_rank_data()
+        df_missing = load_missing_products(focus)
         
-        opportunities = []
+        if settings.ANALYTICS_ENGINE == 'vectorized':
+            opportunities = analytics_engine.niche_opportunities(df_rankings, df_missing, load_marketplace_matrix(), focus)
+        else:
+            opportunities = _niche_opportunities_legacy(df_rankings, df_missing, focus)
         
-        for category in df_rankings['Product'].unique():
-            cat_data = df_rankings[df_rankings['Product'] == category]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-            
-            if amazon_data.empty:
-                continue
-            
-            amazon_rank = int(amazon_data.iloc[0]['rank'])
-            amazon_score = float(amazon_data.iloc[0]['score_norm'])
-            
-            # Citation frequency (from no-rank data)
-            cat_no_rank = df_no_rank[df_no_rank['Product Category'] == category]
-            citation_freq = min(100, len(cat_no_rank) * 5)  # Normalized to 100
-            
-            # Competitor strength (average of top 3)
-            top_3_competitors = cat_data[cat_data['rank'] <= 3]
-            competitor_strength = float(top_3_competitors['score_norm'].mean() * 100)
-            
-            # Product gap
-            product_gap = len(cat_no_rank)
-            
-            # Revenue potential (heuristic)
-            revenue_potential = min(100, (len(cat_no_rank) * 10 + (5 - amazon_rank) * 10))
-            
-            # Overall opportunity score
-            opportunity_score = (
-                (100 - citation_freq) * 0.2 +  # Lower citation = higher opportunity
-                (100 - amazon_rank * 20) * 0.3 +  # Better rank = lower opportunity
-                (100 - competitor_strength) * 0.3 +  # Weaker competitors = higher opportunity
-                revenue_potential * 0.2
-            )
-            
-            quick_win = (amazon_rank in [2, 3]) and (product_gap < 10)
-            
-            opportunities.append({
-                'category': category,
-                'citation_frequency': round(citation_freq, 1),
-                'amazon_current_rank': amazon_rank,
-                'competitor_strength': round(competitor_strength, 1),
-                'product_count_gap': product_gap,
-                'revenue_potential': round(revenue_potential, 1),
-                'opportunity_score': round(opportunity_score, 1),
-                'quick_win': quick_win
-            })
-        
-        # Sort by opportunity score
-        opportunities.sort(key=lambda x: -x['opportunity_score'])
-        
-        logger.info(f"✅ Identified {len(opportunities)} niche opportunities")
+        logger.info("✅ Identified %s niche opportunities", len(opportunities))
         return opportunities
         
     except Exception as e:
-        logger.error(f"❌ Error calculating niche opportunities: {str(e)}")
+        logger.error("❌ Error calculating niche opportunities: %s", e)
         raise
 
 
+def _niche_opportunities_legacy(df_rankings: pd.DataFrame, df_no_rank: pd.DataFrame, focus: str = 'amazon') -> List[Dict]:
+    """Loop-based implementation of calculate_niche_opportunities (reference for the vectorized engine)"""
+    focus = normalize_marketplace(focus)
+    opportunities = []
+    
+    for category in df_rankings['Product'].unique():
+        cat_data = df_rankings[df_rankings['Product'] == category]
+        amazon_data = cat_data[cat_data['source_normalized'].str.strip().str.lower() == focus].sort_values('rank', kind='stable')
+        
+        if amazon_data.empty:
+            continue
+        
+        amazon_rank = int(amazon_data.iloc[0]['rank'])
+        amazon_score = float(amazon_data.iloc[0]['score_norm'])
+        
+        # Citation frequency (from no-rank data)
+        cat_no_rank = df_no_rank[df_no_rank['Product Category'] == category]
+        citation_freq = float(min(100, len(cat_no_rank) * 5))  # Normalized to 100
+        
+        # Competitor strength (average of top 3)
+        top_3_competitors = cat_data[cat_data['rank'] <= 3]
+        competitor_strength = float(top_3_competitors['score_norm'].mean() * 100)
+        
+        # Product gap
+        product_gap = len(cat_no_rank)
+        
+        # Revenue potential (heuristic)
+        revenue_potential = float(min(100, (len(cat_no_rank) * 10 + (5 - amazon_rank) * 10)))
+        
+        # Overall opportunity score
+        opportunity_score = (
+            (100 - citation_freq) * 0.2 +  # Lower citation = higher opportunity
+            (100 - amazon_rank * 20) * 0.3 +  # Better rank = lower opportunity
+            (100 - competitor_strength) * 0.3 +  # Weaker competitors = higher opportunity
+            revenue_potential * 0.2
+        )
+        
+        quick_win = (amazon_rank in [2, 3]) and (product_gap < 10)
+        
+        opportunities.append({
+            'category': category,
+            'citation_frequency': round(citation_freq, 1),
+            'amazon_current_rank': amazon_rank,
+            'competitor_strength': round(competitor_strength, 1),
+            'product_count_gap': product_gap,
+            'revenue_potential': round(revenue_potential, 1),
+            'opportunity_score': round(opportunity_score, 1),
+            'quick_win': quick_win
+        })
+    
+    # Sort by opportunity score
+    opportunities.sort(key=lambda x: -x['opportunity_score'])
+    
+    return opportunities
+
+
 def calculate_category_associations() -> List[Dict]:
     """Calculate category association strength"""
     try:
@@ -435,47 +476,41 @@ def calculate_category_associations() -> List[Dict]:
                     'perception_level': perception
                 })
         
-        logger.info(f"✅ Calculated {len(associations)} category associations")
+        logger.info("✅ Calculated %s category associations", len(associations))
         return associations
         
     except Exception as e:
-        logger.error(f"❌ Error calculating category associations: {str(e)}")
+        logger.error("❌ Error calculating category associations: %s", e)
         raise
 
 
-def calculate_competitor_specialties() -> List[Dict]:
+def calculate_competitor_specialties(focus: str = 'amazon') -> List[Dict]:
     """Calculate competitor specialty patterns"""
     try:
         logger.info("🔄 Calculating competitor specialties...")
         
-        df_rankings = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
         
         specialties = []
         
         # Get categories where each competitor is #1
-        for competitor in df_rankings['source_normalized'].unique()[:15]:
-            if 'amazon' in competitor.lower():
+        for competitor in matrix.names[:15]:
+            if view.marketplace in competitor.lower():
                 continue
             
-            comp_data = df_rankings[df_rankings['source_normalized'] == competitor]
-            dominated = comp_data[comp_data['rank'] == 1]['Product'].tolist()
+            postings = matrix.postings(competitor)
+            won = postings.rank == 1
+            wins = postings.category[won]
+            dominated = matrix.categories[wins].tolist()
             
             if not dominated:
                 continue
             
-            # Calculate average gap to Amazon
-            gaps = []
-            for category in dominated:
-                cat_data = df_rankings[df_rankings['Product'] == category]
-                amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-                comp_score = comp_data[comp_data['Product'] == category]['score_norm'].iloc[0]
-                
-                if not amazon_data.empty:
-                    amazon_score = amazon_data.iloc[0]['score_norm']
-                    gap = (comp_score - amazon_score) * 100
-                    gaps.append(gap)
+            # Calculate average gap to the focus marketplace, where it is ranked
+            gaps = ((postings.score[won] - view.score[wins]) * 100)[view.present[wins]]
             
-            avg_gap = np.mean(gaps) if gaps else 0
+            avg_gap = np.mean(gaps) if len(gaps) else 0
             
             # Determine specialty pattern (heuristic)
             category_keywords = ' '.join(dominated).lower()
@@ -502,20 +537,21 @@ def calculate_competitor_specialties() -> List[Dict]:
         # Sort by total wins
         specialties.sort(key=lambda x: -x['total_wins'])
         
-        logger.info(f"✅ Identified {len(specialties)} competitor specialties")
+        logger.info("✅ Identified %s competitor specialties", len(specialties))
         return specialties
         
     except Exception as e:
-        logger.error(f"❌ Error calculating competitor specialties: {str(e)}")
+        logger.error("❌ Error calculating competitor specialties: %s", e)
         raise
 
 
-def calculate_intent_alignments() -> List[Dict]:
+def calculate_intent_alignments(focus: str = 'amazon') -> List[Dict]:
     """Calculate intent-to-marketplace alignment"""
     try:
         logger.info("🔄 Calculating intent alignments...")
         
         df_rankings = load_ranking_data()
+        view = load_marketplace_matrix().view(focus)
         
         # Define intent categories with keywords
         intents = [
@@ -532,10 +568,7 @@ def calculate_intent_alignments() -> List[Dict]:
             intent = intent_info['intent']
             
             # Simplified calculation - based on overall marketplace strength
-            amazon_wins = len(df_rankings[
-                (df_rankings['source_normalized'].str.lower() == 'amazon') &
-                (df_rankings['rank'] == 1)
-            ])
+            amazon_wins = int((view.rank == 1).sum())
             total_categories = df_rankings['Product'].nunique()
             amazon_win_rate = (amazon_wins / total_categories * 100) if total_categories > 0 else 0
             
@@ -565,18 +598,18 @@ def calculate_intent_alignments() -> List[Dict]:
                 'recommendation': recommendation
             })
         
-        logger.info(f"✅ Calculated {len(alignments)} intent alignments")
+        logger.info("✅ Calculated %s intent alignments", len(alignments))
         return alignments
         
     except Exception as e:
-        logger.error(f"❌ Error calculating intent alignments: {str(e)}")
+        logger.error("❌ Error calculating intent alignments: %s", e)
         raise
 
 
-def predict_rank_movement(category: str, products_to_add: int, citations_needed: int) -> Dict:
-    """Predict rank movement and ROI (handles cases where Amazon is missing)"""
+def predict_rank_movement(category: str, products_to_add: int, citations_needed: int, focus: str = 'amazon') -> Dict:
+    """Predict rank movement and ROI for the focus marketplace (handles cases where it is missing)"""
     try:
-        logger.info(f"🔄 Predicting rank for {category}...")
+        logger.info("🔄 Predicting rank for %s...", category)
         
         df_rankings = load_ranking_data()
         cat_data = df_rankings[df_rankings['Product'] == category]
@@ -584,11 +617,13 @@ def predict_rank_movement(category: str, products_to_add: int, citations_needed:
         if cat_data.empty:
             raise ValueError(f"Category not found: {category}")
         
-        amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
+        i = matrix.category_position(category)
         
-        # Handle case where Amazon is not in rankings
-        if amazon_data.empty:
-            logger.warning(f"⚠️ Amazon not found in {category}, using fallback prediction")
+        # Handle case where the focus marketplace is not in rankings
+        if not view.present[i]:
+            logger.warning("⚠️ %s not found in %s, using fallback prediction", view.marketplace, category)
             
             # Get rank 1 score for reference
             rank_1_data = cat_data[cat_data['rank'] == 1]
@@ -624,7 +659,7 @@ def predict_rank_movement(category: str, products_to_add: int, citations_needed:
             investment = products_to_add * 2000 + citations_needed * 5000
             
             # ROI
-            roi_multiplier = (revenue_impact * 12 / investment) if investment > 0 else 0
+            roi_multiplier = (revenue_impact * 12 / investment) if investment > 0 else 0.0
             
             result = {
                 'category': category,
@@ -633,17 +668,17 @@ def predict_rank_movement(category: str, products_to_add: int, citations_needed:
                 'gap_reduction': round(gap_reduction, 1),
                 'citations_needed': citations_needed,
                 'estimated_timeline_months': estimated_timeline,
-                'revenue_impact_monthly': revenue_impact,
-                'investment_required': investment,
+                'revenue_impact_monthly': float(revenue_impact),
+                'investment_required': float(investment),
                 'roi_multiplier': round(roi_multiplier, 2)
             }
             
-            logger.info(f"✅ Predicted (new entry): Unranked → #{predicted_rank} in {estimated_timeline} months")
+            logger.info("✅ Predicted (new entry): Unranked → #%s in %s months", predicted_rank, estimated_timeline)
             return result
         
         # Original logic for existing Amazon ranking
-        current_rank = int(amazon_data.iloc[0]['rank'])
-        current_score = float(amazon_data.iloc[0]['score_norm'])
+        current_rank = int(view.rank[i])
+        current_score = float(view.score[i])
         
         # Get #1 score
         rank_1_score = float(cat_data[cat_data['rank'] == 1].iloc[0]['score_norm'])
@@ -670,7 +705,7 @@ def predict_rank_movement(category: str, products_to_add: int, citations_needed:
         investment = products_to_add * 2000 + citations_needed * 5000
         
         # ROI
-        roi_multiplier = (revenue_impact * 12 / investment) if investment > 0 else 0
+        roi_multiplier = (revenue_impact * 12 / investment) if investment > 0 else 0.0
         
         result = {
             'category': category,
@@ -679,14 +714,107 @@ def predict_rank_movement(category: str, products_to_add: int, citations_needed:
             'gap_reduction': round(gap_reduction, 1),
             'citations_needed': citations_needed,
             'estimated_timeline_months': estimated_timeline,
-            'revenue_impact_monthly': revenue_impact,
-            'investment_required': investment,
+            'revenue_impact_monthly': float(revenue_impact),
+            'investment_required': float(investment),
             'roi_multiplier': round(roi_multiplier, 2)
         }
         
-        logger.info(f"✅ Predicted rank: {current_rank} → {predicted_rank} in {estimated_timeline} months")
+        logger.info("✅ Predicted rank: %s → %s in %s months", current_rank, predicted_rank, estimated_timeline)
+        return result
+        
+    except Exception as e:
+        logger.error("❌ Error predicting rank movement: %s", e)
+        raise
+
+
+# Quantiles reported for each price and delivery metric: p10, median, p90
+PRICE_QUANTILES = (0.1, 0.5, 0.9)
+
+
+def _metric_quantiles(metric: str, sketch: QuantileSketch) -> Dict:
+    """Count and p10 / median / p90 of a sketch (None where it has no values)"""
+    digits = 1 if metric == 'delivery_days' else 2
+    p10, median, p90 = (None if value is None else round(value, digits) for value in sketch.quantiles(PRICE_QUANTILES))
+    return {'count': len(sketch), 'p10': p10, 'median': median, 'p90': p90}
+
+
+def _price_delivery_stats(sketches: PriceSketches, category: str, marketplaces: List[str], currency: str) -> Dict:
+    """Quantiles of every metric over some marketplaces of a category combined"""
+    return {
+        metric: _metric_quantiles(metric, sketches.merged(category, metric, currency, marketplaces))
+        for metric in PRICE_METRICS
+    }
+
+
+def _price_delivery_gaps(stats: Dict, reference: Dict) -> Dict:
+    """Median price as % of the reference's, and median delivery days minus the reference's"""
+    price, reference_price = stats['price']['median'], reference['price']['median']
+    days, reference_days = stats['delivery_days']['median'], reference['delivery_days']['median']
+    return {
+        'price_index': round(price / reference_price * 100, 1) if price is not None and reference_price else None,
+        'delivery_days_gap': round(days - reference_days, 1) if days is not None and reference_days is not None else None
+    }
+
+
+def _price_delivery_comparison(sketches: PriceSketches, category: str, focus: str, currency: str) -> Dict:
+    competitors = [marketplace for marketplace in sketches.marketplaces(category) if marketplace != focus]
+    focus_stats = _price_delivery_stats(sketches, category, [focus], currency)
+    competitor_stats = _price_delivery_stats(sketches, category, competitors, currency)
+    return {
+        'category': category,
+        'currency': currency,
+        'focus': focus_stats,
+        'competitors': competitor_stats,
+        'competitor_count': len(competitors),
+        **_price_delivery_gaps(focus_stats, competitor_stats)
+    }
+
+
+def calculate_price_delivery_comparison(focus: str = 'amazon', currency: Optional[str] = None) -> List[Dict]:
+    """Price and delivery quantiles of the focus marketplace against all its competitors, per category"""
+    try:
+        logger.info("🔄 Comparing prices and delivery times...")
+        
+        sketches = load_price_sketches()
+        focus = normalize_marketplace(focus)
+        currency = normalize_currency(currency)
+        
+        result = [_price_delivery_comparison(sketches, category, focus, currency) for category in sketches.categories]
+        
+        logger.info("✅ Compared prices and delivery times in %s categories", len(result))
+        return result
+        
+    except Exception as e:
+        logger.error("❌ Error comparing prices and delivery times: %s", e)
+        raise
+
+
+def get_category_price_delivery(category: str, focus: str = 'amazon', currency: Optional[str] = None) -> Dict:
+    """Price and delivery comparison of one category, with the quantiles of each marketplace"""
+    try:
+        logger.info("🔄 Comparing prices and delivery times in %s...", category)
+        
+        sketches = load_price_sketches()
+        if not sketches.has_category(category):
+            raise ValueError(f"Category not found: {category}")
+        focus = normalize_marketplace(focus)
+        currency = normalize_currency(currency)
+        
+        result = _price_delivery_comparison(sketches, category, focus, currency)
+        marketplaces = []
+        for marketplace in sketches.marketplaces(category):
+            stats = _price_delivery_stats(sketches, category, [marketplace], currency)
+            marketplaces.append({
+                'marketplace': marketplace,
+                'is_focus': marketplace == focus,
+                **stats,
+                **_price_delivery_gaps(stats, result['focus'])
+            })
+        result['marketplaces'] = marketplaces
+        
+        logger.info("✅ Compared prices and delivery times of %s marketplaces in %s", len(marketplaces), category)
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error predicting rank movement: {str(e)}")
+        logger.error("❌ Error comparing prices and delivery times in %s: %s", category, e)
         raise
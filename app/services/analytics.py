@@ -3,22 +3,72 @@ from pathlib import Path
 from typing import Dict, List
 from app.core.config import settings
 from app.core.logger import setup_logger, log_excel_loading
+from app.services import analytics_engine
+from app.services.dataset_store import dataset_store, file_signature
+from app.services.scoring_engine import compute_scores
+from app.services.text_store import (
+    TextStore,
+    TextStoreBuilder,
+    finish_text_stores,
+    intern_text_columns,
+    text_store_path
+)
+from app.services.workbook_reader import combine_chunks, iter_chunks
 
 logger = setup_logger(__name__)
 
+# Columns each dataset must provide
+RANKING_REQUIRED_COLUMNS = ['Product', 'source_normalized', 'rank']
+PRODUCT_DETAILS_REQUIRED_COLUMNS = ['Product', 'product_name', 'source_normalized', 'rank']
+
+# Long text columns of the product details kept in memory-mapped text stores.
+# Each is replaced in the frame by an integer id column; decode with load_product_details_text().
+PRODUCT_DETAILS_TEXT_COLUMNS = {'Response': 'response_id', 'P_Value': 'p_value_id'}
+
+
+def validate_columns(df: pd.DataFrame, required_columns: List[str]) -> None:
+    """Raise ValueError if any required column is missing"""
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
 
 def load_ranking_data() -> pd.DataFrame:
     """
     Load and validate the ranking data from Excel file 1
     
+    With RANKING_SOURCE set to "live", scores and ranks are derived from the
+    answer rows in Excel file 2 instead of the precomputed file.
+    The frame is cached until its source file changes; treat it as read-only.
+    
     Returns:
         pd.DataFrame: Loaded ranking data
     """
+    if settings.RANKING_SOURCE == "live":
+        return dataset_store.get_frame('rankings_live', [settings.EXCEL_FILE_2], _compute_live_ranking_data)
+    return dataset_store.get_frame('rankings', [settings.EXCEL_FILE_1], _read_ranking_data)
+
+
+def _compute_live_ranking_data() -> pd.DataFrame:
+    """Derive the ranking data from the product details rows"""
+    try:
+        df = compute_scores(load_product_details_data())
+        logger.info("✅ Computed live rankings: %s rows for %s unique products", len(df), df['Product'].nunique())
+        return df
+        
+    except Exception as e:
+        logger.error("Error computing live ranking data: %s", e)
+        raise
+
+
+def _read_ranking_data() -> pd.DataFrame:
+    """Read and validate Excel file 1"""
     try:
         file_path = settings.EXCEL_FILE_1
         
         if not file_path.exists():
-            logger.error(f"Excel file not found: {file_path}")
+            logger.error("Excel file not found: %s", file_path)
             raise FileNotFoundError(f"Excel file not found: {file_path}")
         
         # Load the Excel file
@@ -33,18 +83,14 @@ def load_ranking_data() -> pd.DataFrame:
         )
         
         # Validate required columns
-        required_columns = ['Product', 'source_normalized', 'rank']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {missing_columns}")
+        validate_columns(df, RANKING_REQUIRED_COLUMNS)
         
-        logger.info(f"✅ Successfully loaded {len(df)} rows with {df['Product'].nunique()} unique products")
+        logger.info("✅ Successfully loaded %s rows with %s unique products", len(df), df['Product'].nunique())
         
         return df
         
     except Exception as e:
-        logger.error(f"Error loading ranking data: {str(e)}")
+        logger.error("Error loading ranking data: %s", e)
         raise
 
 
@@ -52,18 +98,60 @@ def load_product_details_data() -> pd.DataFrame:
     """
     Load and validate the product details data from Excel file 2
     
+    The long text columns in PRODUCT_DETAILS_TEXT_COLUMNS are replaced by integer
+    id columns (e.g. 'Response' -> 'response_id'); use load_product_details_text()
+    to decode them. The frame is cached until its source file changes; treat it as read-only.
+    
     Returns:
         pd.DataFrame: Loaded product details data
     """
+    return dataset_store.get_frame('details', [settings.EXCEL_FILE_2], _read_product_details_data)
+
+
+def load_product_details_text(column: str) -> TextStore:
+    """
+    Get the text store backing a text column of the product details data
+    
+    Args:
+        column: Text column name, e.g. 'Response'
+    
+    Returns:
+        TextStore: Decodes the ids found in the column's id column
+    """
+    if column not in PRODUCT_DETAILS_TEXT_COLUMNS:
+        raise ValueError(f"Not a stored text column: {column}")
+    
+    def open_store() -> TextStore:
+        # Loading the details builds the store for the current file version if needed
+        load_product_details_data()
+        return TextStore(text_store_path(column, file_signature(settings.EXCEL_FILE_2)))
+    
+    return dataset_store.get_frame(f'details_text:{column}', [settings.EXCEL_FILE_2], open_store)
+
+
+def _read_product_details_data() -> pd.DataFrame:
+    """Read and validate Excel file 2, moving long text columns into text stores"""
+    builders = {}
     try:
         file_path = settings.EXCEL_FILE_2
         
         if not file_path.exists():
-            logger.error(f"Excel file not found: {file_path}")
+            logger.error("Excel file not found: %s", file_path)
             raise FileNotFoundError(f"Excel file not found: {file_path}")
         
-        # Load the Excel file
-        df = pd.read_excel(file_path)
+        signature = file_signature(file_path)
+        builders = {column: TextStoreBuilder() for column in PRODUCT_DETAILS_TEXT_COLUMNS}
+        
+        # Stream the workbook in chunks so the repeated text is never held once per row
+        chunks = []
+        for chunk in iter_chunks(file_path):
+            # Validate required columns
+            validate_columns(chunk, PRODUCT_DETAILS_REQUIRED_COLUMNS)
+            chunks.append(intern_text_columns(chunk, PRODUCT_DETAILS_TEXT_COLUMNS, builders))
+        
+        df = combine_chunks(chunks)
+        finish_text_stores(builders, signature)
+        builders = {}
         
         # Log the loading information
         log_excel_loading(
@@ -73,19 +161,14 @@ def load_product_details_data() -> pd.DataFrame:
             sheet_name="Sheet1"
         )
         
-        # Validate required columns
-        required_columns = ['Product', 'product_name', 'source_normalized', 'rank']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Missing required columns: {missing_columns}")
-        
-        logger.info(f"✅ Successfully loaded {len(df)} rows with {df['Product'].nunique()} unique product categories")
+        logger.info("✅ Successfully loaded %s rows with %s unique product categories", len(df), df['Product'].nunique())
         
         return df
         
     except Exception as e:
-        logger.error(f"Error loading product details data: {str(e)}")
+        for builder in builders.values():
+            builder.abort()
+        logger.error("Error loading product details data: %s", e)
         raise
 
 
@@ -105,42 +188,79 @@ def get_marketplace_rankings(top_n: int = 5) -> Dict[str, Dict[str, int]]:
         }
     """
     try:
-        logger.info(f"🔄 Generating marketplace rankings (top {top_n})...")
+        logger.info("🔄 Generating marketplace rankings (top %s)...", top_n)
         
         # Load the data
         df = load_ranking_data()
         
-        # Filter for top N ranks
-        df_top = df[df['rank'] <= top_n].copy()
+        if settings.ANALYTICS_ENGINE == 'vectorized':
+            rankings = analytics_engine.marketplace_rankings(df, top_n)
+        else:
+            rankings = _marketplace_rankings_legacy(df, top_n)
         
-        # Sort by product and rank
-        df_top = df_top.sort_values(['Product', 'rank'])
+        logger.info("✅ Generated rankings for %s product categories", len(rankings))
+        logger.info("📊 Sample products: %s", list(rankings.keys())[:5])
         
-        # Create the nested dictionary
-        rankings = {}
+        return rankings
         
-        for product in df_top['Product'].unique():
-            product_data = df_top[df_top['Product'] == product]
-            
-            # Create marketplace: rank mapping for this product
-            marketplace_ranks = {}
-            for _, row in product_data.iterrows():
-                marketplace = row['source_normalized']
-                rank = int(row['rank'])
-                marketplace_ranks[marketplace] = rank
-            
-            rankings[product] = marketplace_ranks
+    except Exception as e:
+        logger.error("❌ Error generating marketplace rankings: %s", e)
+        raise
+
+
+def get_marketplace_rankings_frame(top_n: int = 5) -> pd.DataFrame:
+    """
+    Top N marketplace rankings of every product category as a long table
+    
+    Same rankings as get_marketplace_rankings, one row per (category, marketplace)
+    with columns category, marketplace and rank, ordered by category and rank.
+    """
+    try:
+        logger.info("🔄 Generating marketplace rankings table (top %s)...", top_n)
         
-        logger.info(f"✅ Generated rankings for {len(rankings)} product categories")
-        logger.info(f"📊 Sample products: {list(rankings.keys())[:5]}")
+        df = load_ranking_data()
+        df_top = df[df['rank'] <= top_n].sort_values(['Product', 'rank'])
+        # A marketplace listed twice in a category keeps its last rank, like the nested dictionary
+        df_top = df_top.drop_duplicates(['Product', 'source_normalized'], keep='last')
         
-        return rankings
+        # Categorical, so the repeated names are dictionary-encoded in the binary formats
+        return pd.DataFrame({
+            'category': pd.Categorical(df_top['Product'].to_numpy()),
+            'marketplace': pd.Categorical(df_top['source_normalized'].to_numpy()),
+            'rank': df_top['rank'].to_numpy(dtype='int64')
+        })
         
     except Exception as e:
-        logger.error(f"❌ Error generating marketplace rankings: {str(e)}")
+        logger.error("❌ Error generating marketplace rankings table: %s", e)
         raise
 
 
+def _marketplace_rankings_legacy(df: pd.DataFrame, top_n: int) -> Dict[str, Dict[str, int]]:
+    """Loop-based implementation of get_marketplace_rankings (reference for the vectorized engine)"""
+    # Filter for top N ranks
+    df_top = df[df['rank'] <= top_n].copy()
+    
+    # Sort by product and rank
+    df_top = df_top.sort_values(['Product', 'rank'])
+    
+    # Create the nested dictionary
+    rankings = {}
+    
+    for product in df_top['Product'].unique():
+        product_data = df_top[df_top['Product'] == product]
+        
+        # Create marketplace: rank mapping for this product
+        marketplace_ranks = {}
+        for _, row in product_data.iterrows():
+            marketplace = row['source_normalized']
+            rank = int(row['rank'])
+            marketplace_ranks[marketplace] = rank
+        
+        rankings[product] = marketplace_ranks
+    
+    return rankings
+
+
 def get_product_category_details(product_category: str) -> Dict:
     """
     Get detailed information for a specific product category including:
@@ -163,40 +283,25 @@ def get_product_category_details(product_category: str) -> Dict:
         }
     """
     try:
-        logger.info(f"🔄 Fetching details for category: {product_category}")
+        logger.info("🔄 Fetching details for category: %s", product_category)
         
-        # Load both datasets
-        df_rankings = load_ranking_data()
-        df_details = load_product_details_data()
+        # Imported here: the views are built from this module's loaders
+        from app.services.category_views import get_category_view
         
-        # Filter for the specific product category from rankings data
-        category_rankings = df_rankings[df_rankings['Product'] == product_category].copy()
+        view = get_category_view(product_category)
         
-        if category_rankings.empty:
-            logger.warning(f"⚠️ No ranking data found for category: {product_category}")
+        if not view.rankings:
+            logger.warning("⚠️ No ranking data found for category: %s", product_category)
             raise ValueError(f"Product category not found: {product_category}")
         
-        # Filter for the specific product category from details data
-        category_details = df_details[df_details['Product'] == product_category].copy()
-        
-        # Get unique product names
-        unique_products = sorted(category_details['product_name'].unique().tolist()) if not category_details.empty else []
+        # Copies, so callers never modify the shared view
+        unique_products = list(view.products)
         
-        # Get all marketplace rankings (not limited to top 5)
-        marketplace_rankings = {}
-        category_rankings_sorted = category_rankings.sort_values('rank')
-        
-        for _, row in category_rankings_sorted.iterrows():
-            marketplace = row['source_normalized']
-            rank = int(row['rank'])
-            marketplace_rankings[marketplace] = rank
+        # All marketplace rankings (not limited to top 5)
+        marketplace_rankings = dict(view.marketplace_rankings)
         
-        # Count how many products each marketplace appears in
-        marketplace_product_counts = {}
-        if not category_details.empty:
-            # Group by marketplace and count unique products
-            counts = category_details.groupby('source_normalized')['product_name'].nunique()
-            marketplace_product_counts = counts.to_dict()
+        # How many products each marketplace appears in
+        marketplace_product_counts = dict(view.marketplace_product_counts)
         
         result = {
             'category': product_category,
@@ -207,13 +312,13 @@ def get_product_category_details(product_category: str) -> Dict:
             'total_marketplaces': len(marketplace_rankings)
         }
         
-        logger.info(f"✅ Retrieved {result['total_products']} products and {result['total_marketplaces']} marketplaces for {product_category}")
-        logger.info(f"📊 Marketplace product counts: {marketplace_product_counts}")
+        logger.info("✅ Retrieved %s products and %s marketplaces for %s", result['total_products'], result['total_marketplaces'], product_category)
+        logger.debug("📊 Marketplace product counts: %s", marketplace_product_counts)
         
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error fetching product category details: {str(e)}")
+        logger.error("❌ Error fetching product category details: %s", e)
         raise
 
 
@@ -235,10 +340,10 @@ def get_ranking_statistics() -> Dict[str, any]:
             'top_marketplaces': df[df['rank'] == 1]['source_normalized'].value_counts().head(10).to_dict()
         }
         
-        logger.info(f"📊 Statistics generated: {stats['total_products']} products, {stats['total_marketplaces']} marketplaces")
+        logger.info("📊 Statistics generated: %s products, %s marketplaces", stats['total_products'], stats['total_marketplaces'])
         
         return stats
         
     except Exception as e:
-        logger.error(f"Error generating statistics: {str(e)}")
+        logger.error("Error generating statistics: %s", e)
         raise
@@ -0,0 +1,134 @@
+"""
+Vectorized analytics engine
+
+Grouped, single-pass versions of the per-category loops in the analytics,
+insights and additional services. Each function takes the loaded frames (or the
+marketplace matrix compiled from the rankings, see marketplace_matrix) and
+returns exactly what the matching legacy loop returns (same values, types, key
+order and list order); the services switch to them when
+settings.ANALYTICS_ENGINE is "vectorized".
+
+Equivalence with the legacy loops is checked by benchmarks/equivalence.py.
+"""
+from typing import TYPE_CHECKING, Dict, List
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from app.services.marketplace_matrix import MarketplaceMatrix
+
+
+def _sequential_group_means(values: np.ndarray, groups: np.ndarray) -> Dict:
+    """
+    Mean of each group's values, summed in row order
+
+    Matches Series.mean() on each group's rows bit for bit for the small groups
+    this is used on, unlike groupby().mean(), which uses compensated summation.
+    """
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]) if len(order) else np.array([], dtype=int)
+    sums = np.add.reduceat(values[order], starts) if len(order) else np.array([])
+    counts = np.diff(np.r_[starts, len(order)])
+    return dict(zip(sorted_groups[starts], sums / counts))
+
+
+def marketplace_rankings(df: pd.DataFrame, top_n: int = 5) -> Dict[str, Dict[str, int]]:
+    """{category: {marketplace: rank}} for the top N ranks of every category"""
+    df_top = df[df['rank'] <= top_n].sort_values(['Product', 'rank'])
+
+    rankings = {}
+    for product, marketplace, rank in zip(
+        df_top['Product'].to_numpy(), df_top['source_normalized'].to_numpy(), df_top['rank'].to_numpy()
+    ):
+        rankings.setdefault(product, {})[marketplace] = int(rank)
+    return rankings
+
+
+def priority_categories(matrix: 'MarketplaceMatrix', focus: str = 'amazon') -> Dict[str, List[Dict]]:
+    """Categories where the focus marketplace trails the winner, split into critical, medium and low gaps"""
+    view = matrix.view(focus)
+
+    critical, medium, low = [], [], []
+    for i in np.flatnonzero(view.rank > 1):
+        amazon_rank = int(view.rank[i])
+        amazon_score = view.score[i]
+        winner_score = matrix.winner_score[i]
+        gap_percentage = view.gap[i] * 100
+        priority_score = min(100.0, (gap_percentage * 2) + ((amazon_rank - 1) * 10))
+
+        category_data = {
+            'category': matrix.categories[i],
+            'current_rank': amazon_rank,
+            'gap_percentage': round(gap_percentage, 2),
+            'competitor': matrix.winner_name[i],
+            'competitor_score': float(winner_score),
+            'amazon_score': float(amazon_score),
+            'priority_score': round(priority_score, 2)
+        }
+
+        if gap_percentage >= 15:
+            category_data['severity'] = "Critical"
+            critical.append(category_data)
+        elif gap_percentage >= 7:
+            category_data['severity'] = "Medium"
+            medium.append(category_data)
+        else:
+            category_data['severity'] = "Low"
+            low.append(category_data)
+
+    return {
+        'critical': sorted(critical, key=lambda x: -x['gap_percentage']),
+        'medium': sorted(medium, key=lambda x: -x['gap_percentage']),
+        'low': sorted(low, key=lambda x: -x['gap_percentage'])
+    }
+
+
+def niche_opportunities(
+    df_rankings: pd.DataFrame,
+    df_no_rank: pd.DataFrame,
+    matrix: 'MarketplaceMatrix',
+    focus: str = 'amazon'
+) -> List[Dict]:
+    """Opportunity scores for every category the focus marketplace is ranked in"""
+    view = matrix.view(focus)
+    missing_products = df_no_rank['Product Category'].value_counts()
+
+    # Competitor strength: mean score of each category's top 3 ranks
+    top_3 = df_rankings[df_rankings['rank'] <= 3]
+    top_3_groups, top_3_categories = pd.factorize(top_3['Product'])
+    top_3_means = _sequential_group_means(top_3['score_norm'].to_numpy(dtype=float), top_3_groups)
+    top_3_codes = {category: code for code, category in enumerate(top_3_categories)}
+
+    opportunities = []
+    for i in np.flatnonzero(view.present):
+        category = matrix.categories[i]
+        amazon_rank = int(view.rank[i])
+        product_gap = int(missing_products.get(category, 0))
+        citation_freq = float(min(100, product_gap * 5))
+
+        code = top_3_codes.get(category)
+        competitor_strength = float(top_3_means[code] * 100) if code is not None else float('nan')
+
+        revenue_potential = float(min(100, (product_gap * 10 + (5 - amazon_rank) * 10)))
+        opportunity_score = (
+            (100 - citation_freq) * 0.2 +
+            (100 - amazon_rank * 20) * 0.3 +
+            (100 - competitor_strength) * 0.3 +
+            revenue_potential * 0.2
+        )
+
+        opportunities.append({
+            'category': category,
+            'citation_frequency': round(citation_freq, 1),
+            'amazon_current_rank': amazon_rank,
+            'competitor_strength': round(competitor_strength, 1),
+            'product_count_gap': product_gap,
+            'revenue_potential': round(revenue_potential, 1),
+            'opportunity_score': round(opportunity_score, 1),
+            'quick_win': (amazon_rank in [2, 3]) and (product_gap < 10)
+        })
+
+    opportunities.sort(key=lambda x: -x['opportunity_score'])
+    return opportunities
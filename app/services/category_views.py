@@ -0,0 +1,109 @@
+"""
+Per-category battle views
+
+The category drill-downs (/insights/category-battle/{category} and
+/analytics/product-category/{category}) each describe a single category, yet
+used to filter all of the rankings, product details and no-rank data on every
+click. Instead, a view of every category is materialized in one pass over the
+three datasets, once per dataset version:
+
+    rankings                    Every ranked row (marketplace, rank, score), best rank first
+    marketplace_rankings        {marketplace: rank}, as the product-category endpoint returns it
+    products                    Unique product names in the product details, sorted
+    marketplace_product_counts  Unique products per marketplace name
+    focus_product_counts        The same per marketplace matched without regard to case,
+                                for the focus marketplace of a request
+    missing_product_count       Rows of the category in the no-rank data (products amazon is
+                                missing; other focus marketplaces are missing product_count
+                                minus their focus_product_counts)
+
+so each drill-down is a dictionary lookup.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.analytics import load_product_details_data, load_ranking_data
+from app.services.dataset_store import dataset_store
+from app.services.marketplace_matrix import normalize_marketplace
+
+logger = setup_logger(__name__)
+
+
+@dataclass(frozen=True)
+class CategoryView:
+    """Everything the drill-downs show about one category (treat as read-only)"""
+    category: str
+    rankings: List[Tuple[str, int, float]] = field(default_factory=list)
+    marketplace_rankings: Dict[str, int] = field(default_factory=dict)
+    products: List[str] = field(default_factory=list)
+    product_count: int = 0
+    marketplace_product_counts: Dict[str, int] = field(default_factory=dict)
+    focus_product_counts: Dict[str, int] = field(default_factory=dict)
+    missing_product_count: int = 0
+
+
+def build_category_views(df_rankings: pd.DataFrame, df_details: pd.DataFrame, df_no_rank: pd.DataFrame) -> Dict[str, CategoryView]:
+    """Views of every category found in any of the three datasets"""
+    rankings: Dict[str, List[Tuple[str, int, float]]] = {}
+    ranked = df_rankings.sort_values(['Product', 'rank'], kind='stable')
+    for category, name, rank, score in zip(
+        ranked['Product'].tolist(), ranked['source_normalized'].tolist(), ranked['rank'].tolist(), ranked['score_norm'].tolist()
+    ):
+        rankings.setdefault(category, []).append((name, rank, score))
+
+    details = df_details.groupby('Product')['product_name']
+    products = details.unique()
+    product_counts = details.nunique()
+
+    marketplace_product_counts: Dict[str, Dict[str, int]] = {}
+    for (category, name), count in df_details.groupby(['Product', 'source_normalized'])['product_name'].nunique().items():
+        marketplace_product_counts.setdefault(category, {})[name] = int(count)
+
+    focus_product_counts: Dict[str, Dict[str, int]] = {}
+    marketplace_keys = df_details['source_normalized'].str.strip().str.lower()
+    for (category, key), count in df_details.groupby([df_details['Product'], marketplace_keys])['product_name'].nunique().items():
+        focus_product_counts.setdefault(category, {})[key] = int(count)
+
+    missing_counts = df_no_rank['Product Category'].value_counts()
+
+    views = {}
+    for category in dict.fromkeys([*rankings, *products.index, *missing_counts.index]):
+        category_rankings = rankings.get(category, [])
+        views[category] = CategoryView(
+            category=category,
+            rankings=category_rankings,
+            marketplace_rankings={name: rank for name, rank, _ in category_rankings},
+            products=sorted(products[category].tolist()) if category in products.index else [],
+            product_count=int(product_counts.get(category, 0)),
+            marketplace_product_counts=marketplace_product_counts.get(category, {}),
+            focus_product_counts=focus_product_counts.get(category, {}),
+            missing_product_count=int(missing_counts.get(category, 0))
+        )
+
+    logger.info("🗂️ Built battle views for %s categories", len(views))
+    return views
+
+
+def _load_views() -> Dict[str, CategoryView]:
+    # Imported here: the insights service owns the no-rank loader and reads these views
+    from app.services.insights_service import load_no_rank_data
+
+    return build_category_views(load_ranking_data(), load_product_details_data(), load_no_rank_data())
+
+
+def load_category_views() -> Dict[str, CategoryView]:
+    """Views of every category (rebuilt whenever one of the source files changes)"""
+    if settings.RANKING_SOURCE == "live":
+        name, sources = 'category_views_live', [settings.EXCEL_FILE_2, settings.EXCEL_FILE_3]
+    else:
+        name, sources = 'category_views', [settings.EXCEL_FILE_1, settings.EXCEL_FILE_2, settings.EXCEL_FILE_3]
+    return dataset_store.get_frame(name, sources, _load_views)
+
+
+def get_category_view(category: str) -> CategoryView:
+    """View of one category (empty if no dataset mentions it)"""
+    return load_category_views().get(category) or CategoryView(category=category)
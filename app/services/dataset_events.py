@@ -0,0 +1,141 @@
+"""
+Dataset change notifications
+
+Dashboards subscribe (GET /data/events as Server-Sent Events, or the
+/data/events/ws WebSocket) instead of polling every endpoint for new data. The
+watcher checks dataset_store.version every DATASET_WATCH_INTERVAL seconds,
+which only stats the source files. When it changes (an upload or a replaced
+file, in this worker or any other), the watcher pushes one event to every
+subscriber:
+
+    {"version": "<new version>", "previous_version": "<old version>",
+     "changed_categories": [...], "changed_at": "<ISO timestamp>"}
+
+changed_categories lists the categories whose rows differ in any dataset
+(including added and removed categories), found by comparing a digest per
+category of the rankings, product details and no-rank data. Clients refetch the
+category drill-downs of just those categories; any aggregate panel may change
+with a new version.
+
+The watcher only runs while someone is subscribed.
+"""
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.tracing import untraced
+from app.services.analytics import load_product_details_data, load_ranking_data
+from app.services.dataset_store import dataset_store
+
+logger = setup_logger(__name__)
+
+# Events a subscriber may fall behind by; older ones are dropped (the newest event supersedes them)
+SUBSCRIBER_QUEUE_SIZE = 16
+
+CategoryDigests = Dict[str, Tuple[int, int, int]]
+
+
+def _digests(frame: pd.DataFrame, category_column: str) -> Dict[str, int]:
+    """Order-independent digest of each category's rows"""
+    if frame.empty:
+        return {}
+    hashes = pd.util.hash_pandas_object(frame, index=False)
+    return hashes.groupby(frame[category_column].to_numpy()).sum().to_dict()
+
+
+def category_digests() -> CategoryDigests:
+    """{category: (rankings, details, no-rank digest)} of the current datasets"""
+    # Imported here: the insights service imports the category views, which read this package
+    from app.services.insights_service import load_no_rank_data
+
+    per_dataset = [
+        _digests(load_ranking_data(), 'Product'),
+        _digests(load_product_details_data(), 'Product'),
+        _digests(load_no_rank_data(), 'Product Category')
+    ]
+    categories = dict.fromkeys(category for digests in per_dataset for category in digests)
+    return {category: tuple(int(digests.get(category, 0)) for digests in per_dataset) for category in categories}
+
+
+def changed_categories(before: CategoryDigests, after: CategoryDigests) -> List[str]:
+    """Categories added, removed or modified between two digest maps, sorted"""
+    return sorted(category for category in before.keys() | after.keys() if before.get(category) != after.get(category))
+
+
+class DatasetWatcher:
+    """Pushes an event to every subscriber whenever the dataset version changes"""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._version: Optional[str] = None
+        self._digests: CategoryDigests = {}
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Queue of change events (dicts) for a new subscriber; starts the watcher if needed"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._watch())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def _publish(self, event: Dict) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def _snapshot(self) -> Tuple[str, CategoryDigests]:
+        version = dataset_store.version
+        digests = await run_in_threadpool(untraced, category_digests)
+        return version, digests
+
+    async def _watch(self) -> None:
+        logger.info("👀 Watching dataset versions for %s subscribers", self.subscribers)
+        try:
+            while self._subscribers:
+                if self._version is None:
+                    # Version the changes are compared with; like later snapshots, retried on the next tick
+                    try:
+                        self._version, self._digests = await self._snapshot()
+                    except Exception as e:
+                        logger.warning("⚠️ Could not load dataset version %s: %s", dataset_store.version, e)
+                await asyncio.sleep(settings.DATASET_WATCH_INTERVAL)
+                if self._version is None or dataset_store.version == self._version:
+                    continue
+                try:
+                    version, digests = await self._snapshot()
+                except Exception as e:
+                    # e.g. a file caught mid-write: try again on the next tick
+                    logger.warning("⚠️ Could not load dataset version %s: %s", dataset_store.version, e)
+                    continue
+                changed = changed_categories(self._digests, digests)
+                event = {
+                    'version': version,
+                    'previous_version': self._version,
+                    'changed_categories': changed,
+                    'changed_at': datetime.now(timezone.utc).isoformat()
+                }
+                self._version, self._digests = version, digests
+                logger.info("📣 Dataset version %s: %s changed categories, %s subscribers", version, len(changed), self.subscribers)
+                self._publish(event)
+        except Exception as e:
+            logger.error("❌ Dataset watcher stopped: %s", e)
+        finally:
+            logger.info("👋 Stopped watching dataset versions")
+
+
+# Shared watcher instance (one per worker process)
+dataset_watcher = DatasetWatcher()
@@ -0,0 +1,166 @@
+"""
+In-memory dataset generations
+
+Loaded frames are cached per dataset name together with the signature (mtime and
+size) of the files they were read from. A frame is reloaded as soon as one of its
+source files changes on disk, and uploads publish freshly built frames as a new
+generation without any reader seeing a half-updated state.
+
+With SHARED_DATASETS, loaded and published frames are memory-mapped copies shared
+by all worker processes (see shared_frames).
+"""
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.core.metrics import DATASET_CACHE_REQUESTS, DATASET_COLUMNS, DATASET_LOAD_DURATION, DATASET_ROWS
+from app.core.tracing import span
+from app.services import shared_frames
+
+logger = setup_logger(__name__)
+
+FileSignature = Tuple[str, int, int]
+
+
+def file_signature(path: Path) -> Optional[FileSignature]:
+    """Identify a file's current contents by name, mtime and size"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (path.name, stat.st_mtime_ns, stat.st_size)
+
+
+def dataset_sources() -> Dict[str, Path]:
+    """Files backing each dataset name"""
+    return {
+        'rankings': settings.EXCEL_FILE_1,
+        'details': settings.EXCEL_FILE_2,
+        'no_rank': settings.EXCEL_FILE_3
+    }
+
+
+@dataclass(frozen=True)
+class CachedFrame:
+    frame: pd.DataFrame
+    signature: Tuple[Optional[FileSignature], ...]
+
+
+@dataclass(frozen=True)
+class DatasetGeneration:
+    """Immutable snapshot of the loaded frames"""
+    frames: Dict[str, CachedFrame] = field(default_factory=dict)
+    published_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class DatasetStore:
+    """Holds the current dataset generation and swaps it atomically"""
+
+    def __init__(self):
+        self._generation = DatasetGeneration()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    @property
+    def generation(self) -> DatasetGeneration:
+        return self._generation
+
+    @property
+    def version(self) -> str:
+        """Short digest of the current source files; changes whenever any of them changes"""
+        digest = hashlib.sha1()
+        for name, path in sorted(dataset_sources().items()):
+            digest.update(f"{name}={file_signature(path)};".encode())
+        return digest.hexdigest()[:12]
+
+    def _load_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(name, threading.Lock())
+
+    def get_frame(self, name: str, sources: Iterable[Path], loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Return a cached frame, loading it if missing or if its source files changed
+
+        Callers must treat the returned frame as read-only; it is shared between requests.
+
+        Args:
+            name: Dataset name
+            sources: Files the frame is built from
+            loader: Function that builds the frame from its sources
+        """
+        with span('dataset'):
+            return self._get_frame(name, tuple(sources), loader)
+
+    def _get_frame(self, name: str, sources: Tuple[Path, ...], loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        cached = self._generation.frames.get(name)
+        if cached is not None and cached.signature == tuple(file_signature(path) for path in sources):
+            DATASET_CACHE_REQUESTS.inc(dataset=name, result="hit")
+            return cached.frame
+
+        with self._load_lock(name):
+            # Another request may have loaded it while we were waiting
+            signature = tuple(file_signature(path) for path in sources)
+            cached = self._generation.frames.get(name)
+            if cached is not None and cached.signature == signature:
+                DATASET_CACHE_REQUESTS.inc(dataset=name, result="hit")
+                return cached.frame
+
+            DATASET_CACHE_REQUESTS.inc(dataset=name, result="miss")
+            started = time.perf_counter()
+            if shared_frames.sharing_enabled() and None not in signature:
+                frame = shared_frames.load_shared(name, signature, loader)
+            else:
+                frame = loader()
+            DATASET_LOAD_DURATION.observe(time.perf_counter() - started, dataset=name)
+            self._swap({name: CachedFrame(frame=frame, signature=signature)})
+            return frame
+
+    def publish(self, frames: Dict[str, Tuple[pd.DataFrame, Iterable[Path]]]) -> DatasetGeneration:
+        """
+        Publish new frames as the current generation
+
+        Args:
+            frames: {dataset name: (frame, source files it was written to)}
+
+        Returns:
+            DatasetGeneration: The newly published generation
+        """
+        entries = {}
+        for name, (frame, sources) in frames.items():
+            signature = tuple(file_signature(path) for path in sources)
+            if shared_frames.sharing_enabled() and None not in signature:
+                frame = shared_frames.share(name, signature, frame)
+            entries[name] = CachedFrame(frame=frame, signature=signature)
+        generation = self._swap(entries)
+        logger.info("📦 Published dataset generation %s: %s", self.version, sorted(frames))
+        return generation
+
+    def _swap(self, entries: Dict[str, CachedFrame]) -> DatasetGeneration:
+        for name, entry in entries.items():
+            # Text stores are cached here too; they have rows (unique values) but no columns
+            DATASET_ROWS.set(len(entry.frame), dataset=name)
+            if isinstance(entry.frame, pd.DataFrame):
+                DATASET_COLUMNS.set(len(entry.frame.columns), dataset=name)
+
+        with self._lock:
+            frames = dict(self._generation.frames)
+            frames.update(entries)
+            self._generation = DatasetGeneration(frames=frames)
+            return self._generation
+
+    def clear(self) -> None:
+        """Drop all cached frames"""
+        with self._lock:
+            self._generation = DatasetGeneration()
+
+
+# Shared store instance
+dataset_store = DatasetStore()
@@ -0,0 +1,292 @@
+"""
+Dataset upload ingestion
+
+Uploaded workbooks and CSVs are parsed in fixed-size row chunks (see
+workbook_reader) so memory stays flat while reading large files; CSVs are first
+converted to workbooks the same way. Each chunk is validated against the columns the loaders
+require. Valid files replace the configured data file and are published as a new
+dataset generation; progress is tracked as a job record.
+"""
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.analytics import (
+    RANKING_REQUIRED_COLUMNS,
+    PRODUCT_DETAILS_REQUIRED_COLUMNS,
+    PRODUCT_DETAILS_TEXT_COLUMNS
+)
+from app.services.insights_service import NO_RANK_REQUIRED_COLUMNS
+from app.services.dataset_store import dataset_store, file_signature
+from app.services.price_sketches import PriceSketches
+from app.services.ranking_pipeline import run_pipeline
+from app.services.text_store import TextStoreBuilder, finish_text_stores, intern_text_columns
+from app.services.workbook_reader import combine_chunks, iter_chunks
+
+logger = setup_logger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+
+# Report at most this many offending rows in a validation error
+MAX_REPORTED_ROWS = 10
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    """How an uploaded dataset is validated and where it is stored"""
+    store_name: str
+    required_columns: List[str]
+    numeric_columns: List[str]
+    target: Callable[[], Path]
+    # {text column: id column} moved into text stores, as the loader does
+    text_columns: Dict[str, str] = field(default_factory=dict)
+
+
+DATASET_SPECS: Dict[str, DatasetSpec] = {
+    'rankings': DatasetSpec(
+        store_name='rankings',
+        required_columns=RANKING_REQUIRED_COLUMNS,
+        numeric_columns=['rank'],
+        target=lambda: settings.EXCEL_FILE_1
+    ),
+    'details': DatasetSpec(
+        store_name='details',
+        required_columns=PRODUCT_DETAILS_REQUIRED_COLUMNS,
+        numeric_columns=['rank'],
+        target=lambda: settings.EXCEL_FILE_2,
+        text_columns=PRODUCT_DETAILS_TEXT_COLUMNS
+    ),
+    'no-rank': DatasetSpec(
+        store_name='no_rank',
+        required_columns=NO_RANK_REQUIRED_COLUMNS,
+        numeric_columns=[],
+        target=lambda: settings.EXCEL_FILE_3
+    )
+}
+
+_jobs: "OrderedDict[str, Dict]" = OrderedDict()
+_jobs_lock = threading.Lock()
+# Serializes file swaps and publishes so concurrent uploads cannot interleave
+_publish_lock = threading.Lock()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def create_job(dataset: str, filename: str) -> Dict:
+    """Register a queued ingestion job"""
+    job = {
+        'job_id': uuid.uuid4().hex,
+        'dataset': dataset,
+        'filename': filename,
+        'status': 'queued',
+        'rows': None,
+        'columns': None,
+        'error': None,
+        'dataset_version': None,
+        'derived_rebuilt': False,
+        'created_at': _now(),
+        'started_at': None,
+        'finished_at': None
+    }
+
+    with _jobs_lock:
+        _jobs[job['job_id']] = job
+        while len(_jobs) > settings.UPLOAD_JOB_HISTORY:
+            _jobs.popitem(last=False)
+
+    return dict(job)
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """Get a job record by id"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+def list_jobs() -> List[Dict]:
+    """All retained jobs, newest first"""
+    with _jobs_lock:
+        return [dict(job) for job in reversed(_jobs.values())]
+
+
+def _update_job(job_id: str, **changes) -> None:
+    with _jobs_lock:
+        if job_id in _jobs:
+            _jobs[job_id].update(changes)
+
+
+def new_upload_path(filename: str) -> Path:
+    """Temporary location for an uploaded file, keeping its extension"""
+    settings.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    return settings.UPLOAD_DIR / f"{uuid.uuid4().hex}{Path(filename).suffix.lower()}"
+
+
+def validate_chunk(chunk: pd.DataFrame, spec: DatasetSpec, first_row: int) -> pd.DataFrame:
+    """
+    Validate a chunk against a dataset spec
+
+    Args:
+        chunk: Parsed rows
+        spec: Dataset spec to validate against
+        first_row: Spreadsheet row number of the chunk's first row (header is row 1)
+
+    Returns:
+        pd.DataFrame: The chunk with numeric columns coerced
+    """
+    missing_columns = [col for col in spec.required_columns if col not in chunk.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+    for column in spec.numeric_columns:
+        values = pd.to_numeric(chunk[column], errors='coerce')
+        invalid = np.flatnonzero(values.isna().to_numpy())
+        if len(invalid):
+            row_numbers = [int(first_row + i) for i in invalid[:MAX_REPORTED_ROWS]]
+            raise ValueError(f"Column '{column}' must be numeric; invalid values in rows {row_numbers}")
+        chunk[column] = values
+
+    return chunk
+
+
+def parse_upload(
+    file_path: Path,
+    spec: DatasetSpec,
+    builders: Dict[str, TextStoreBuilder],
+    on_chunk: Optional[Callable[[pd.DataFrame], None]] = None
+) -> pd.DataFrame:
+    """
+    Parse and validate an uploaded file chunk by chunk
+
+    Args:
+        file_path: Uploaded file
+        spec: Dataset spec to validate against
+        builders: Text store builders for the spec's text columns
+        on_chunk: Called with every validated chunk (e.g. to update sketches as rows arrive)
+
+    Returns:
+        pd.DataFrame: All validated rows
+    """
+    chunks = []
+    next_row = 2
+    for chunk in iter_chunks(file_path):
+        chunk = validate_chunk(chunk, spec, next_row)
+        next_row += len(chunk)
+        chunk = intern_text_columns(chunk, spec.text_columns, builders)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        chunks.append(chunk)
+
+    if not chunks:
+        raise ValueError("Uploaded file is empty")
+
+    return combine_chunks(chunks)
+
+
+def convert_csv_to_xlsx(csv_path: Path) -> Path:
+    """
+    Rewrite an uploaded CSV as a workbook, chunk by chunk
+
+    The loaders read workbooks, so CSV uploads are converted up front and then
+    ingested exactly like an uploaded workbook.
+
+    Returns:
+        Path: The converted workbook (the CSV is removed)
+    """
+    xlsx_path = csv_path.with_suffix('.xlsx')
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+
+    header_written = False
+    for chunk in iter_chunks(csv_path):
+        if not header_written:
+            worksheet.append([str(col) for col in chunk.columns])
+            header_written = True
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+            worksheet.append([value.item() if isinstance(value, np.generic) else value for value in row])
+
+    workbook.save(xlsx_path)
+    csv_path.unlink(missing_ok=True)
+    return xlsx_path
+
+
+def _persist_upload(upload_path: Path, target: Path) -> None:
+    """Swap the validated upload in as the dataset's data file"""
+    tmp_path = target.with_name(f".tmp-{target.name}")
+    shutil.move(str(upload_path), tmp_path)
+    tmp_path.replace(target)
+
+
+def run_ingestion_job(job_id: str, dataset: str, upload_path: Path, rebuild_derived: bool = False) -> None:
+    """
+    Parse, validate and publish an uploaded dataset file (runs as a background task)
+
+    Args:
+        job_id: Job to report progress on
+        dataset: Dataset key in DATASET_SPECS
+        upload_path: Temporary file holding the upload
+        rebuild_derived: After a details upload, re-run the ranking pipeline so the
+            rankings and no-rank files are rebuilt from the new rows
+    """
+    spec = DATASET_SPECS[dataset]
+    builders = {}
+    _update_job(job_id, status='running', started_at=_now())
+
+    try:
+        logger.info("🔄 Ingesting %s upload for job %s...", dataset, job_id)
+
+        if upload_path.suffix.lower() == '.csv':
+            upload_path = convert_csv_to_xlsx(upload_path)
+
+        builders = {column: TextStoreBuilder() for column in spec.text_columns}
+        # Price and delivery sketches of a details upload are fed as its rows are parsed
+        sketches = PriceSketches() if dataset == 'details' else None
+        df = parse_upload(upload_path, spec, builders, on_chunk=sketches.add_rows if sketches is not None else None)
+        target = spec.target()
+        frames = {spec.store_name: (df, [target])}
+        if sketches is not None:
+            frames['price_sketches'] = (sketches, [target])
+
+        with _publish_lock:
+            _persist_upload(upload_path, target)
+            finish_text_stores(builders, file_signature(target))
+            builders = {}
+            dataset_store.publish(frames)
+
+            derived_rebuilt = False
+            if rebuild_derived and dataset == 'details':
+                run_pipeline(source_path=target)
+                derived_rebuilt = True
+
+        _update_job(
+            job_id,
+            status='succeeded',
+            rows=len(df),
+            columns=[str(col) for col in df.columns],
+            dataset_version=dataset_store.version,
+            derived_rebuilt=derived_rebuilt,
+            finished_at=_now()
+        )
+        logger.info("✅ Ingested %s %s rows for job %s", len(df), dataset, job_id)
+
+    except Exception as e:
+        for builder in builders.values():
+            builder.abort()
+        logger.error("❌ Error ingesting %s upload for job %s: %s", dataset, job_id, e)
+        _update_job(job_id, status='failed', error=str(e), finished_at=_now())
+
+    finally:
+        upload_path.unlink(missing_ok=True)
@@ -7,18 +7,70 @@ from urllib.parse import urlparse
 
 from app.core.config import settings
 from app.core.logger import setup_logger, log_excel_loading
+from app.services import analytics_engine
 from app.services.analytics import load_ranking_data, load_product_details_data
+from app.services.category_views import CategoryView, get_category_view, load_category_views
+from app.services.dataset_store import dataset_store
+from app.services.marketplace_matrix import (
+    FocusView,
+    MarketplaceMatrix,
+    load_marketplace_matrix,
+    marketplace_label,
+    normalize_marketplace
+)
 
 logger = setup_logger(__name__)
 
+# Columns the no-rank analyses read
+NO_RANK_REQUIRED_COLUMNS = ['Product Category', 'Product Name', 'Citations']
+
+# Marketplace the no-rank data lists the missing products of
+NO_RANK_MARKETPLACE = 'amazon'
+
 
 def load_no_rank_data() -> pd.DataFrame:
-    """Load products without Amazon presence"""
+    """Load products without Amazon presence (cached until the file changes; treat as read-only)"""
+    return dataset_store.get_frame('no_rank', [settings.EXCEL_FILE_3], _read_no_rank_data)
+
+
+def load_missing_products(focus: str = 'amazon') -> pd.DataFrame:
+    """
+    Products the focus marketplace is missing, in the no-rank data's columns (treat as read-only)
+
+    For amazon this is the no-rank data. Any other marketplace gets the products
+    other marketplaces list in a category of the product details but it does not;
+    there are no citations for those (Citations is empty).
+    """
+    focus = normalize_marketplace(focus)
+    if focus == NO_RANK_MARKETPLACE:
+        return load_no_rank_data()
+    return dataset_store.get_frame(
+        f'missing_products_{focus}', [settings.EXCEL_FILE_2],
+        lambda: build_missing_products(load_product_details_data(), focus)
+    )
+
+
+def build_missing_products(df_details: pd.DataFrame, focus: str) -> pd.DataFrame:
+    """Unique (category, product) pairs of the product details the focus marketplace does not list"""
+    listed = df_details[['Product', 'product_name']].dropna()
+    is_focus = df_details.loc[listed.index, 'source_normalized'].str.strip().str.lower().eq(focus)
+    focus_pairs = pd.MultiIndex.from_frame(listed[is_focus])
+    others = listed[~is_focus].drop_duplicates()
+    missing = others[~pd.MultiIndex.from_frame(others).isin(focus_pairs)]
+    return pd.DataFrame({
+        'Product Category': missing['Product'].to_numpy(),
+        'Product Name': missing['product_name'].to_numpy(),
+        'Citations': pd.Series(np.nan, index=range(len(missing)), dtype=object)
+    })
+
+
+def _read_no_rank_data() -> pd.DataFrame:
+    """Read Excel file 3"""
     try:
         file_path = settings.EXCEL_FILE_3
         
         if not file_path.exists():
-            logger.error(f"Excel file not found: {file_path}")
+            logger.error("Excel file not found: %s", file_path)
             raise FileNotFoundError(f"Excel file not found: {file_path}")
         
         df = pd.read_excel(file_path)
@@ -30,37 +82,35 @@ def load_no_rank_data() -> pd.DataFrame:
             sheet_name="Sheet1"
         )
         
-        logger.info(f"✅ Successfully loaded {len(df)} no-rank products")
+        logger.info("✅ Successfully loaded %s no-rank products", len(df))
         return df
         
     except Exception as e:
-        logger.error(f"Error loading no-rank data: {str(e)}")
+        logger.error("Error loading no-rank data: %s", e)
         raise
 
 
-def calculate_overview_metrics() -> Dict:
-    """Calculate executive dashboard overview metrics"""
+def calculate_overview_metrics(focus: str = 'amazon') -> Dict:
+    """Calculate executive dashboard overview metrics for the focus marketplace"""
     try:
         logger.info("🔄 Calculating overview metrics...")
         
-        df = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
         
         # Total unique categories
-        total_categories = df['Product'].nunique()
+        total_categories = len(matrix)
         
-        # Amazon-specific data
-        amazon_data = df[df['source_normalized'].str.lower() == 'amazon'].copy()
+        # Categories where the focus marketplace appears
+        focus_categories = int(view.present.sum())
+        visibility_score = (focus_categories / total_categories) * 100
         
-        # Categories where Amazon appears
-        amazon_categories = amazon_data['Product'].nunique()
-        visibility_score = (amazon_categories / total_categories) * 100
-        
-        # Categories where Amazon is #1
-        categories_rank_1 = len(amazon_data[amazon_data['rank'] == 1])
+        # Categories where the focus marketplace is #1
+        categories_rank_1 = int((view.rank == 1).sum())
         market_leadership_score = (categories_rank_1 / total_categories) * 100
         
         # Average ranking
-        average_ranking = amazon_data['rank'].mean()
+        average_ranking = view.rank[view.present].mean() if focus_categories else np.nan
         
         # Opportunity gap
         opportunity_gap = 100 - market_leadership_score
@@ -76,20 +126,22 @@ def calculate_overview_metrics() -> Dict:
             'categories_not_rank_1': categories_not_rank_1
         }
         
-        logger.info(f"✅ Overview metrics calculated: {metrics}")
+        logger.info("✅ Overview metrics calculated for %s categories", total_categories)
+        logger.debug("📊 Overview metrics: %s", metrics)
         return metrics
         
     except Exception as e:
-        logger.error(f"❌ Error calculating overview metrics: {str(e)}")
+        logger.error("❌ Error calculating overview metrics: %s", e)
         raise
 
 
-def generate_performance_quadrants() -> List[Dict]:
+def generate_performance_quadrants(focus: str = 'amazon') -> List[Dict]:
     """Generate 2x2 performance quadrant matrix data"""
     try:
         logger.info("🔄 Generating performance quadrants...")
         
-        df_rankings = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
         df_details = load_product_details_data()
         
         # Get category sizes (product count)
@@ -97,68 +149,58 @@ def generate_performance_quadrants() -> List[Dict]:
         
         quadrants = []
         
-        for category in df_rankings['Product'].unique():
-            cat_data = df_rankings[df_rankings['Product'] == category]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
+        for i in np.flatnonzero(view.present):
+            category = matrix.categories[i]
+            amazon_score = view.score[i]
+            amazon_rank = view.rank[i]
+            category_size = category_sizes.get(category, 1)
             
-            if not amazon_data.empty:
-                amazon_score = amazon_data.iloc[0]['score_norm']
-                amazon_rank = amazon_data.iloc[0]['rank']
-                category_size = category_sizes.get(category, 1)
-                
-                # Determine quadrant
-                high_score = amazon_score >= 0.15  # Top 50% threshold
-                high_importance = category_size >= 3  # High product count
-                
-                if high_score and high_importance:
-                    quadrant = "Stars"
-                elif not high_score and high_importance:
-                    quadrant = "Question Marks"
-                elif high_score and not high_importance:
-                    quadrant = "Cash Cows"
-                else:
-                    quadrant = "Dogs"
-                
-                quadrants.append({
-                    'category': category,
-                    'amazon_score': float(amazon_score),
-                    'category_size': int(category_size),
-                    'amazon_rank': int(amazon_rank),
-                    'quadrant': quadrant
-                })
+            # Determine quadrant
+            high_score = amazon_score >= 0.15  # Top 50% threshold
+            high_importance = category_size >= 3  # High product count
+            
+            if high_score and high_importance:
+                quadrant = "Stars"
+            elif not high_score and high_importance:
+                quadrant = "Question Marks"
+            elif high_score and not high_importance:
+                quadrant = "Cash Cows"
+            else:
+                quadrant = "Dogs"
+            
+            quadrants.append({
+                'category': category,
+                'amazon_score': float(amazon_score),
+                'category_size': int(category_size),
+                'amazon_rank': int(amazon_rank),
+                'quadrant': quadrant
+            })
         
-        logger.info(f"✅ Generated {len(quadrants)} quadrant data points")
+        logger.info("✅ Generated %s quadrant data points", len(quadrants))
         return quadrants
         
     except Exception as e:
-        logger.error(f"❌ Error generating performance quadrants: {str(e)}")
+        logger.error("❌ Error generating performance quadrants: %s", e)
         raise
 
 
-def analyze_competitor_threats() -> List[Dict]:
+def analyze_competitor_threats(focus: str = 'amazon') -> List[Dict]:
     """Analyze competitor threat levels"""
     try:
         logger.info("🔄 Analyzing competitor threats...")
         
-        df = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
+        gap_percentages = view.gap * 100
         
-        # Get categories where Amazon is not #1
+        # Get categories where the focus marketplace is not #1
         competitor_wins = defaultdict(list)
         
-        for category in df['Product'].unique():
-            cat_data = df[df['Product'] == category].sort_values('rank')
-            winner = cat_data.iloc[0]
-            
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-            
-            if not amazon_data.empty and winner['source_normalized'].lower() != 'amazon':
-                amazon_score = amazon_data.iloc[0]['score_norm']
-                gap_percentage = (winner['score_norm'] - amazon_score) * 100
-                
-                competitor_wins[winner['source_normalized']].append({
-                    'category': category,
-                    'gap': gap_percentage
-                })
+        for i in np.flatnonzero(view.present & (view.rank > 1)):
+            competitor_wins[matrix.winner_name[i]].append({
+                'category': matrix.categories[i],
+                'gap': gap_percentages[i]
+            })
         
         # Aggregate competitor analysis
         threats = []
@@ -189,81 +231,90 @@ def analyze_competitor_threats() -> List[Dict]:
         # Sort by threat level and gap
         threats.sort(key=lambda x: (-x['categories_dominated'], -x['average_gap_percentage']))
         
-        logger.info(f"✅ Identified {len(threats)} competitor threats")
+        logger.info("✅ Identified %s competitor threats", len(threats))
         return threats
         
     except Exception as e:
-        logger.error(f"❌ Error analyzing competitor threats: {str(e)}")
+        logger.error("❌ Error analyzing competitor threats: %s", e)
         raise
 
 
-def categorize_by_priority() -> Dict[str, List[Dict]]:
+def categorize_by_priority(focus: str = 'amazon') -> Dict[str, List[Dict]]:
     """Categorize opportunities by severity (Critical/Medium/Low)"""
     try:
         logger.info("🔄 Categorizing by priority...")
         
-        df = load_ranking_data()
-        
-        critical = []
-        medium = []
-        low = []
-        
-        for category in df['Product'].unique():
-            cat_data = df[df['Product'] == category].sort_values('rank')
-            winner = cat_data.iloc[0]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-            
-            if not amazon_data.empty:
-                amazon_rank = int(amazon_data.iloc[0]['rank'])
-                amazon_score = amazon_data.iloc[0]['score_norm']
-                
-                if amazon_rank > 1:
-                    gap_percentage = (winner['score_norm'] - amazon_score) * 100
-                    
-                    # Calculate priority score
-                    priority_score = min(100, (gap_percentage * 2) + ((amazon_rank - 1) * 10))
-                    
-                    category_data = {
-                        'category': category,
-                        'current_rank': amazon_rank,
-                        'gap_percentage': round(gap_percentage, 2),
-                        'competitor': winner['source_normalized'],
-                        'competitor_score': float(winner['score_norm']),
-                        'amazon_score': float(amazon_score),
-                        'priority_score': round(priority_score, 2)
-                    }
-                    
-                    # Categorize by gap
-                    if gap_percentage >= 15:
-                        category_data['severity'] = "Critical"
-                        critical.append(category_data)
-                    elif gap_percentage >= 7:
-                        category_data['severity'] = "Medium"
-                        medium.append(category_data)
-                    else:
-                        category_data['severity'] = "Low"
-                        low.append(category_data)
-        
-        result = {
-            'critical': sorted(critical, key=lambda x: -x['gap_percentage']),
-            'medium': sorted(medium, key=lambda x: -x['gap_percentage']),
-            'low': sorted(low, key=lambda x: -x['gap_percentage'])
-        }
+        if settings.ANALYTICS_ENGINE == 'vectorized':
+            result = analytics_engine.priority_categories(load_marketplace_matrix(), focus)
+        else:
+            result = _categorize_by_priority_legacy(load_ranking_data(), focus)
         
-        logger.info(f"✅ Categorized: {len(critical)} Critical, {len(medium)} Medium, {len(low)} Low")
+        logger.info("✅ Categorized: %s Critical, %s Medium, %s Low", len(result['critical']), len(result['medium']), len(result['low']))
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error categorizing by priority: {str(e)}")
+        logger.error("❌ Error categorizing by priority: %s", e)
         raise
 
 
-def analyze_no_rank_products() -> Dict:
-    """Analyze products where Amazon has no presence"""
+def _categorize_by_priority_legacy(df: pd.DataFrame, focus: str = 'amazon') -> Dict[str, List[Dict]]:
+    """Loop-based implementation of categorize_by_priority (reference for the vectorized engine)"""
+    focus = normalize_marketplace(focus)
+    critical = []
+    medium = []
+    low = []
+    
+    for category in df['Product'].unique():
+        cat_data = df[df['Product'] == category].sort_values('rank')
+        winner = cat_data.iloc[0]
+        amazon_data = cat_data[cat_data['source_normalized'].str.strip().str.lower() == focus]
+        
+        if not amazon_data.empty:
+            amazon_rank = int(amazon_data.iloc[0]['rank'])
+            amazon_score = amazon_data.iloc[0]['score_norm']
+            
+            if amazon_rank > 1:
+                gap_percentage = (winner['score_norm'] - amazon_score) * 100
+                
+                # Calculate priority score
+                priority_score = min(100.0, (gap_percentage * 2) + ((amazon_rank - 1) * 10))
+                
+                category_data = {
+                    'category': category,
+                    'current_rank': amazon_rank,
+                    'gap_percentage': round(gap_percentage, 2),
+                    'competitor': winner['source_normalized'],
+                    'competitor_score': float(winner['score_norm']),
+                    'amazon_score': float(amazon_score),
+                    'priority_score': round(priority_score, 2)
+                }
+                
+                # Categorize by gap
+                if gap_percentage >= 15:
+                    category_data['severity'] = "Critical"
+                    critical.append(category_data)
+                elif gap_percentage >= 7:
+                    category_data['severity'] = "Medium"
+                    medium.append(category_data)
+                else:
+                    category_data['severity'] = "Low"
+                    low.append(category_data)
+    
+    result = {
+        'critical': sorted(critical, key=lambda x: -x['gap_percentage']),
+        'medium': sorted(medium, key=lambda x: -x['gap_percentage']),
+        'low': sorted(low, key=lambda x: -x['gap_percentage'])
+    }
+    
+    return result
+
+
+def analyze_no_rank_products(focus: str = 'amazon') -> Dict:
+    """Analyze products where the focus marketplace has no presence"""
     try:
         logger.info("🔄 Analyzing no-rank products...")
         
-        df = load_no_rank_data()
+        df = load_missing_products(focus)
         
         total_missing = len(df)
         categories_affected = df['Product Category'].nunique()
@@ -295,20 +346,20 @@ def analyze_no_rank_products() -> Dict:
             'sample_products': sample_products
         }
         
-        logger.info(f"✅ No-rank analysis complete: {total_missing} missing products")
+        logger.info("✅ No-rank analysis complete: %s missing products", total_missing)
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error analyzing no-rank products: {str(e)}")
+        logger.error("❌ Error analyzing no-rank products: %s", e)
         raise
 
 
-def extract_citation_sources() -> List[Dict]:
-    """Extract and analyze citation sources"""
+def extract_citation_sources(focus: str = 'amazon') -> List[Dict]:
+    """Extract and analyze citation sources of the products the focus marketplace is missing"""
     try:
         logger.info("🔄 Extracting citation sources...")
         
-        df = load_no_rank_data()
+        df = load_missing_products(focus)
         
         domain_count = defaultdict(lambda: {'count': 0, 'categories': set()})
         
@@ -340,120 +391,103 @@ def extract_citation_sources() -> List[Dict]:
         # Sort by impact score
         citations.sort(key=lambda x: -x['impact_score'])
         
-        logger.info(f"✅ Extracted {len(citations)} citation sources")
+        logger.info("✅ Extracted %s citation sources", len(citations))
         return citations[:50]  # Top 50
         
     except Exception as e:
-        logger.error(f"❌ Error extracting citation sources: {str(e)}")
+        logger.error("❌ Error extracting citation sources: %s", e)
         raise
 
 
-def generate_category_heatmap() -> List[Dict]:
+def generate_category_heatmap(focus: str = 'amazon') -> List[Dict]:
     """Generate category performance heatmap data"""
+    return category_heatmap_frame(focus).to_dict('records')
+
+
+def category_heatmap_frame(focus: str = 'amazon') -> pd.DataFrame:
+    """Category heatmap as a frame: one row per category the focus marketplace is ranked in, by category name"""
     try:
         logger.info("🔄 Generating category heatmap...")
         
-        df = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
         
-        heatmap = []
+        rows = np.array(sorted(np.flatnonzero(view.present), key=lambda i: matrix.categories[i]), dtype=np.int64)
+        ranks = view.rank[rows]
+        behind = ranks > 1
         
-        for category in sorted(df['Product'].unique()):
-            cat_data = df[df['Product'] == category].sort_values('rank')
-            winner = cat_data.iloc[0]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-            
-            if not amazon_data.empty:
-                amazon_rank = int(amazon_data.iloc[0]['rank'])
-                amazon_score = float(amazon_data.iloc[0]['score_norm'])
-                gap_to_first = float(winner['score_norm'] - amazon_score) if amazon_rank > 1 else 0.0
-                
-                # Determine color
-                if amazon_rank == 1:
-                    status_color = "green"
-                elif amazon_rank <= 3:
-                    status_color = "yellow"
-                elif amazon_rank <= 5:
-                    status_color = "orange"
-                else:
-                    status_color = "red"
-                
-                heatmap.append({
-                    'category': category,
-                    'amazon_rank': amazon_rank,
-                    'amazon_score': round(amazon_score, 4),
-                    'gap_to_first': round(gap_to_first, 4),
-                    'competitor_name': winner['source_normalized'] if amazon_rank > 1 else 'Amazon',
-                    'status_color': status_color
-                })
-        
-        logger.info(f"✅ Generated heatmap for {len(heatmap)} categories")
+        heatmap = pd.DataFrame({
+            'category': matrix.categories[rows],
+            'amazon_rank': ranks,
+            'amazon_score': [round(float(score), 4) for score in view.score[rows]],
+            'gap_to_first': [round(float(gap), 4) for gap in np.where(behind, view.gap[rows], 0.0)],
+            'competitor_name': np.where(behind, matrix.winner_name[rows], marketplace_label(view.marketplace)),
+            # green: #1, yellow: #2-3, orange: #4-5, red: below
+            'status_color': np.select([ranks == 1, ranks <= 3, ranks <= 5], ['green', 'yellow', 'orange'], 'red')
+        })
+        
+        logger.info("✅ Generated heatmap for %s categories", len(heatmap))
         return heatmap
         
     except Exception as e:
-        logger.error(f"❌ Error generating category heatmap: {str(e)}")
+        logger.error("❌ Error generating category heatmap: %s", e)
         raise
 
 
-def identify_quick_wins() -> List[Dict]:
+def identify_quick_wins(focus: str = 'amazon') -> List[Dict]:
     """Identify quick win opportunities (<15% gap)"""
     try:
         logger.info("🔄 Identifying quick wins...")
         
-        df = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
+        gap_percentages = view.gap * 100
         
         quick_wins = []
         
-        for category in df['Product'].unique():
-            cat_data = df[df['Product'] == category].sort_values('rank')
-            winner = cat_data.iloc[0]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
+        for i in np.flatnonzero(((view.rank == 2) | (view.rank == 3)) & (gap_percentages < 15)):
+            gap_percentage = gap_percentages[i]
             
-            if not amazon_data.empty:
-                amazon_rank = int(amazon_data.iloc[0]['rank'])
-                amazon_score = amazon_data.iloc[0]['score_norm']
-                
-                if amazon_rank in [2, 3]:
-                    gap_percentage = (winner['score_norm'] - amazon_score) * 100
-                    
-                    if gap_percentage < 15:
-                        # Generate action items based on gap
-                        action_items = []
-                        if gap_percentage < 5:
-                            action_items = ["Increase product variety", "Optimize pricing"]
-                            effort = "Low"
-                        elif gap_percentage < 10:
-                            action_items = ["Expand product catalog", "Improve delivery speed", "Enhance reviews"]
-                            effort = "Medium"
-                        else:
-                            action_items = ["Strategic pricing review", "Marketing push", "Partnership opportunities"]
-                            effort = "Medium"
-                        
-                        quick_wins.append({
-                            'category': category,
-                            'current_rank': amazon_rank,
-                            'gap_percentage': round(gap_percentage, 2),
-                            'competitor': winner['source_normalized'],
-                            'action_items': action_items,
-                            'estimated_effort': effort
-                        })
+            # Generate action items based on gap
+            action_items = []
+            if gap_percentage < 5:
+                action_items = ["Increase product variety", "Optimize pricing"]
+                effort = "Low"
+            elif gap_percentage < 10:
+                action_items = ["Expand product catalog", "Improve delivery speed", "Enhance reviews"]
+                effort = "Medium"
+            else:
+                action_items = ["Strategic pricing review", "Marketing push", "Partnership opportunities"]
+                effort = "Medium"
+            
+            quick_wins.append({
+                'category': matrix.categories[i],
+                'current_rank': int(view.rank[i]),
+                'gap_percentage': round(gap_percentage, 2),
+                'competitor': matrix.winner_name[i],
+                'action_items': action_items,
+                'estimated_effort': effort
+            })
         
         # Sort by gap (easiest first)
         quick_wins.sort(key=lambda x: x['gap_percentage'])
         
-        logger.info(f"✅ Identified {len(quick_wins)} quick wins")
+        logger.info("✅ Identified %s quick wins", len(quick_wins))
         return quick_wins
         
     except Exception as e:
-        logger.error(f"❌ Error identifying quick wins: {str(e)}")
+        logger.error("❌ Error identifying quick wins: %s", e)
         raise
 
 
-def identify_battlegrounds() -> List[Dict]:
+def identify_battlegrounds(focus: str = 'amazon') -> List[Dict]:
     """Identify strategic battleground categories"""
     try:
         logger.info("🔄 Identifying battlegrounds...")
         
-        df_rankings = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
+        gap_percentages = view.gap * 100
         df_details = load_product_details_data()
         
         # Get category sizes
@@ -461,159 +495,208 @@ def identify_battlegrounds() -> List[Dict]:
         
         battlegrounds = []
         
-        for category in df_rankings['Product'].unique():
-            cat_data = df_rankings[df_rankings['Product'] == category].sort_values('rank')
-            winner = cat_data.iloc[0]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
+        # Medium gap with potential high volume
+        for i in np.flatnonzero((view.rank > 1) & (gap_percentages >= 7) & (gap_percentages <= 20)):
+            category = matrix.categories[i]
+            product_count = category_sizes.get(category, 0)
             
-            if not amazon_data.empty:
-                amazon_rank = int(amazon_data.iloc[0]['rank'])
-                amazon_score = amazon_data.iloc[0]['score_norm']
-                product_count = category_sizes.get(category, 0)
-                
-                if amazon_rank > 1:
-                    gap_percentage = (winner['score_norm'] - amazon_score) * 100
-                    
-                    # Medium gap with potential high volume
-                    if 7 <= gap_percentage <= 20:
-                        # Determine volume
-                        if product_count >= 5:
-                            product_volume = "High"
-                            investment_priority = "High"
-                        elif product_count >= 3:
-                            product_volume = "Medium"
-                            investment_priority = "Medium"
-                        else:
-                            product_volume = "Low"
-                            investment_priority = "Low"
-                        
-                        battlegrounds.append({
-                            'category': category,
-                            'amazon_rank': amazon_rank,
-                            'gap_percentage': round(gap_percentage, 2),
-                            'competitor': winner['source_normalized'],
-                            'product_volume': product_volume,
-                            'investment_priority': investment_priority
-                        })
+            # Determine volume
+            if product_count >= 5:
+                product_volume = "High"
+                investment_priority = "High"
+            elif product_count >= 3:
+                product_volume = "Medium"
+                investment_priority = "Medium"
+            else:
+                product_volume = "Low"
+                investment_priority = "Low"
+            
+            battlegrounds.append({
+                'category': category,
+                'amazon_rank': int(view.rank[i]),
+                'gap_percentage': round(gap_percentages[i], 2),
+                'competitor': matrix.winner_name[i],
+                'product_volume': product_volume,
+                'investment_priority': investment_priority
+            })
         
         # Sort by investment priority
         priority_order = {'High': 3, 'Medium': 2, 'Low': 1}
         battlegrounds.sort(key=lambda x: (-priority_order[x['investment_priority']], -x['gap_percentage']))
         
-        logger.info(f"✅ Identified {len(battlegrounds)} battleground categories")
+        logger.info("✅ Identified %s battleground categories", len(battlegrounds))
         return battlegrounds
         
     except Exception as e:
-        logger.error(f"❌ Error identifying battlegrounds: {str(e)}")
+        logger.error("❌ Error identifying battlegrounds: %s", e)
         raise
 
 
-def get_competitor_details(competitor_name: str) -> Dict:
+def get_competitor_details(competitor_name: str, focus: str = 'amazon') -> Dict:
     """Get detailed analysis for a specific competitor"""
     try:
-        logger.info(f"🔄 Getting details for competitor: {competitor_name}")
+        logger.info("🔄 Getting details for competitor: %s", competitor_name)
         
-        df = load_ranking_data()
+        matrix = load_marketplace_matrix()
+        result = _competitor_details(matrix, matrix.view(focus), competitor_name)
         
-        categories = []
+        logger.info("✅ Retrieved details for %s", competitor_name)
+        return result
         
-        for category in df['Product'].unique():
-            cat_data = df[df['Product'] == category].sort_values('rank')
-            competitor_data = cat_data[cat_data['source_normalized'] == competitor_name]
-            amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-            
-            if not competitor_data.empty and not amazon_data.empty:
-                comp_rank = int(competitor_data.iloc[0]['rank'])
-                comp_score = float(competitor_data.iloc[0]['score_norm'])
-                amazon_rank = int(amazon_data.iloc[0]['rank'])
-                amazon_score = float(amazon_data.iloc[0]['score_norm'])
-                gap = (comp_score - amazon_score) * 100
-                
-                categories.append({
-                    'category': category,
-                    'rank': comp_rank,
-                    'score': round(comp_score, 4),
-                    'amazon_rank': amazon_rank,
-                    'amazon_score': round(amazon_score, 4),
-                    'gap': round(gap, 2)
-                })
+    except Exception as e:
+        logger.error("❌ Error getting competitor details: %s", e)
+        raise
+
+
+def get_competitor_details_batch(competitor_names: List[str], focus: str = 'amazon') -> Dict:
+    """
+    Get detailed analysis for several competitors against the same loaded data
+    
+    Returns:
+        Dict: {'results': {name: details}, 'errors': {name: {status_code, detail}}};
+        competitors that are not ranked anywhere get the same empty details as
+        from get_competitor_details
+    """
+    try:
+        logger.info("🔄 Getting details for %s competitors", len(competitor_names))
         
-        # Sort by rank (dominance)
-        categories.sort(key=lambda x: x['rank'])
+        matrix = load_marketplace_matrix()
+        view = matrix.view(focus)
         
-        # Get categories where competitor is #1
-        dominated = [c for c in categories if c['rank'] == 1]
+        results, errors = {}, {}
+        for competitor_name in dict.fromkeys(competitor_names):
+            try:
+                results[competitor_name] = _competitor_details(matrix, view, competitor_name)
+            except Exception as e:
+                logger.error("❌ Error getting competitor details for %s: %s", competitor_name, e)
+                errors[competitor_name] = {'status_code': 500, 'detail': str(e)}
         
-        # Calculate average gap
-        avg_gap = np.mean([c['gap'] for c in categories]) if categories else 0
+        logger.info("✅ Retrieved details for %s competitors (%s errors)", len(results), len(errors))
+        return {'results': results, 'errors': errors}
         
-        # Identify strength areas (categories where competitor beats Amazon significantly)
-        strength_areas = [c['category'] for c in categories if c['gap'] > 10]
+    except Exception as e:
+        logger.error("❌ Error getting competitor details batch: %s", e)
+        raise
+
+
+def _competitor_details(matrix: MarketplaceMatrix, view: FocusView, competitor_name: str) -> Dict:
+    # Join the competitor's postings with the focus marketplace's column, by rank
+    # (dominance), then category order
+    postings = matrix.postings(competitor_name)
+    shared = view.present[postings.category]
+    positions, ranks, scores = postings.category[shared], postings.rank[shared], postings.score[shared]
+    
+    categories = []
+    
+    for j in np.lexsort((positions, ranks)):
+        i = positions[j]
+        comp_rank = int(ranks[j])
+        comp_score = float(scores[j])
+        amazon_rank = int(view.rank[i])
+        amazon_score = float(view.score[i])
+        gap = (comp_score - amazon_score) * 100
+        
+        categories.append({
+            'category': matrix.categories[i],
+            'rank': comp_rank,
+            'score': round(comp_score, 4),
+            'amazon_rank': amazon_rank,
+            'amazon_score': round(amazon_score, 4),
+            'gap': round(gap, 2)
+        })
+    
+    # Get categories where competitor is #1
+    dominated = [c for c in categories if c['rank'] == 1]
+    
+    # Calculate average gap
+    avg_gap = float(np.mean([c['gap'] for c in categories])) if categories else 0.0
+    
+    # Identify strength areas (categories where competitor beats the focus marketplace significantly)
+    strength_areas = [c['category'] for c in categories if c['gap'] > 10]
+    
+    return {
+        'competitor_name': competitor_name,
+        'total_categories_dominated': len(dominated),
+        'average_gap': round(avg_gap, 2),
+        'categories': categories,
+        'strength_areas': strength_areas[:10]  # Top 10
+    }
+
+
+def get_category_battle_details(category_name: str, focus: str = 'amazon') -> Dict:
+    """Get detailed battle analysis for a specific category"""
+    try:
+        logger.info("🔄 Getting battle details for category: %s", category_name)
         
-        result = {
-            'competitor_name': competitor_name,
-            'total_categories_dominated': len(dominated),
-            'average_gap': round(avg_gap, 2),
-            'categories': categories,
-            'strength_areas': strength_areas[:10]  # Top 10
-        }
+        result = _category_battle(get_category_view(category_name), normalize_marketplace(focus))
         
-        logger.info(f"✅ Retrieved details for {competitor_name}")
+        logger.info("✅ Retrieved battle details for %s", category_name)
         return result
         
     except Exception as e:
-        logger.error(f"❌ Error getting competitor details: {str(e)}")
+        logger.error("❌ Error getting category battle details: %s", e)
         raise
 
 
-def get_category_battle_details(category_name: str) -> Dict:
-    """Get detailed battle analysis for a specific category"""
+def get_category_battle_batch(category_names: List[str], focus: str = 'amazon') -> Dict:
+    """
+    Get battle analysis for several categories against the same loaded data
+    
+    Returns:
+        Dict: {'results': {category: battle}, 'errors': {category: {status_code, detail}}};
+        categories no dataset mentions get the same empty battle as from
+        get_category_battle_details
+    """
     try:
-        logger.info(f"🔄 Getting battle details for category: {category_name}")
+        logger.info("🔄 Getting battle details for %s categories", len(category_names))
         
-        df_rankings = load_ranking_data()
-        df_details = load_product_details_data()
-        df_no_rank = load_no_rank_data()
-        
-        # Get top 5 competitors in this category
-        cat_data = df_rankings[df_rankings['Product'] == category_name].sort_values('rank').head(5)
-        
-        amazon_data = cat_data[cat_data['source_normalized'].str.lower() == 'amazon']
-        amazon_rank = int(amazon_data.iloc[0]['rank']) if not amazon_data.empty else 0
-        amazon_score = float(amazon_data.iloc[0]['score_norm']) if not amazon_data.empty else 0
-        
-        top_5_competitors = []
-        for _, row in cat_data.iterrows():
-            gap = (row['score_norm'] - amazon_score) * 100 if amazon_score > 0 else 0
-            top_5_competitors.append({
-                'name': row['source_normalized'],
-                'rank': int(row['rank']),
-                'score': float(row['score_norm']),
-                'gap': round(gap, 2)
-            })
-        
-        # Product counts
-        cat_details = df_details[df_details['Product'] == category_name]
-        total_products = cat_details['product_name'].nunique() if not cat_details.empty else 0
-        amazon_products = cat_details[cat_details['source_normalized'].str.lower() == 'amazon']['product_name'].nunique() if not cat_details.empty else 0
+        views = load_category_views()
+        focus = normalize_marketplace(focus)
         
-        # Missing products
-        missing = df_no_rank[df_no_rank['Product Category'] == category_name]
-        missing_count = len(missing)
+        results, errors = {}, {}
+        for category_name in dict.fromkeys(category_names):
+            view = views.get(category_name) or CategoryView(category=category_name)
+            try:
+                results[category_name] = _category_battle(view, focus)
+            except Exception as e:
+                logger.error("❌ Error getting battle details for %s: %s", category_name, e)
+                errors[category_name] = {'status_code': 500, 'detail': str(e)}
         
-        result = {
-            'category': category_name,
-            'amazon_rank': amazon_rank,
-            'amazon_score': round(amazon_score, 4),
-            'top_5_competitors': top_5_competitors,
-            'product_count': int(total_products),
-            'amazon_product_count': int(amazon_products),
-            'missing_product_count': int(missing_count)
-        }
-        
-        logger.info(f"✅ Retrieved battle details for {category_name}")
-        return result
+        logger.info("✅ Retrieved battle details for %s categories (%s errors)", len(results), len(errors))
+        return {'results': results, 'errors': errors}
         
     except Exception as e:
-        logger.error(f"❌ Error getting category battle details: {str(e)}")
+        logger.error("❌ Error getting category battle batch: %s", e)
         raise
+
+
+def _category_battle(view: CategoryView, focus: str) -> Dict:
+    # Get top 5 competitors in this category
+    top_5 = view.rankings[:5]
+    
+    amazon_data = [row for row in top_5 if normalize_marketplace(row[0]) == focus]
+    amazon_rank = amazon_data[0][1] if amazon_data else 0
+    amazon_score = amazon_data[0][2] if amazon_data else 0.0
+    
+    top_5_competitors = []
+    for name, rank, score in top_5:
+        gap = (score - amazon_score) * 100 if amazon_score > 0 else 0
+        top_5_competitors.append({
+            'name': name,
+            'rank': rank,
+            'score': score,
+            'gap': round(gap, 2)
+        })
+    
+    return {
+        'category': view.category,
+        'amazon_rank': amazon_rank,
+        'amazon_score': round(amazon_score, 4),
+        'top_5_competitors': top_5_competitors,
+        'product_count': view.product_count,
+        'amazon_product_count': view.focus_product_counts.get(focus, 0),
+        'missing_product_count': (
+            view.missing_product_count if focus == NO_RANK_MARKETPLACE
+            else view.product_count - view.focus_product_counts.get(focus, 0)
+        )
+    }
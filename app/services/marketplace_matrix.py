@@ -0,0 +1,200 @@
+"""
+Category × marketplace matrix
+
+The insights look at the rankings from one marketplace's point of view (the
+focus, Amazon unless a request asks for another one) and compare it with the
+winner of every category. Rather than filtering the rankings frame per category
+on every request, the rankings are compiled once per dataset version into a
+matrix with one row per category and one column per marketplace:
+
+    rank    Rank of the marketplace in the category (0 where it is not ranked)
+    score   Its normalized score (NaN where it is not ranked)
+
+together with the #1 row of every category. Marketplaces are matched without
+regard to case, like the Amazon filters they replace, and a marketplace listed
+more than once in a category (e.g. "Flipkart" and "flipkart") takes its
+best-ranked row.
+
+Only the cells that exist are stored, column by column, so the matrix grows
+with the rankings rather than with categories × marketplaces (which reaches
+hundreds of MB at the larger benchmark scales). view() expands one column into
+dense per-category arrays, from which the gaps, quadrants and heatmaps are
+computed with array operations; views are cached per marketplace.
+
+The matrix also keeps an inverted index from every marketplace name, exactly as
+written in the data, to its postings: the categories it is ranked in (in file
+order) with its rank and score there. Competitor drill-downs read one posting
+list instead of scanning the rankings, so their cost follows the number of
+categories the competitor appears in.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.analytics import load_ranking_data
+from app.services.dataset_store import dataset_store
+
+logger = setup_logger(__name__)
+
+
+def normalize_marketplace(name: str) -> str:
+    """Key a marketplace name is matched by"""
+    return str(name).strip().lower()
+
+
+def marketplace_label(focus: str) -> str:
+    """Display name of a focus marketplace, e.g. 'Amazon'"""
+    return focus.title()
+
+
+@dataclass(frozen=True)
+class Postings:
+    """Categories one marketplace name is ranked in, in file order (best-ranked row per category)"""
+    category: np.ndarray  # category positions
+    rank: np.ndarray      # int64
+    score: np.ndarray     # float64
+
+    def __len__(self) -> int:
+        return len(self.category)
+
+
+@dataclass(frozen=True)
+class FocusView:
+    """One marketplace's column of the matrix, as dense arrays indexed like the categories"""
+    marketplace: str
+    present: np.ndarray  # bool: the marketplace is ranked in the category
+    rank: np.ndarray     # int64, 0 where not ranked
+    score: np.ndarray    # float64, NaN where not ranked
+    gap: np.ndarray      # float64, winner score minus the marketplace's score (NaN where not ranked)
+
+
+def _best_per_group(rows: np.ndarray, ranks: np.ndarray, *keys: np.ndarray) -> np.ndarray:
+    """
+    Best-ranked row of every distinct key combination, sorted by the keys
+
+    lexsort is stable, so of rows with equal ranks the first in file order wins.
+    """
+    order = rows[np.lexsort((ranks[rows],) + tuple(key[rows] for key in reversed(keys)))]
+    if not len(order):
+        return order
+    new_group = np.zeros(len(order), dtype=bool)
+    new_group[0] = True
+    for key in keys:
+        new_group[1:] |= key[order][1:] != key[order][:-1]
+    return order[new_group]
+
+
+class MarketplaceMatrix:
+    """Rank and score of every marketplace in every category"""
+
+    def __init__(self, df: pd.DataFrame):
+        category_codes, categories = pd.factorize(df['Product'])
+        name_codes, names = pd.factorize(df['source_normalized'])
+        # Names that differ only in case (or surrounding spaces) are one marketplace
+        name_marketplaces, marketplaces = pd.factorize(np.array([normalize_marketplace(name) for name in names], dtype=object))
+        marketplace_codes = np.where(name_codes >= 0, name_marketplaces[name_codes], -1) if len(names) else name_codes
+        ranks = df['rank'].to_numpy(dtype=np.int64)
+        scores = df['score_norm'].to_numpy(dtype=np.float64)
+
+        rows = np.flatnonzero((category_codes >= 0) & (name_codes >= 0))
+
+        self.categories = np.asarray(categories, dtype=object)
+        self.marketplaces = np.asarray(marketplaces, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self._category_index = {category: i for i, category in enumerate(self.categories)}
+        self._marketplace_index = {marketplace: i for i, marketplace in enumerate(self.marketplaces)}
+        self._name_index = {name: i for i, name in enumerate(self.names)}
+
+        # Cells sorted by marketplace, then category: column j is cells[starts[j]:starts[j + 1]]
+        cells = _best_per_group(rows, ranks, marketplace_codes, category_codes)
+        self.cell_category = category_codes[cells]
+        self.cell_rank = ranks[cells]
+        self.cell_score = scores[cells]
+        self._column_starts = np.searchsorted(marketplace_codes[cells], np.arange(len(self.marketplaces) + 1))
+
+        # Postings per name, in file order: name i is postings[starts[i]:starts[i + 1]]
+        postings = _best_per_group(rows, ranks, name_codes, category_codes)
+        postings = postings[np.lexsort((postings, name_codes[postings]))]
+        self._postings = Postings(
+            category=category_codes[postings],
+            rank=ranks[postings],
+            score=scores[postings]
+        )
+        self._posting_starts = np.searchsorted(name_codes[postings], np.arange(len(self.names) + 1))
+
+        # #1 row of every category (first in file order on a tied rank)
+        by_rank = rows[np.lexsort((ranks[rows], category_codes[rows]))]
+        winners = by_rank[np.r_[True, category_codes[by_rank][1:] != category_codes[by_rank][:-1]]] if len(by_rank) else by_rank
+        self.winner_name = self.names[name_codes[winners]]
+        self.winner_score = scores[winners]
+        self.winner_marketplace = marketplace_codes[winners]
+
+        self._views: Dict[str, FocusView] = {}
+
+    def __len__(self) -> int:
+        return len(self.categories)
+
+    def has_marketplace(self, marketplace: str) -> bool:
+        return normalize_marketplace(marketplace) in self._marketplace_index
+
+    def category_position(self, category: str) -> Optional[int]:
+        return self._category_index.get(category)
+
+    def postings(self, name: str) -> Postings:
+        """Posting list of a marketplace name, matched exactly (empty if it is not ranked anywhere)"""
+        i = self._name_index.get(name)
+        if i is None:
+            return Postings(category=np.empty(0, dtype=np.int64), rank=np.empty(0, dtype=np.int64), score=np.empty(0))
+        cells = slice(self._posting_starts[i], self._posting_starts[i + 1])
+        return Postings(
+            category=self._postings.category[cells],
+            rank=self._postings.rank[cells],
+            score=self._postings.score[cells]
+        )
+
+    def view(self, marketplace: str) -> FocusView:
+        """Dense per-category arrays for one marketplace (all absent if it is unknown)"""
+        key = normalize_marketplace(marketplace)
+        view = self._views.get(key)
+        if view is not None:
+            return view
+
+        rank = np.zeros(len(self.categories), dtype=np.int64)
+        score = np.full(len(self.categories), np.nan)
+        column = self._marketplace_index.get(key)
+        if column is not None:
+            cells = slice(self._column_starts[column], self._column_starts[column + 1])
+            rank[self.cell_category[cells]] = self.cell_rank[cells]
+            score[self.cell_category[cells]] = self.cell_score[cells]
+
+        view = FocusView(
+            marketplace=key,
+            present=rank > 0,
+            rank=rank,
+            score=score,
+            gap=self.winner_score - score
+        )
+        self._views[key] = view
+        return view
+
+
+def build_marketplace_matrix(df: pd.DataFrame) -> MarketplaceMatrix:
+    matrix = MarketplaceMatrix(df)
+    logger.info(
+        "🧮 Built marketplace matrix: %s categories x %s marketplaces, %s cells, %s postings",
+        len(matrix.categories), len(matrix.marketplaces), len(matrix.cell_rank), len(matrix._postings)
+    )
+    return matrix
+
+
+def load_marketplace_matrix() -> MarketplaceMatrix:
+    """Matrix of the current rankings (rebuilt whenever their source file changes)"""
+    if settings.RANKING_SOURCE == "live":
+        name, source = 'marketplace_matrix_live', settings.EXCEL_FILE_2
+    else:
+        name, source = 'marketplace_matrix', settings.EXCEL_FILE_1
+    return dataset_store.get_frame(name, [source], lambda: build_marketplace_matrix(load_ranking_data()))
@@ -0,0 +1,66 @@
+"""
+Dataset preloading
+
+Loads everything the endpoints read ahead of the first request. The production
+launcher (app/server.py) calls preload() once in the parent process before it
+forks the workers, so they start warm and share the loaded pages copy-on-write
+(and, with SHARED_DATASETS, attach to the same memory-mapped frames).
+"""
+import time
+from typing import Callable, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.analytics import (
+    PRODUCT_DETAILS_TEXT_COLUMNS,
+    load_product_details_data,
+    load_product_details_text,
+    load_ranking_data
+)
+from app.services.category_views import load_category_views
+from app.services.insights_service import load_no_rank_data
+from app.services.marketplace_matrix import load_marketplace_matrix
+from app.services.price_sketches import load_price_sketches
+
+logger = setup_logger(__name__)
+
+
+def preload_steps() -> List[Tuple[str, Callable[[], object]]]:
+    """(name, loader) for every dataset and derived structure the endpoints read"""
+    steps = [
+        ('rankings', load_ranking_data),
+        ('details', load_product_details_data),
+        ('no_rank', load_no_rank_data)
+    ]
+    steps += [
+        (f'details_text:{column}', lambda column=column: load_product_details_text(column))
+        for column in PRODUCT_DETAILS_TEXT_COLUMNS
+    ]
+    steps.append(('marketplace_matrix', load_marketplace_matrix))
+    steps.append(('category_views', load_category_views))
+    steps.append(('price_sketches', load_price_sketches))
+    return steps
+
+
+def preload() -> Dict[str, float]:
+    """
+    Load every dataset, skipping (and logging) the ones that fail
+
+    Returns:
+        Dict[str, float]: Seconds spent per step that succeeded
+    """
+    timings = {}
+    for name, load in preload_steps():
+        started = time.perf_counter()
+        try:
+            load()
+        except Exception as e:
+            logger.warning("⚠️ Preload of %s failed, workers will load it on demand: %s", name, e)
+            continue
+        timings[name] = time.perf_counter() - started
+
+    logger.info(
+        "🔥 Preloaded %s in %.2fs (ranking source: %s)",
+        ', '.join(timings) or 'nothing', sum(timings.values()), settings.RANKING_SOURCE
+    )
+    return timings
@@ -0,0 +1,137 @@
+"""
+Price and delivery sketches
+
+Every recommended listing in the product details carries a price (in
+price_currency), a delivery fee and the delivery time in days. Rather than
+sorting those columns for every comparison, one QuantileSketch is kept per
+(category, marketplace, metric) and queried for the p10 / median / p90:
+
+    price, delivery_fee   Per currency, since prices in different currencies
+                          cannot share a distribution
+    delivery_days         Regardless of currency
+
+Missing values are written as -1 in the data; only non-negative values are
+counted (a delivery fee of 0 is a free delivery), and rows without a category
+or marketplace are skipped. Marketplaces are matched without regard to case,
+like the focus marketplace.
+
+The sketches are built once per dataset version, and uploads of the product
+details feed them chunk by chunk as the rows are parsed (see
+ingestion_service), so the new version is published with its sketches ready.
+Aggregates such as "all competitors of the focus marketplace in a category" are
+answered by merging the marketplaces' sketches.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.analytics import load_product_details_data
+from app.services.dataset_store import dataset_store
+from app.services.quantile_sketch import QuantileSketch
+
+logger = setup_logger(__name__)
+
+# Metrics sketched per (category, marketplace); the money metrics are kept per currency
+PRICE_METRICS = ('price', 'delivery_fee', 'delivery_days')
+MONEY_METRICS = ('price', 'delivery_fee')
+
+# Currency values that mean "no price"
+MISSING_CURRENCIES = {'', '-1', 'NAN', 'NONE'}
+
+# (marketplace, metric, currency) within one category
+SketchKey = Tuple[str, str, str]
+
+
+def normalize_currency(currency: Optional[str] = None) -> str:
+    """Key a currency is matched by (PRICE_CURRENCY when none is given), e.g. 'INR'"""
+    return (currency or settings.PRICE_CURRENCY).strip().upper()
+
+
+def _currency_keys(df: pd.DataFrame) -> pd.Series:
+    """Upper-cased currency of each row ('' where it is missing)"""
+    if 'price_currency' not in df.columns:
+        return pd.Series('', index=df.index)
+    currencies = df['price_currency'].astype(str).str.strip().str.upper()
+    return currencies.where(~currencies.isin(MISSING_CURRENCIES) & df['price_currency'].notna(), '')
+
+
+class PriceSketches:
+    """Quantile sketches of price and delivery metrics per category and marketplace"""
+
+    def __init__(self, relative_accuracy: Optional[float] = None):
+        self.relative_accuracy = relative_accuracy or settings.PRICE_SKETCH_RELATIVE_ACCURACY
+        self._sketches: Dict[str, Dict[SketchKey, QuantileSketch]] = {}
+        self.rows = 0
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def add_rows(self, df: pd.DataFrame) -> None:
+        """Count a chunk of product details rows"""
+        self.rows += len(df)
+        if df.empty:
+            return
+
+        categories = df['Product'].astype(str)
+        marketplaces = df['source_normalized'].astype(str).str.strip().str.lower()
+        currencies = _currency_keys(df)
+        listed = df['Product'].notna() & df['source_normalized'].notna()
+
+        for metric in PRICE_METRICS:
+            if metric not in df.columns:
+                continue
+            values = pd.to_numeric(df[metric], errors='coerce')
+            valid = values.ge(0) & listed
+            if metric in MONEY_METRICS:
+                valid &= currencies.ne('')
+                currency = currencies[valid]
+            else:
+                currency = pd.Series('', index=df.index)[valid]
+            if not valid.any():
+                continue
+
+            grouped = values[valid].groupby([categories[valid], marketplaces[valid], currency], sort=False)
+            for (category, marketplace, currency_key), group in grouped:
+                key = (marketplace, metric, currency_key)
+                category_sketches = self._sketches.setdefault(category, {})
+                if key not in category_sketches:
+                    category_sketches[key] = QuantileSketch(self.relative_accuracy)
+                category_sketches[key].add(group.to_numpy())
+
+    @property
+    def categories(self) -> List[str]:
+        """Categories with any sketched value, in the order they were first seen"""
+        return list(self._sketches)
+
+    def has_category(self, category: str) -> bool:
+        return category in self._sketches
+
+    def marketplaces(self, category: str) -> List[str]:
+        """Marketplaces with any sketched value in a category, in the order they were first seen"""
+        return list(dict.fromkeys(marketplace for marketplace, _, _ in self._sketches.get(category, {})))
+
+    def merged(self, category: str, metric: str, currency: str, marketplaces: Iterable[str]) -> QuantileSketch:
+        """Sketch of a metric over several marketplaces of a category (empty if none has values)"""
+        currency = normalize_currency(currency) if metric in MONEY_METRICS else ''
+        sketches = self._sketches.get(category, {})
+        return QuantileSketch.merged(
+            (sketches[key] for key in ((marketplace, metric, currency) for marketplace in marketplaces) if key in sketches),
+            self.relative_accuracy
+        )
+
+
+def build_price_sketches(df_details: pd.DataFrame) -> PriceSketches:
+    """Sketches of every category and marketplace in the product details"""
+    sketches = PriceSketches()
+    sketches.add_rows(df_details)
+    logger.info("📐 Built price and delivery sketches for %s categories from %s rows", len(sketches.categories), len(sketches))
+    return sketches
+
+
+def load_price_sketches() -> PriceSketches:
+    """Sketches of the current product details (rebuilt whenever the file changes)"""
+    return dataset_store.get_frame(
+        'price_sketches', [settings.EXCEL_FILE_2], lambda: build_price_sketches(load_product_details_data())
+    )
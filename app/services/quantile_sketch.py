@@ -0,0 +1,118 @@
+"""
+Mergeable quantile sketch (DDSketch)
+
+Values are counted in logarithmic buckets: bucket i holds the values in
+(gamma^(i-1), gamma^i], with gamma = (1 + a) / (1 - a) for a relative accuracy a.
+Every quantile is then answered within a relative error of a of the exact
+value, from a few hundred counters regardless of how many values were added.
+
+Two sketches with the same accuracy merge by adding their bucket counts, so a
+sketch can be built chunk by chunk as rows are ingested, and sketches of several
+groups (e.g. all competitors in a category) combine into the sketch of their
+union without revisiting any rows.
+
+Only non-negative values are tracked; zeros are counted apart from the buckets.
+"""
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Buckets kept per sketch; beyond it the lowest buckets are collapsed (their
+# quantiles lose accuracy first, the upper ones stay exact to the relative accuracy)
+MAX_BUCKETS = 2048
+
+
+class QuantileSketch:
+    """DDSketch of non-negative values"""
+
+    __slots__ = ('relative_accuracy', 'gamma', '_log_gamma', 'buckets', 'zero_count', 'count', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, values: Iterable[float]) -> None:
+        """Count values (NaN, infinite and negative values are ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values) & (values >= 0)]
+        if not len(values):
+            return
+
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self.buckets[key] = self.buckets.get(key, 0) + count
+            self._collapse()
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """Add the values counted by another sketch of the same accuracy"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracies")
+        if not other.count:
+            return
+        self.count += other.count
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self._collapse()
+
+    def _collapse(self) -> None:
+        if len(self.buckets) <= MAX_BUCKETS:
+            return
+        keys = sorted(self.buckets)
+        excess = keys[:len(keys) - MAX_BUCKETS + 1]
+        self.buckets[excess[-1]] += sum(self.buckets.pop(key) for key in excess[:-1])
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """Values at the quantiles qs (each in [0, 1]); None for an empty sketch"""
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+
+        keys = sorted(self.buckets)
+        cumulative = np.cumsum([self.buckets[key] for key in keys]) + self.zero_count if keys else np.empty(0)
+        results = []
+        for q in qs:
+            rank = q * (self.count - 1)
+            if rank < self.zero_count:
+                results.append(0.0)
+                continue
+            position = int(np.searchsorted(cumulative, rank, side='right'))
+            if position >= len(keys):
+                results.append(self.max)
+                continue
+            # Midpoint of the bucket (in relative terms), clamped to the values seen
+            value = 2 * self.gamma ** keys[position] / (self.gamma + 1)
+            results.append(min(max(value, self.min), self.max))
+        return results
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.quantiles([q])[0]
+
+    @classmethod
+    def merged(cls, sketches: Iterable['QuantileSketch'], relative_accuracy: float = 0.01) -> 'QuantileSketch':
+        """New sketch of the union of several sketches"""
+        result = cls(relative_accuracy)
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
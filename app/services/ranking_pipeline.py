@@ -0,0 +1,295 @@
+"""
+Incremental ranking pipeline
+
+Builds the derived datasets the API serves from the raw Book1 answer rows:
+
+- per-category marketplace scores and ranks (EXCEL_FILE_1 / SCORES_CSV)
+- the products-without-Amazon citation table (EXCEL_FILE_3)
+
+Each category is processed independently and its artifacts are cached on disk,
+keyed by a hash of the category's input rows. A refresh only recomputes the
+categories whose rows changed since the artifacts were built.
+
+Usage:
+    python -m app.services.ranking_pipeline [--force] [--dry-run]
+"""
+import argparse
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger, log_excel_loading
+from app.services.scoring_engine import SCORE_COLUMNS, compute_scores, weights_signature
+
+logger = setup_logger(__name__)
+
+# Bump when the artifact layout changes so old cache entries are ignored
+PIPELINE_VERSION = "2"
+
+# Columns of Book1 that feed the derived datasets
+SOURCE_COLUMNS = ['Product', 'product_name', 'rank', 'source_normalized', 'Response']
+
+# Matches citations like "[1]: https://..." in the response markdown
+CITATION_PATTERN = re.compile(r'\[\d+\]:\s*https?://[^\s]+')
+
+
+def extract_citations(response_text) -> str:
+    """
+    Extract citations in the format [1]: https://...
+
+    Returns:
+        str: All citations separated by newlines (empty string if none)
+    """
+    if pd.isna(response_text):
+        return ""
+
+    citations = CITATION_PATTERN.findall(str(response_text))
+    return '\n'.join(citations)
+
+
+def load_source_rows(file_path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Load the raw answer rows from Book1
+
+    Args:
+        file_path: Workbook to read (default: settings.EXCEL_FILE_2)
+
+    Returns:
+        pd.DataFrame: Source rows with the columns in SOURCE_COLUMNS
+    """
+    file_path = file_path or settings.EXCEL_FILE_2
+
+    if not file_path.exists():
+        logger.error("Excel file not found: %s", file_path)
+        raise FileNotFoundError(f"Excel file not found: {file_path}")
+
+    df = pd.read_excel(file_path)
+
+    log_excel_loading(
+        file_path=file_path,
+        rows=len(df),
+        columns=len(df.columns),
+        sheet_name="Sheet1"
+    )
+
+    missing_columns = [col for col in SOURCE_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {missing_columns}")
+
+    return df[SOURCE_COLUMNS].reset_index(drop=True)
+
+
+def hash_categories(df: pd.DataFrame) -> Dict[str, str]:
+    """
+    Compute a content hash for every category
+
+    The hash covers the category's rows (in order), the pipeline version and the
+    scoring weights, so it changes whenever any input row of the category is added,
+    removed or edited, or the ranking formula changes.
+
+    Returns:
+        Dict[str, str]: {category: sha256 hex digest}
+    """
+    row_hashes = pd.util.hash_pandas_object(df[SOURCE_COLUMNS], index=False).to_numpy()
+    salt = f"{PIPELINE_VERSION}|{weights_signature()}".encode()
+
+    hashes = {}
+    for category, positions in df.groupby('Product', sort=False).indices.items():
+        digest = hashlib.sha256(salt)
+        digest.update(row_hashes[positions].tobytes())
+        hashes[category] = digest.hexdigest()
+
+    return hashes
+
+
+def collect_category_products(cat_rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summarize the products recommended in a single category
+
+    Returns:
+        pd.DataFrame: One row per product_name with its first row position in the
+        category, whether Amazon was recommended for it, and its extracted citations
+    """
+    first_rows = cat_rows.drop_duplicates('product_name', keep='first')
+    amazon_products = set(cat_rows.loc[cat_rows['source_normalized'] == 'amazon', 'product_name'])
+
+    return pd.DataFrame({
+        'Product': first_rows['Product'].to_numpy(),
+        'product_name': first_rows['product_name'].to_numpy(),
+        'position': np.flatnonzero(~cat_rows['product_name'].duplicated().to_numpy()),
+        'has_amazon': first_rows['product_name'].isin(amazon_products).to_numpy(),
+        'Citations': first_rows['Response'].map(extract_citations).to_numpy()
+    })
+
+
+def build_category_artifacts(cat_rows: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Build all cached artifacts for a single category"""
+    return {
+        'scores': compute_scores(cat_rows),
+        'products': collect_category_products(cat_rows)
+    }
+
+
+def assemble_scores(artifacts: Dict[str, Dict[str, pd.DataFrame]]) -> pd.DataFrame:
+    """Combine per-category scores into the ranked scores table"""
+    frames = [artifacts[category]['scores'] for category in sorted(artifacts)]
+    if not frames:
+        return pd.DataFrame(columns=SCORE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def assemble_no_amazon(artifacts: Dict[str, Dict[str, pd.DataFrame]],
+                       category_positions: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Combine per-category product summaries into the products-without-Amazon table
+
+    A product counts as covered by Amazon if Amazon was recommended for it in any
+    category. Products listed under several categories keep the category of their
+    first row in the source workbook.
+    """
+    frames = []
+    for category, cat_artifacts in artifacts.items():
+        products = cat_artifacts['products'].copy()
+        products['position'] = category_positions[category][products['position'].to_numpy()]
+        frames.append(products)
+
+    if not frames:
+        return pd.DataFrame(columns=['Product Category', 'Product Name', 'Citations'])
+
+    products = pd.concat(frames, ignore_index=True)
+    amazon_products = set(products.loc[products['has_amazon'], 'product_name'])
+
+    output_df = (
+        products[~products['product_name'].isin(amazon_products)]
+        .sort_values('position')
+        .drop_duplicates('product_name', keep='first')
+    )
+    output_df = output_df[['Product', 'product_name', 'Citations']]
+    output_df.columns = ['Product Category', 'Product Name', 'Citations']
+
+    return output_df.sort_values(by=['Product Category', 'Product Name']).reset_index(drop=True)
+
+
+def _artifact_path(cache_dir: Path, content_hash: str) -> Path:
+    return cache_dir / f"{content_hash}.pkl"
+
+
+def _write_atomic(frame: pd.DataFrame, target: Path) -> None:
+    """Write a frame next to its target and swap it in, so readers never see a partial file"""
+    tmp_path = target.with_name(f".tmp-{target.name}")
+    if target.suffix == '.csv':
+        frame.to_csv(tmp_path, index=False)
+    else:
+        frame.to_excel(tmp_path, index=False)
+    tmp_path.replace(target)
+
+
+def run_pipeline(source_path: Optional[Path] = None,
+                 force: bool = False,
+                 write_outputs: bool = True) -> Dict:
+    """
+    Run the incremental ranking pipeline
+
+    Args:
+        source_path: Raw answer workbook (default: settings.EXCEL_FILE_2)
+        force: Ignore cached artifacts and recompute every category
+        write_outputs: Write the derived files to the data directory
+
+    Returns:
+        Dict with run summary:
+        {
+            'categories': int,
+            'recomputed_categories': List[str],
+            'removed_categories': List[str],
+            'outputs_written': bool,
+            'duration_seconds': float
+        }
+    """
+    try:
+        started = time.perf_counter()
+        logger.info("🔄 Running ranking pipeline...")
+
+        cache_dir = settings.PIPELINE_CACHE_DIR
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = cache_dir / "manifest.json"
+        previous = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+        df = load_source_rows(source_path)
+        hashes = hash_categories(df)
+        category_positions = df.groupby('Product', sort=False).indices
+
+        artifacts = {}
+        recomputed: List[str] = []
+        for category, content_hash in hashes.items():
+            path = _artifact_path(cache_dir, content_hash)
+            if path.exists() and not force:
+                artifacts[category] = pd.read_pickle(path)
+                continue
+
+            cat_rows = df.iloc[category_positions[category]].reset_index(drop=True)
+            artifacts[category] = build_category_artifacts(cat_rows)
+            pd.to_pickle(artifacts[category], path)
+            recomputed.append(category)
+
+        removed = sorted(set(previous) - set(hashes))
+        changed = bool(recomputed) or bool(removed) or hashes != previous
+
+        outputs = [settings.EXCEL_FILE_1, settings.SCORES_CSV, settings.EXCEL_FILE_3]
+        outputs_written = False
+        if write_outputs and (changed or force or not all(path.exists() for path in outputs)):
+            scores = assemble_scores(artifacts)
+            no_amazon = assemble_no_amazon(artifacts, category_positions)
+
+            _write_atomic(scores, settings.EXCEL_FILE_1)
+            _write_atomic(scores, settings.SCORES_CSV)
+            _write_atomic(no_amazon, settings.EXCEL_FILE_3)
+            outputs_written = True
+            logger.info("💾 Wrote %s score rows and %s no-Amazon products", len(scores), len(no_amazon))
+
+        # Drop artifacts no category points at any more
+        live_files = {_artifact_path(cache_dir, content_hash).name for content_hash in hashes.values()}
+        for path in cache_dir.glob("*.pkl"):
+            if path.name not in live_files:
+                path.unlink()
+
+        manifest_path.write_text(json.dumps(hashes, indent=2, sort_keys=True))
+
+        summary = {
+            'categories': len(hashes),
+            'recomputed_categories': recomputed,
+            'removed_categories': removed,
+            'outputs_written': outputs_written,
+            'duration_seconds': round(time.perf_counter() - started, 3)
+        }
+
+        logger.info(
+            "✅ Pipeline finished in %ss: %s/%s categories recomputed, %s removed",
+            summary['duration_seconds'], len(recomputed), len(hashes), len(removed)
+        )
+        return summary
+
+    except Exception as e:
+        logger.error("❌ Error running ranking pipeline: %s", e)
+        raise
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild ranking and no-Amazon datasets from Book1")
+    parser.add_argument("--source", type=Path, default=None, help="Raw answer workbook (default: Book1.xlsx)")
+    parser.add_argument("--force", action="store_true", help="Ignore cached artifacts and recompute everything")
+    parser.add_argument("--dry-run", action="store_true", help="Refresh the cache without writing output files")
+    args = parser.parse_args(argv)
+
+    summary = run_pipeline(source_path=args.source, force=args.force, write_outputs=not args.dry_run)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Vectorized score engine
+
+Derives score_sum, score_norm and rank for every (category, marketplace) pair
+directly from the raw Book1 answer rows, in one grouped pass:
+
+- each recommendation earns the points of its answer position
+- score_sum is the total points of a marketplace within a category
+- score_norm is score_sum divided by the category's total points
+- rank orders marketplaces within a category by score_norm desc, score_sum desc,
+  source_normalized asc
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+SCORE_COLUMNS = ['Product', 'source_normalized', 'score_sum', 'score_norm', 'rank']
+
+
+def get_position_weights(max_rank: int, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    Build the points lookup table for answer positions
+
+    Args:
+        max_rank: Highest answer position that needs a weight
+        weights: Points for positions 1..n (default: settings)
+
+    Returns:
+        np.ndarray: Array where index r holds the points for position r (index 0 unused)
+    """
+    if weights is None:
+        weights = settings.SCORE_POSITION_WEIGHTS
+
+    if weights:
+        table = np.zeros(max(max_rank, len(weights)) + 1, dtype=np.float64)
+        table[1:len(weights) + 1] = weights
+    else:
+        positions = np.arange(max_rank + 1, dtype=np.float64)
+        table = settings.SCORE_TOP_POINTS - settings.SCORE_POSITION_STEP * (positions - 1)
+        table = np.clip(table, 0, None)
+
+    table[0] = 0
+    return table
+
+
+def weights_signature(weights: Optional[Sequence[float]] = None) -> str:
+    """Describe the active scoring weights, for cache keys"""
+    if weights is None:
+        weights = settings.SCORE_POSITION_WEIGHTS
+    if weights:
+        return "weights:" + ",".join(f"{w:g}" for w in weights)
+    return f"linear:{settings.SCORE_TOP_POINTS:g}:{settings.SCORE_POSITION_STEP:g}"
+
+
+def compute_scores(df: pd.DataFrame, weights: Optional[Sequence[float]] = None) -> pd.DataFrame:
+    """
+    Compute marketplace scores and ranks from raw answer rows
+
+    Args:
+        df: Answer rows with 'Product', 'source_normalized' and 'rank' columns
+        weights: Points for positions 1..n (default: settings)
+
+    Returns:
+        pd.DataFrame: Product, source_normalized, score_sum, score_norm, rank,
+        sorted by Product and rank
+    """
+    rows = df[df['source_normalized'].notna() & df['Product'].notna()]
+    if rows.empty:
+        return pd.DataFrame(columns=SCORE_COLUMNS)
+
+    # Sorted factorization makes the codes follow the string order used for tie-breaks
+    product_codes, products = pd.factorize(rows['Product'], sort=True)
+    source_codes, sources = pd.factorize(rows['source_normalized'], sort=True)
+
+    positions = rows['rank'].to_numpy(dtype=np.int64)
+    points_table = get_position_weights(int(positions.max()) if len(positions) else 0, weights)
+    points = points_table[np.clip(positions, 0, None)]
+
+    # One grouped pass: sum points per (category, marketplace) pair
+    pair_keys = product_codes.astype(np.int64) * len(sources) + source_codes
+    pair_ids, pair_index = np.unique(pair_keys, return_inverse=True)
+    score_sum = np.bincount(pair_index, weights=points)
+
+    pair_products = pair_ids // len(sources)
+    pair_sources = pair_ids % len(sources)
+
+    category_totals = np.bincount(pair_products, weights=score_sum, minlength=len(products))
+    pair_totals = category_totals[pair_products]
+    score_norm = np.divide(score_sum, pair_totals, out=np.zeros_like(score_sum), where=pair_totals > 0)
+
+    # np.lexsort treats the last key as primary
+    order = np.lexsort((pair_sources, -score_sum, -score_norm, pair_products))
+    sorted_products = pair_products[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_products[1:] != sorted_products[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(order)])
+    ranks = np.arange(len(order)) - np.repeat(group_starts, group_sizes) + 1
+
+    if np.all(np.mod(points_table, 1) == 0):
+        score_sum = score_sum.astype(np.int64)
+
+    return pd.DataFrame({
+        'Product': products.to_numpy()[sorted_products],
+        'source_normalized': sources.to_numpy()[pair_sources[order]],
+        'score_sum': score_sum[order],
+        'score_norm': score_norm[order],
+        'rank': ranks.astype(np.int64)
+    })
@@ -0,0 +1,290 @@
+"""
+Memory-mapped dataset frames shared between worker processes
+
+The first worker to load a dataset writes the frame once as a directory of
+columns; every worker (including that one) then attaches to it instead of
+holding its own copy:
+
+    array       Numeric, boolean and datetime columns: a .npy file, memory-mapped
+                read-only and wrapped by the frame without copying
+    dictionary  String columns: int32 codes (.npy, memory-mapped) plus the unique
+                values in a text store; each worker only builds the unique strings
+    pickle      Anything else (mixed types, extension dtypes): read per worker
+
+Mapped pages live in the page cache once, however many workers attach, so
+resident memory stays roughly flat as the worker count grows; per worker only
+the dictionary strings and one object pointer per row of each string column
+are private. Frames are read-only: writing into a mapped column raises.
+
+Layout of SHARED_DATASET_DIR:
+    <name>.lock          Serializes building, attaching and removal per dataset
+    <name>-<key>/        One generation of a dataset, keyed by its source files
+        manifest.json    Row count and the name and kind of every column
+        <i>.npy | <i>/ | <i>.pkl
+        leases/<pid>     One per process attached to this generation
+
+A new generation is published by building it under a temporary name and
+renaming it into place. Each worker moves its lease over when it notices the
+source change, and the old directory is removed once no live process holds a
+lease on it. Open memory maps survive the removal, so requests still reading
+the old frame are unaffected.
+"""
+import atexit
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+from app.services.scoring_engine import weights_signature
+from app.services.text_store import TextStore, write_text_values
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = setup_logger(__name__)
+
+# Bump when the on-disk layout changes so older directories are never attached
+SHARED_FORMAT_VERSION = 1
+
+# Generation directory attached by this process, per dataset name
+_attached: Dict[str, Path] = {}
+
+
+def sharing_enabled() -> bool:
+    return settings.SHARED_DATASETS and fcntl is not None
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_]+", "_", name)
+
+
+def shared_frame_path(name: str, source_signature) -> Path:
+    """
+    Directory of a dataset built from a given version of its source files
+
+    The key also covers the scoring weights, which decide how the live rankings
+    are derived, but no deployment settings, so snapshots built into an image
+    (app.services.snapshot) are attached wherever the image runs.
+    """
+    key = f"{SHARED_FORMAT_VERSION};{source_signature!r};{weights_signature()}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return settings.SHARED_DATASET_DIR / f"{_slug(name)}-{digest}"
+
+
+@contextmanager
+def _dataset_lock(name: str) -> Iterator[None]:
+    """Exclusive lock on a dataset's shared directories, across processes and threads"""
+    try:
+        settings.SHARED_DATASET_DIR.mkdir(parents=True, exist_ok=True)
+        lock_file = open(settings.SHARED_DATASET_DIR / f"{_slug(name)}.lock", 'a')
+    except OSError:
+        # Read-only data directory (e.g. a baked image): nothing can be built or removed
+        yield
+        return
+
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _is_shareable(frame) -> bool:
+    return (
+        isinstance(frame, pd.DataFrame)
+        and isinstance(frame.index, pd.RangeIndex)
+        and frame.index.start == 0
+        and frame.index.step == 1
+        and frame.columns.is_unique
+        and all(isinstance(column, str) for column in frame.columns)
+        and not frame.attrs
+    )
+
+
+def _write_column(series: pd.Series, directory: Path, position: int) -> str:
+    """Write one column and return its kind"""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+        np.save(directory / f"{position}.npy", series.to_numpy())
+        return 'array'
+
+    if dtype == object:
+        codes, uniques = pd.factorize(series)
+        missing = series.to_numpy()[codes < 0]
+        if (all(isinstance(value, str) for value in uniques)
+                and all(isinstance(value, float) and np.isnan(value) for value in missing)):
+            np.save(directory / f"{position}.npy", codes.astype(np.int32))
+            write_text_values(directory / str(position), uniques)
+            return 'dictionary'
+
+    series.to_pickle(directory / f"{position}.pkl")
+    return 'pickle'
+
+
+def _write_frame(frame: pd.DataFrame, directory: Path) -> None:
+    """Build a generation directory under a temporary name and rename it into place"""
+    tmp_dir = directory.with_name(f".tmp-{uuid.uuid4().hex}")
+    try:
+        (tmp_dir / "leases").mkdir(parents=True)
+        columns = [
+            {'name': column, 'kind': _write_column(series, tmp_dir, position)}
+            for position, (column, series) in enumerate(frame.items())
+        ]
+        manifest = {'format': SHARED_FORMAT_VERSION, 'rows': len(frame), 'columns': columns}
+        (tmp_dir / "manifest.json").write_text(json.dumps(manifest))
+        tmp_dir.rename(directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def _read_column(directory: Path, position: int, kind: str):
+    if kind == 'array':
+        # A plain ndarray view of the map, so derived arrays are not memmaps too
+        return np.load(directory / f"{position}.npy", mmap_mode='r').view(np.ndarray)
+    if kind == 'dictionary':
+        codes = np.load(directory / f"{position}.npy", mmap_mode='r')
+        store = TextStore(directory / str(position))
+        # Code -1 (missing) picks the trailing NaN
+        uniques = np.array(store.decode(range(len(store))) + [np.nan], dtype=object)
+        return uniques[codes]
+    return pd.read_pickle(directory / f"{position}.pkl")
+
+
+def _read_frame(directory: Path) -> pd.DataFrame:
+    manifest = json.loads((directory / "manifest.json").read_text())
+    columns = {
+        column['name']: _read_column(directory, position, column['kind'])
+        for position, column in enumerate(manifest['columns'])
+    }
+    # copy=False keeps the mapped arrays as the frame's blocks
+    return pd.DataFrame(columns, index=pd.RangeIndex(manifest['rows']), copy=False)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _live_leases(directory: Path) -> List[int]:
+    pids = []
+    for lease in (directory / "leases").glob("*"):
+        if lease.name.isdigit() and _pid_alive(int(lease.name)):
+            pids.append(int(lease.name))
+        else:
+            try:
+                lease.unlink(missing_ok=True)
+            except OSError:
+                pass
+    return pids
+
+
+def _collect_garbage(name: str) -> None:
+    """Remove generations of a dataset no live process is attached to (lock held)"""
+    for directory in settings.SHARED_DATASET_DIR.glob(f"{_slug(name)}-*"):
+        if directory.is_dir() and directory != _attached.get(name) and not _live_leases(directory):
+            shutil.rmtree(directory, ignore_errors=True)
+            logger.info("🧹 Removed shared dataset generation %s", directory.name)
+
+
+def _lease(directory: Path) -> None:
+    try:
+        (directory / "leases" / str(os.getpid())).touch()
+    except OSError:
+        # Read-only snapshot: it can never be removed, so it needs no lease
+        pass
+
+
+def _release(directory: Path) -> None:
+    try:
+        (directory / "leases" / str(os.getpid())).unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _attach(name: str, directory: Path) -> Optional[pd.DataFrame]:
+    """Lease and open a generation directory if it exists (lock held)"""
+    if not (directory / "manifest.json").exists():
+        return None
+
+    _lease(directory)
+    previous = _attached.get(name)
+    _attached[name] = directory
+    if previous != directory:
+        if previous is not None:
+            _release(previous)
+        _collect_garbage(name)
+    return _read_frame(directory)
+
+
+def load_shared(name: str, source_signature, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Attach to the shared copy of a dataset, building it with loader if no worker has yet
+
+    Workers asking for the same dataset wait while one of them builds it, so the
+    source files are read once. Frames that cannot be shared (non-frames such as
+    text stores, or frames with a custom index) are returned as loaded.
+    """
+    directory = shared_frame_path(name, source_signature)
+    with _dataset_lock(name):
+        frame = _attach(name, directory)
+        if frame is not None:
+            return frame
+        return _share_locked(name, directory, loader())
+
+
+def share(name: str, source_signature, frame: pd.DataFrame) -> pd.DataFrame:
+    """Publish an already built frame and return the attached shared copy"""
+    directory = shared_frame_path(name, source_signature)
+    with _dataset_lock(name):
+        attached = _attach(name, directory)
+        if attached is not None:
+            return attached
+        return _share_locked(name, directory, frame)
+
+
+def _share_locked(name: str, directory: Path, frame):
+    if not _is_shareable(frame):
+        return frame
+    try:
+        _write_frame(frame, directory)
+    except OSError as e:
+        logger.warning("⚠️ Could not share dataset %s, keeping a private copy: %s", name, e)
+        return frame
+    logger.info("🔗 Shared dataset %s as %s", name, directory.name)
+    return _attach(name, directory)
+
+
+def release_all() -> None:
+    """Drop this process's leases (e.g. in a parent process once its workers have attached)"""
+    for name, directory in list(_attached.items()):
+        _release(directory)
+        del _attached[name]
+
+
+def _lease_in_child() -> None:
+    # Forked workers inherit the parent's mapped frames; lease them under the child's own pid
+    for directory in _attached.values():
+        _lease(directory)
+
+
+atexit.register(release_all)
+os.register_at_fork(after_in_child=_lease_in_child)
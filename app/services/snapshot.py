@@ -0,0 +1,143 @@
+"""
+Build-time dataset snapshot
+
+Compiles the workbooks in app/data ahead of time, so a fresh container serves
+its first requests without parsing any XLSX:
+
+- every dataset is loaded once and written as a memory-mapped columnar snapshot
+  (see shared_frames), together with the Book1 text stores
+- the parameterless dashboard endpoints are rendered into pre-rendered payloads
+  (see app.core.prerendered)
+
+At startup the workers attach to the snapshots instead of reading the workbooks,
+and answer the static dashboard requests from the payload files. Both are keyed
+by the source files, so an upload or a changed file simply bypasses them.
+
+The Dockerfile runs this after copying the application. It can also be run by
+hand after replacing the data files.
+
+Usage:
+    python -m app.services.snapshot [--no-payloads]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+from app.core.logger import setup_logger, stop_logging
+
+logger = setup_logger(__name__)
+
+# Routers whose parameterless endpoints are pre-rendered
+PRERENDERED_PREFIXES = ('/analytics/', '/insights/', '/additional/')
+
+
+def static_paths(app: FastAPI) -> List[str]:
+    """JSON GET endpoints that take no path parameters and no required query parameters"""
+    paths = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute) or 'GET' not in route.methods:
+            continue
+        response_class = route.response_class
+        if isinstance(response_class, DefaultPlaceholder):
+            response_class = response_class.value
+        if not issubclass(response_class, JSONResponse):
+            continue
+        if not route.path.startswith(PRERENDERED_PREFIXES) or route.dependant.path_params:
+            continue
+        if any(param.field_info.is_required() for param in route.dependant.query_params):
+            continue
+        paths.append(route.path)
+    return paths
+
+
+async def render(app: FastAPI, path: str) -> Optional[bytes]:
+    """Body of a GET request to path, if it returned JSON with status 200"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'root_path': '',
+        'query_string': b'',
+        'headers': [(b'host', b'snapshot')],
+        'client': ('snapshot', 0),
+        'server': ('snapshot', 80)
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+
+    start = messages[0]
+    headers = dict(start.get('headers', []))
+    if start['status'] != 200 or headers.get(b'content-type') != b'application/json':
+        return None
+    return b''.join(message.get('body', b'') for message in messages[1:])
+
+
+def render_payloads(app: FastAPI) -> Dict[str, bytes]:
+    """Render every static endpoint"""
+    async def render_all():
+        payloads = {}
+        for path in static_paths(app):
+            body = await render(app, path)
+            if body is None:
+                logger.warning("⚠️ Not pre-rendering %s: it did not return JSON with status 200", path)
+            else:
+                payloads[path] = body
+        return payloads
+
+    return asyncio.run(render_all())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile the data files into snapshots and pre-rendered payloads")
+    parser.add_argument("--no-payloads", action="store_true", help="Only build the dataset snapshots")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    settings.SHARED_DATASETS = True
+    # Render with the live endpoints, not with payloads from an earlier build
+    settings.PRERENDERED_PAYLOADS = False
+
+    from app.core.prerendered import payload_key, write_payloads
+    from app.services.preload import preload, preload_steps
+
+    timings = preload()
+    failed = [name for name, _ in preload_steps() if name not in timings]
+    if failed:
+        logger.error("❌ Could not snapshot %s", ', '.join(failed))
+        stop_logging()
+        sys.exit(1)
+
+    if not args.no_payloads:
+        from main import app
+        payloads = render_payloads(app)
+        directory = write_payloads(payload_key(), payloads)
+        logger.info(
+            "🖼️ Pre-rendered %s payloads (%s bytes) into %s",
+            len(payloads), format(sum(len(body) for body in payloads.values()), ','), directory.name
+        )
+
+    logger.info("✅ Snapshot built in %.2fs", time.perf_counter() - started)
+    stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Deduplicated, memory-mapped text storage
+
+Long text columns (the Book1 `Response` markdown repeats for every recommended
+listing of a product) are stored once per unique value in a blob file with an
+offsets array. Rows keep an integer text id and decode the text only when it is
+read, so resident memory scales with the unique text, and the mapped pages are
+shared by every process that opens the same store.
+
+Layout of a store directory:
+    blob.bin     UTF-8 bytes of every unique value, back to back
+    offsets.npy  uint64 array; value i spans blob[offsets[i]:offsets[i + 1]]
+"""
+import hashlib
+import mmap
+import shutil
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Text id stored for missing values
+MISSING_TEXT_ID = -1
+
+
+class TextStore:
+    """Read-only view over a memory-mapped text store"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._offsets = np.load(directory / "offsets.npy", mmap_mode='r')
+        blob_path = directory / "blob.bin"
+        if blob_path.stat().st_size > 0:
+            with open(blob_path, 'rb') as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._blob = b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the stored unique text in bytes"""
+        return int(self._offsets[-1]) if len(self._offsets) else 0
+
+    def get(self, text_id: int) -> Optional[str]:
+        """Decode a single value (None for missing values)"""
+        if text_id < 0:
+            return None
+        start, end = int(self._offsets[text_id]), int(self._offsets[text_id + 1])
+        return self._blob[start:end].decode('utf-8')
+
+    def decode(self, text_ids: Iterable[int]) -> List[Optional[str]]:
+        """Decode several values"""
+        return [self.get(int(text_id)) for text_id in text_ids]
+
+
+class TextStoreBuilder:
+    """
+    Incrementally builds a text store
+
+    Each distinct value is appended to the blob once; repeats only look up the id
+    of the first occurrence by digest, so the builder never holds the text itself.
+    """
+
+    def __init__(self):
+        settings.TEXT_STORE_DIR.mkdir(parents=True, exist_ok=True)
+        self._tmp_dir = settings.TEXT_STORE_DIR / f".tmp-{uuid.uuid4().hex}"
+        self._tmp_dir.mkdir()
+        self._blob = open(self._tmp_dir / "blob.bin", 'wb')
+        self._ids = {}
+        self._offsets = [0]
+
+    def add(self, value) -> int:
+        """Store a value (if new) and return its text id"""
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return MISSING_TEXT_ID
+
+        data = str(value).encode('utf-8')
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        text_id = self._ids.get(key)
+        if text_id is None:
+            text_id = len(self._offsets) - 1
+            self._ids[key] = text_id
+            self._blob.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+        return text_id
+
+    def add_series(self, values: pd.Series) -> np.ndarray:
+        """Store a column of values and return their text ids"""
+        codes, uniques = pd.factorize(values)
+        unique_ids = np.array([self.add(value) for value in uniques] + [MISSING_TEXT_ID], dtype=np.int32)
+        # Missing values have code -1, which picks the trailing MISSING_TEXT_ID
+        return unique_ids[codes]
+
+    def finish(self, directory: Path) -> TextStore:
+        """Write the offsets, move the store into place and open it"""
+        self._blob.close()
+        np.save(self._tmp_dir / "offsets.npy", np.asarray(self._offsets, dtype=np.uint64))
+
+        try:
+            self._tmp_dir.rename(directory)
+        except OSError:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            # Same source already built (e.g. by another worker): the content is identical
+            if not (directory / "offsets.npy").exists():
+                raise
+
+        store = TextStore(directory)
+        logger.info("🗜️ Text store %s: %s unique values, %s bytes", directory.name, format(len(store), ','), format(store.nbytes, ','))
+        return store
+
+    def abort(self) -> None:
+        """Discard a partially built store"""
+        self._blob.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+def write_text_values(directory: Path, values: Iterable[str]) -> None:
+    """Write a store holding exactly the given values in order (value i gets text id i)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    offsets = [0]
+    with open(directory / "blob.bin", 'wb') as blob:
+        for value in values:
+            data = value.encode('utf-8')
+            blob.write(data)
+            offsets.append(offsets[-1] + len(data))
+    np.save(directory / "offsets.npy", np.asarray(offsets, dtype=np.uint64))
+
+
+def text_store_path(name: str, source_signature) -> Path:
+    """Directory of the text store for a column of a given source file version"""
+    digest = hashlib.sha1(repr(source_signature).encode()).hexdigest()[:16]
+    return settings.TEXT_STORE_DIR / f"{name}-{digest}"
+
+
+def remove_stale_stores(name: str, keep: Path) -> None:
+    """
+    Delete older stores of a column
+
+    Open memory maps keep working after their files are unlinked, so requests
+    still reading an older generation are not affected.
+    """
+    for path in settings.TEXT_STORE_DIR.glob(f"{name}-*"):
+        if path != keep and path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def intern_text_columns(chunk: pd.DataFrame, text_columns: Dict[str, str],
+                        builders: Dict[str, TextStoreBuilder]) -> pd.DataFrame:
+    """
+    Replace text columns of a chunk with text id columns
+
+    Args:
+        chunk: Parsed rows
+        text_columns: {text column: id column that replaces it}
+        builders: {text column: builder receiving its values}
+
+    Returns:
+        pd.DataFrame: The chunk with each text column swapped for its id column in place
+    """
+    for column, id_column in text_columns.items():
+        if column not in chunk.columns:
+            continue
+        position = chunk.columns.get_loc(column)
+        text_ids = builders[column].add_series(chunk[column])
+        chunk = chunk.drop(columns=[column])
+        chunk.insert(position, id_column, text_ids)
+    return chunk
+
+
+def finish_text_stores(builders: Dict[str, TextStoreBuilder], source_signature) -> Dict[str, TextStore]:
+    """Move built stores into place for a source file version and drop older ones"""
+    stores = {}
+    for column, builder in builders.items():
+        directory = text_store_path(column, source_signature)
+        stores[column] = builder.finish(directory)
+        remove_stale_stores(column, keep=directory)
+    return stores
@@ -0,0 +1,71 @@
+"""
+Chunked workbook and CSV readers
+
+Rows are streamed in fixed-size DataFrame chunks (openpyxl read-only mode for
+.xlsx, chunked read_csv for .csv) so a large file never has to be held as a
+whole workbook in memory.
+"""
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from app.core.config import settings
+
+
+def iter_xlsx_chunks(file_path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Stream the first worksheet of a workbook as DataFrame chunks"""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        while header and header[-1] is None:
+            header = header[:-1]
+        columns = [str(col) for col in header]
+        width = len(columns)
+
+        buffer = []
+        yielded = False
+        for row in rows:
+            row = row[:width]
+            if all(value is None for value in row):
+                continue
+            buffer.append(row + (None,) * (width - len(row)))
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                yielded = True
+                buffer = []
+
+        # An empty sheet still yields its header so the columns get validated
+        if buffer or not yielded:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(file_path: Path, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Stream a CSV file as DataFrame chunks"""
+    with pd.read_csv(file_path, chunksize=chunk_rows, encoding='utf-8-sig') as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def iter_chunks(file_path: Path, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """Stream a workbook or CSV file as DataFrame chunks"""
+    chunk_rows = chunk_rows or settings.UPLOAD_CHUNK_ROWS
+    if file_path.suffix.lower() == '.csv':
+        return iter_csv_chunks(file_path, chunk_rows)
+    return iter_xlsx_chunks(file_path, chunk_rows)
+
+
+def combine_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks into a frame that matches what read_excel would return"""
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+    # Missing cells are NaN and columns get their natural dtypes
+    return df.replace({None: np.nan}).infer_objects()
@@ -0,0 +1,215 @@
+"""
+Differential equivalence harness
+
+Runs each legacy analytics loop and its optimized replacement side by side on
+the bundled workbooks and on synthetic datasets, diffs the outputs and prints a
+speedup table. Outputs must match in structure, key order, list order and value
+type; floats may differ by the given tolerance. Exits 1 on any mismatch, so an
+optimized engine only ships (behind settings.ANALYTICS_ENGINE) with a passing run.
+
+Usage:
+    python -m benchmarks.equivalence                       # bundled data + scales 1 and 10
+    python -m benchmarks.equivalence --scales 1 10 100 --rel-tol 0 --abs-tol 0
+    python -m benchmarks.equivalence --no-real --output equivalence.json
+"""
+import argparse
+import json
+import logging
+import math
+import numbers
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.services import additional_service, analytics, analytics_engine, insights_service
+from app.services.marketplace_matrix import build_marketplace_matrix
+from benchmarks.synthetic import generate_datasets
+
+# Mismatches listed per function before the rest are summarized
+MAX_REPORTED_DIFFS = 10
+
+
+@dataclass(frozen=True)
+class EnginePair:
+    """A legacy implementation and its optimized replacement, both taking the dataset frames"""
+    name: str
+    legacy: Callable[[Dict[str, pd.DataFrame]], Any]
+    optimized: Callable[[Dict[str, pd.DataFrame]], Any]
+
+
+ENGINE_PAIRS: List[EnginePair] = [
+    EnginePair(
+        'get_marketplace_rankings',
+        lambda frames: analytics._marketplace_rankings_legacy(frames['rankings'], 5),
+        lambda frames: analytics_engine.marketplace_rankings(frames['rankings'], 5)
+    ),
+    EnginePair(
+        'get_marketplace_rankings(top_n=10)',
+        lambda frames: analytics._marketplace_rankings_legacy(frames['rankings'], 10),
+        lambda frames: analytics_engine.marketplace_rankings(frames['rankings'], 10)
+    ),
+    EnginePair(
+        'categorize_by_priority',
+        lambda frames: insights_service._categorize_by_priority_legacy(frames['rankings']),
+        lambda frames: analytics_engine.priority_categories(build_marketplace_matrix(frames['rankings']))
+    ),
+    EnginePair(
+        'calculate_niche_opportunities',
+        lambda frames: additional_service._niche_opportunities_legacy(frames['rankings'], frames['no_rank']),
+        lambda frames: analytics_engine.niche_opportunities(
+            frames['rankings'], frames['no_rank'], build_marketplace_matrix(frames['rankings'])
+        )
+    )
+]
+
+
+def _kind(value: Any) -> str:
+    """Value kind as it appears in a JSON response"""
+    if value is None:
+        return 'null'
+    if isinstance(value, (bool, np.bool_)):
+        return 'bool'
+    if isinstance(value, numbers.Integral):
+        return 'int'
+    if isinstance(value, numbers.Real):
+        return 'float'
+    if isinstance(value, str):
+        return 'str'
+    if isinstance(value, dict):
+        return 'dict'
+    if isinstance(value, (list, tuple)):
+        return 'list'
+    return type(value).__name__
+
+
+def diff(expected: Any, actual: Any, rel_tol: float, abs_tol: float, path: str = '$') -> List[str]:
+    """
+    Differences between two outputs
+
+    Dict keys must appear in the same order, lists must have the same order, and
+    every value must have the same JSON kind (int vs float included). Floats are
+    equal within rel_tol/abs_tol, and NaN equals NaN.
+    """
+    expected_kind, actual_kind = _kind(expected), _kind(actual)
+    if expected_kind != actual_kind:
+        return [f"{path}: {expected_kind} {expected!r} != {actual_kind} {actual!r}"]
+
+    if expected_kind == 'dict':
+        if list(expected) != list(actual):
+            missing = [key for key in expected if key not in actual]
+            extra = [key for key in actual if key not in expected]
+            if missing or extra:
+                return [f"{path}: missing keys {missing[:5]}, unexpected keys {extra[:5]}"]
+            return [f"{path}: key order differs"]
+        return [
+            difference
+            for key in expected
+            for difference in diff(expected[key], actual[key], rel_tol, abs_tol, f"{path}[{key!r}]")
+        ]
+
+    if expected_kind == 'list':
+        if len(expected) != len(actual):
+            return [f"{path}: length {len(expected)} != {len(actual)}"]
+        return [
+            difference
+            for i, (left, right) in enumerate(zip(expected, actual))
+            for difference in diff(left, right, rel_tol, abs_tol, f"{path}[{i}]")
+        ]
+
+    if expected_kind == 'float':
+        if math.isnan(expected) and math.isnan(actual):
+            return []
+        if math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol):
+            return []
+        return [f"{path}: {expected!r} != {actual!r}"]
+
+    return [] if expected == actual else [f"{path}: {expected!r} != {actual!r}"]
+
+
+def best_time(call: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def check_dataset(label: str, frames: Dict[str, pd.DataFrame], repeat: int, rel_tol: float, abs_tol: float) -> List[Dict]:
+    """Compare every engine pair on one set of frames"""
+    results = []
+    for pair in ENGINE_PAIRS:
+        differences = diff(pair.legacy(frames), pair.optimized(frames), rel_tol, abs_tol)
+        legacy_seconds = best_time(lambda: pair.legacy(frames), repeat)
+        optimized_seconds = best_time(lambda: pair.optimized(frames), repeat)
+        results.append({
+            'function': pair.name,
+            'dataset': label,
+            'equivalent': not differences,
+            'differences': differences[:MAX_REPORTED_DIFFS],
+            'difference_count': len(differences),
+            'legacy_seconds': legacy_seconds,
+            'optimized_seconds': optimized_seconds,
+            'speedup': legacy_seconds / optimized_seconds if optimized_seconds else None
+        })
+    return results
+
+
+def print_table(results: List[Dict]) -> None:
+    header = f"{'function':<38} {'dataset':<10} {'legacy ms':>11} {'optimized ms':>13} {'speedup':>9}  result"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for result in results:
+        print(
+            f"{result['function']:<38} {result['dataset']:<10} {result['legacy_seconds'] * 1000:>11.2f} "
+            f"{result['optimized_seconds'] * 1000:>13.2f} {result['speedup']:>8.1f}x  "
+            + ("equal" if result['equivalent'] else f"{result['difference_count']} DIFFERENCES"),
+            file=sys.stderr
+        )
+        for difference in result['differences']:
+            print(f"    {difference}", file=sys.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Check optimized analytics engines against the legacy loops")
+    parser.add_argument('--scales', type=int, nargs='*', default=[1, 10], help="Synthetic dataset scales to check")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help="Synthetic data seeds")
+    parser.add_argument('--no-real', action='store_true', help="Skip the bundled workbooks")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per implementation (best is reported)")
+    parser.add_argument('--rel-tol', type=float, default=1e-9, help="Relative tolerance for float values")
+    parser.add_argument('--abs-tol', type=float, default=1e-12, help="Absolute tolerance for float values")
+    parser.add_argument('--output', type=Path, help="Write the JSON results here")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    results = []
+    if not args.no_real:
+        frames = {
+            'rankings': analytics.load_ranking_data(),
+            'no_rank': insights_service.load_no_rank_data()
+        }
+        results.extend(check_dataset('bundled', frames, args.repeat, args.rel_tol, args.abs_tol))
+
+    for scale in args.scales:
+        for seed in args.seeds:
+            frames = generate_datasets(scale, seed)
+            label = f"{scale}x" if len(args.seeds) == 1 else f"{scale}x/s{seed}"
+            results.extend(check_dataset(label, frames, args.repeat, args.rel_tol, args.abs_tol))
+
+    print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if not all(result['equivalent'] for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
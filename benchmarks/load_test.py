@@ -0,0 +1,222 @@
+"""
+In-process load test
+
+Drives main:app through httpx's ASGI transport (no network, no server process)
+with a fixed number of concurrent virtual users, and reports throughput and
+latency percentiles per route template. Running two versions of the code on the
+same machine with the same arguments gives directly comparable numbers.
+
+Endpoint mixes model the dashboard's traffic:
+    preload     Opening the dashboard: the ranking table, statistics and the
+                all-insights / all-additional bundles
+    drill-down  Clicking into a category, competitor, severity or rank prediction
+    mixed       Both, one preload request for every three drill-downs
+
+Usage:
+    python -m benchmarks.load_test --mix preload --concurrency 8 --requests 200
+    python -m benchmarks.load_test --mix drill-down --duration 30 --scale 10 --output load.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+import numpy as np
+
+from app.services.analytics import load_ranking_data
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """A route template and how to fill in its parameters"""
+    route: str
+    weight: float
+    path: Callable[[random.Random, Dict[str, List[str]]], str]
+
+
+def _fixed(path: str) -> Callable:
+    return lambda rng, params: path
+
+
+PRELOAD = [
+    Endpoint('/analytics/ranking-table', 1, _fixed('/analytics/ranking-table')),
+    Endpoint('/analytics/statistics', 1, _fixed('/analytics/statistics')),
+    Endpoint('/insights/all-insights', 1, _fixed('/insights/all-insights')),
+    Endpoint('/additional/all-additional', 1, _fixed('/additional/all-additional'))
+]
+
+DRILL_DOWN = [
+    Endpoint('/analytics/product-category/{category}', 3,
+             lambda rng, params: f"/analytics/product-category/{quote(rng.choice(params['categories']), safe='')}"),
+    Endpoint('/insights/category-battle/{category_name}', 3,
+             lambda rng, params: f"/insights/category-battle/{quote(rng.choice(params['categories']), safe='')}"),
+    Endpoint('/insights/competitor/{competitor_name}', 2,
+             lambda rng, params: f"/insights/competitor/{quote(rng.choice(params['competitors']), safe='')}"),
+    Endpoint('/insights/priority-categories/{severity}', 1,
+             lambda rng, params: f"/insights/priority-categories/{rng.choice(['critical', 'medium', 'low'])}"),
+    Endpoint('/additional/rank-prediction', 1,
+             lambda rng, params: f"/additional/rank-prediction?category={quote(rng.choice(params['categories']), safe='')}"
+                                 f"&products_to_add={rng.randint(0, 20)}&citations_needed={rng.randint(0, 50)}")
+]
+
+MIXES = {
+    'preload': PRELOAD,
+    'drill-down': DRILL_DOWN,
+    'mixed': [Endpoint(e.route, e.weight * len(DRILL_DOWN) / 3, e.path) for e in PRELOAD] + DRILL_DOWN
+}
+
+# Drill-down parameters are drawn from this many of the most common categories and competitors
+MAX_PARAMETER_VALUES = 50
+
+
+def drill_down_parameters() -> Dict[str, List[str]]:
+    """Category and competitor names to drill into, taken from the loaded rankings"""
+    rankings = load_ranking_data()
+    competitors = rankings.loc[rankings['source_normalized'] != 'amazon', 'source_normalized']
+    return {
+        'categories': rankings['Product'].value_counts().index[:MAX_PARAMETER_VALUES].astype(str).tolist(),
+        'competitors': competitors.value_counts().index[:MAX_PARAMETER_VALUES].astype(str).tolist()
+    }
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    values = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': len(latencies) / elapsed if elapsed else None,
+        'mean_ms': float(values.mean()) if len(values) else None,
+        'p50_ms': float(np.percentile(values, 50)) if len(values) else None,
+        'p95_ms': float(np.percentile(values, 95)) if len(values) else None,
+        'p99_ms': float(np.percentile(values, 99)) if len(values) else None,
+        'max_ms': float(values.max()) if len(values) else None
+    }
+
+
+async def run_load(app, endpoints: List[Endpoint], concurrency: int, total_requests: Optional[int],
+                   duration: Optional[float], seed: int, warmup: bool) -> Dict:
+    """Run the virtual users and collect latencies per route template"""
+    params = drill_down_parameters()
+    weights = [endpoint.weight for endpoint in endpoints]
+    transport = httpx.ASGITransport(app=app)
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    issued = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        if warmup:
+            # Load every dataset and fill the caches before measuring
+            rng = random.Random(seed)
+            for endpoint in endpoints:
+                await client.get(endpoint.path(rng, params))
+
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+
+        async def user(user_id: int) -> None:
+            nonlocal issued
+            rng = random.Random(seed * 1000 + user_id)
+            while True:
+                if total_requests is not None and issued >= total_requests:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                issued += 1
+
+                endpoint = rng.choices(endpoints, weights)[0]
+                request_started = time.perf_counter()
+                try:
+                    response = await client.get(endpoint.path(rng, params))
+                    failed = response.status_code >= 500
+                except Exception:
+                    failed = True
+                latencies[endpoint.route].append(time.perf_counter() - request_started)
+                if failed:
+                    errors[endpoint.route] += 1
+
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        'elapsed_seconds': elapsed,
+        'overall': summarize(all_latencies, sum(errors.values()), elapsed),
+        'routes': {
+            route: summarize(latencies[route], errors[route], elapsed)
+            for route in sorted(latencies)
+        }
+    }
+
+
+def print_table(result: Dict) -> None:
+    header = f"{'route':<46} {'reqs':>6} {'err':>4} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    rows = list(result['routes'].items()) + [('TOTAL', result['overall'])]
+    for route, stats in rows:
+        print(
+            f"{route:<46} {stats['requests']:>6} {stats['errors']:>4} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}",
+            file=sys.stderr
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the API in-process through an ASGI transport")
+    parser.add_argument('--mix', choices=sorted(MIXES), default='mixed', help="Endpoint mix to replay")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent virtual users")
+    limit = parser.add_mutually_exclusive_group()
+    limit.add_argument('--requests', type=int, help="Total requests to send (default 200)")
+    limit.add_argument('--duration', type=float, help="Run for this many seconds instead of a request count")
+    parser.add_argument('--scale', type=int, help="Serve synthetic data at this size multiple instead of the bundled files")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the request sequence and synthetic data")
+    parser.add_argument('--no-warmup', action='store_true', help="Include cold dataset loads in the measurements")
+    parser.add_argument('--log', action='store_true', help="Keep the application's INFO log output")
+    parser.add_argument('--output', type=Path, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if not args.log:
+        logging.disable(logging.INFO)
+
+    if args.scale:
+        from benchmarks.run_benchmarks import install_datasets
+        from benchmarks.synthetic import generate_datasets
+        install_datasets(generate_datasets(args.scale, args.seed))
+
+    from main import app
+
+    total_requests = args.requests if args.requests or args.duration else 200
+    result = asyncio.run(run_load(
+        app, MIXES[args.mix], args.concurrency, total_requests, args.duration, args.seed, not args.no_warmup
+    ))
+
+    print_table(result)
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'mix': args.mix,
+        'concurrency': args.concurrency,
+        'scale': args.scale,
+        'seed': args.seed,
+        'warmup': not args.no_warmup,
+        **result
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+"""
+Service function benchmarks
+
+Times every public function in app.services.analytics, insights_service and
+additional_service, and the price sketch build behind the price comparisons,
+against synthetic datasets (see benchmarks.synthetic) at one or more scales,
+and writes a JSON report with wall time and peak allocation per function.
+
+The synthetic frames are published into the shared dataset store in place of
+the bundled workbooks, so the functions run unchanged and no files are touched.
+
+Usage:
+    python -m benchmarks.run_benchmarks                       # scales 1 and 10
+    python -m benchmarks.run_benchmarks --scales 1 10 100 1000 --output report.json
+    python -m benchmarks.run_benchmarks --baseline old.json   # exit 1 on regressions
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.metrics import _resident_memory
+from app.services import additional_service, analytics, insights_service, price_sketches
+from app.services.dataset_store import dataset_store
+from benchmarks.synthetic import generate_datasets
+
+DEFAULT_SCALES = [1, 10]
+DEFAULT_REPEAT = 5
+
+# A function counts as regressed when its median time grows by more than this factor
+DEFAULT_REGRESSION_THRESHOLD = 1.5
+# Medians below this are dominated by noise and never count as regressions
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def install_datasets(frames: Dict[str, pd.DataFrame]) -> None:
+    """Publish synthetic frames under the names the loaders read"""
+    # Keep them private: shared copies are keyed by the real files and would be served to workers
+    settings.SHARED_DATASETS = False
+    dataset_store.clear()
+    dataset_store.publish({
+        'rankings': (frames['rankings'], [settings.EXCEL_FILE_1]),
+        'rankings_live': (frames['rankings'], [settings.EXCEL_FILE_2]),
+        'details': (frames['details'], [settings.EXCEL_FILE_2]),
+        'no_rank': (frames['no_rank'], [settings.EXCEL_FILE_3])
+    })
+
+
+def benchmark_cases(frames: Dict[str, pd.DataFrame]) -> List[Tuple[str, Callable[[], object]]]:
+    """(name, call) for every service function, with arguments picked from the frames"""
+    rankings = frames['rankings']
+    category = str(rankings['Product'].iloc[0])
+    competitor = str(rankings.loc[rankings['source_normalized'] != 'amazon', 'source_normalized'].mode().iloc[0])
+    batch_categories = [str(category) for category in rankings['Product'].unique()[:50]]
+    batch_competitors = [str(name) for name in rankings['source_normalized'].value_counts().index[:50]]
+    citations = frames['no_rank']['Citations']
+    extra_text = ' '.join(frames['details']['extra'].head(100).astype(str))
+    price_category = str(frames['details']['Product'].iloc[0])
+
+    return [
+        ('analytics.load_ranking_data', analytics.load_ranking_data),
+        ('analytics.load_product_details_data', analytics.load_product_details_data),
+        ('analytics.validate_columns', lambda: analytics.validate_columns(rankings, analytics.RANKING_REQUIRED_COLUMNS)),
+        ('analytics.get_marketplace_rankings', analytics.get_marketplace_rankings),
+        ('analytics.get_product_category_details', lambda: analytics.get_product_category_details(category)),
+        ('analytics.get_ranking_statistics', analytics.get_ranking_statistics),
+
+        ('insights_service.load_no_rank_data', insights_service.load_no_rank_data),
+        ('insights_service.calculate_overview_metrics', insights_service.calculate_overview_metrics),
+        ('insights_service.generate_performance_quadrants', insights_service.generate_performance_quadrants),
+        ('insights_service.analyze_competitor_threats', insights_service.analyze_competitor_threats),
+        ('insights_service.categorize_by_priority', insights_service.categorize_by_priority),
+        ('insights_service.analyze_no_rank_products', insights_service.analyze_no_rank_products),
+        ('insights_service.extract_citation_sources', insights_service.extract_citation_sources),
+        ('insights_service.generate_category_heatmap', insights_service.generate_category_heatmap),
+        ('insights_service.identify_quick_wins', insights_service.identify_quick_wins),
+        ('insights_service.identify_battlegrounds', insights_service.identify_battlegrounds),
+        ('insights_service.get_competitor_details', lambda: insights_service.get_competitor_details(competitor)),
+        ('insights_service.get_category_battle_details', lambda: insights_service.get_category_battle_details(category)),
+        ('insights_service.get_competitor_details_batch', lambda: insights_service.get_competitor_details_batch(batch_competitors)),
+        ('insights_service.get_category_battle_batch', lambda: insights_service.get_category_battle_batch(batch_categories)),
+
+        ('additional_service.load_no_rank_data', additional_service.load_no_rank_data),
+        ('additional_service.extract_domains_from_citations', lambda: additional_service.extract_domains_from_citations(citations)),
+        ('additional_service.calculate_sentiment_score', lambda: additional_service.calculate_sentiment_score(
+            extra_text, ['genuine', 'authentic', 'verified'], ['fake', 'delayed', 'poor quality'])),
+        ('additional_service.calculate_citation_visibility', additional_service.calculate_citation_visibility),
+        ('additional_service.calculate_source_authority_mapping', additional_service.calculate_source_authority_mapping),
+        ('additional_service.calculate_official_store_scores', additional_service.calculate_official_store_scores),
+        ('additional_service.calculate_trust_signals', additional_service.calculate_trust_signals),
+        ('additional_service.calculate_product_availability_matrix', additional_service.calculate_product_availability_matrix),
+        ('additional_service.calculate_niche_opportunities', additional_service.calculate_niche_opportunities),
+        ('additional_service.calculate_category_associations', additional_service.calculate_category_associations),
+        ('additional_service.calculate_competitor_specialties', additional_service.calculate_competitor_specialties),
+        ('additional_service.calculate_intent_alignments', additional_service.calculate_intent_alignments),
+        ('additional_service.predict_rank_movement', lambda: additional_service.predict_rank_movement(category, 5, 10)),
+        ('additional_service.calculate_price_delivery_comparison', additional_service.calculate_price_delivery_comparison),
+        ('additional_service.get_category_price_delivery', lambda: additional_service.get_category_price_delivery(price_category)),
+
+        ('price_sketches.build_price_sketches', lambda: price_sketches.build_price_sketches(frames['details']))
+    ]
+
+
+def measure(call: Callable[[], object], repeat: int, max_seconds: float) -> Dict:
+    """Time a call `repeat` times, then measure its peak allocation in one more traced run"""
+    timings = []
+    error = None
+    try:
+        for _ in range(repeat):
+            gc.collect()
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+            # Slow calls are not repeated, so the largest scales finish in reasonable time
+            if sum(timings) > max_seconds:
+                break
+
+        gc.collect()
+        tracemalloc.start()
+        try:
+            call()
+            _, peak_alloc = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        peak_alloc = None
+
+    return {
+        'runs': len(timings),
+        'min_seconds': min(timings) if timings else None,
+        'median_seconds': statistics.median(timings) if timings else None,
+        'mean_seconds': statistics.fmean(timings) if timings else None,
+        'max_seconds': max(timings) if timings else None,
+        'peak_alloc_bytes': peak_alloc,
+        'error': error
+    }
+
+
+def run_scale(scale: int, repeat: int, max_seconds: float, seed: int, only: Optional[List[str]] = None) -> Dict:
+    """Generate, install and benchmark one scale"""
+    started = time.perf_counter()
+    frames = generate_datasets(scale, seed)
+    generation_seconds = time.perf_counter() - started
+    install_datasets(frames)
+
+    result = {
+        'scale': scale,
+        'generation_seconds': generation_seconds,
+        'datasets': {
+            name: {
+                'rows': len(frame),
+                'columns': len(frame.columns),
+                'memory_bytes': int(frame.memory_usage(deep=False).sum())
+            }
+            for name, frame in frames.items()
+        },
+        'categories': int(frames['rankings']['Product'].nunique()),
+        'functions': {}
+    }
+
+    for name, call in benchmark_cases(frames):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        stats = measure(call, repeat, max_seconds)
+        result['functions'][name] = stats
+        median = stats['median_seconds']
+        print(
+            f"  {name:<60} "
+            + (f"{median * 1000:>10.2f} ms" if median is not None else f"{'failed':>13}")
+            + (f"  {stats['peak_alloc_bytes'] / 2 ** 20:>8.1f} MiB" if stats['peak_alloc_bytes'] is not None else ""),
+            file=sys.stderr
+        )
+
+    result['rss_bytes'] = next(iter(_resident_memory().values()))
+    dataset_store.clear()
+    return result
+
+
+def find_regressions(report: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Functions whose median time grew by more than `threshold` times at the same scale"""
+    previous = {
+        (entry['scale'], name): stats
+        for entry in baseline.get('scales', [])
+        for name, stats in entry['functions'].items()
+    }
+
+    regressions = []
+    for entry in report['scales']:
+        for name, stats in entry['functions'].items():
+            old = previous.get((entry['scale'], name))
+            if not old or old['median_seconds'] is None or stats['median_seconds'] is None:
+                continue
+            if max(old['median_seconds'], stats['median_seconds']) < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = stats['median_seconds'] / old['median_seconds']
+            if ratio > threshold:
+                regressions.append({
+                    'scale': entry['scale'],
+                    'function': name,
+                    'baseline_seconds': old['median_seconds'],
+                    'median_seconds': stats['median_seconds'],
+                    'ratio': ratio
+                })
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the analytics service functions on synthetic data")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES,
+                        help="Dataset size multiples to run (1 matches the bundled workbooks)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Timed runs per function")
+    parser.add_argument('--max-seconds', type=float, default=30.0,
+                        help="Stop repeating a function once its runs add up to this many seconds")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic data")
+    parser.add_argument('--only', nargs='+', help="Only run functions whose name contains one of these strings")
+    parser.add_argument('--output', type=Path, help="Write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', type=Path, help="Earlier report to compare against; exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Median slowdown factor that counts as a regression")
+    args = parser.parse_args()
+
+    # Per-call log lines would dominate the timings of the cheap functions
+    logging.disable(logging.INFO)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'scales': []
+    }
+
+    for scale in args.scales:
+        print(f"Scale {scale}x", file=sys.stderr)
+        report['scales'].append(run_scale(scale, args.repeat, args.max_seconds, args.seed, args.only))
+
+    if args.baseline:
+        report['regressions'] = find_regressions(report, json.loads(args.baseline.read_text()), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if report.get('regressions'):
+        for regression in report['regressions']:
+            print(
+                f"REGRESSION {regression['function']} at {regression['scale']}x: "
+                f"{regression['baseline_seconds'] * 1000:.2f} ms -> {regression['median_seconds'] * 1000:.2f} ms "
+                f"({regression['ratio']:.2f}x)",
+                file=sys.stderr
+            )
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
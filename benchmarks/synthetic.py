@@ -0,0 +1,240 @@
+"""
+Synthetic dataset generator
+
+Builds ranking, product details and no-rank frames shaped like the bundled
+workbooks (same columns, dtypes and value distributions) at a multiple of their
+size. At scale 1 there are 70 categories, about 1.6k ranking rows, 4.9k detail
+rows and 1.2k no-rank rows; every count grows linearly with the scale except the
+marketplace and citation-domain pools, which grow with its square root (a
+bigger catalogue mostly adds categories, not storefronts).
+
+Strings are drawn from per-dataset pools and shared between rows, so even the
+1000x frames stay within a few GB of memory.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Shape of the bundled data at scale 1
+BASE_CATEGORIES = 70
+BASE_SOURCES = 470
+BASE_CITATION_DOMAINS = 250
+RANKING_SOURCES_PER_CATEGORY = (22.7, 8.4, 3, 45)    # mean, std, min, max
+DETAIL_ROWS_PER_CATEGORY = (69.8, 24.1, 4, 113)
+NO_RANK_ROWS_PER_CATEGORY = (17.6, 7.2, 2, 35)
+NO_RANK_CATEGORY_SHARE = 69 / 70
+PROMPTS_PER_CATEGORY = 10
+CITATION_BLOCKS_PER_CATEGORY = 3.5
+
+# Largest marketplaces first; the rest of the pool is generated
+MAJOR_SOURCES = [
+    'amazon', 'Flipkart', 'ubuy', 'Croma', 'Zepto', 'desertcart.in',
+    'Reliance Digital', 'Tradeindia.com', 'JioMart', 'Tata CLiQ', 'Vijay Sales', 'Myntra'
+]
+
+# Category name stems, including the words some analyses key on
+CATEGORY_STEMS = [
+    'Air Purifier', 'Blenders', 'Batteries', 'Accessories', 'Imported Snacks', 'Indian Spices',
+    'Installation Service', 'Specialty Coffee', 'Local Handicrafts', 'Water Heater', 'Smart Watch',
+    'Inverter & Battery Combo', 'Running Shoes', 'Air Purifier Filters', 'Printer Ink'
+]
+
+EXTRA_PHRASES = [
+    'In stock online', 'Free delivery', 'Fast delivery', 'Genuine product', 'Authentic brand warranty',
+    'Verified seller', 'Trusted by reviewers', 'Excellent build quality', 'Budget friendly price',
+    'Affordable option', 'Quick shipping', 'Original accessories included', 'Delayed shipping reported',
+    'Poor quality complaints', 'Imported product', 'Local seller', 'Installation included'
+]
+
+CURRENCIES = np.array(['INR', '-1', 'USD', 'GBP', 'EUR'], dtype=object)
+CURRENCY_SHARES = np.array([0.80, 0.15, 0.03, 0.01, 0.01])
+
+# Answer positions of detail rows: most listings are in the top 3
+DETAIL_RANK_SHARES = np.array([0.443, 0.298, 0.207, 0.018, 0.008, 0.004, 0.003, 0.003, 0.002, 0.002, 0.012])
+
+
+def _counts(rng: np.random.Generator, n: int, shape) -> np.ndarray:
+    """Per-category row counts drawn from a clipped normal"""
+    mean, std, low, high = shape
+    return np.clip(np.rint(rng.normal(mean, std, n)), low, high).astype(np.int64)
+
+
+def _zipf_choice(rng: np.random.Generator, n_items: int, size: int, exponent: float = 1.1) -> np.ndarray:
+    """Indices in [0, n_items) drawn with Zipf-like popularity (0 is the most popular)"""
+    weights = 1.0 / np.arange(1, n_items + 1) ** exponent
+    cumulative = np.cumsum(weights / weights.sum())
+    return np.minimum(np.searchsorted(cumulative, rng.random(size)), n_items - 1)
+
+
+def _hex_ids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Unique UUID-like strings"""
+    values = rng.integers(0, 2 ** 63, size=(n, 2), dtype=np.int64)
+    return np.array(
+        [f"{a:016x}-{b:016x}" for a, b in values] if n else [],
+        dtype=object
+    )
+
+
+def source_pool(scale: int) -> np.ndarray:
+    """Marketplace names, most popular first"""
+    size = max(len(MAJOR_SOURCES), int(BASE_SOURCES * np.sqrt(scale)))
+    generated = [f"store{i}.in" for i in range(size - len(MAJOR_SOURCES))]
+    return np.array(MAJOR_SOURCES + generated, dtype=object)
+
+
+def category_names(scale: int) -> np.ndarray:
+    n = BASE_CATEGORIES * scale
+    return np.array(
+        [f"{CATEGORY_STEMS[i % len(CATEGORY_STEMS)]} {i // len(CATEGORY_STEMS) + 1}" for i in range(n)],
+        dtype=object
+    )
+
+
+def generate_rankings(rng: np.random.Generator, categories: np.ndarray, sources: np.ndarray) -> pd.DataFrame:
+    """Ranking rows: one per (category, marketplace) with normalized scores and ranks"""
+    counts = _counts(rng, len(categories), RANKING_SOURCES_PER_CATEGORY)
+
+    # Amazon is ranked in every category; other marketplaces are drawn by popularity.
+    # Draw with replacement and drop repeats, which is much cheaper than sampling
+    # without replacement per category.
+    draws_per_category = int(RANKING_SOURCES_PER_CATEGORY[3]) * 2
+    drawn = 1 + _zipf_choice(rng, len(sources) - 1, len(categories) * draws_per_category)
+    candidates = pd.DataFrame({
+        'category': np.repeat(np.arange(len(categories)), draws_per_category),
+        'source': drawn
+    }).drop_duplicates()
+    candidates = candidates[candidates.groupby('category').cumcount() < (counts - 1)[candidates['category'].to_numpy()]]
+
+    category_codes = np.concatenate([np.arange(len(categories)), candidates['category'].to_numpy()])
+    source_codes = np.concatenate([np.zeros(len(categories), dtype=np.int64), candidates['source'].to_numpy()])
+    order = np.argsort(category_codes, kind='stable')
+    category_codes, source_codes = category_codes[order], source_codes[order]
+
+    # Popular marketplaces earn more answer-position points; Amazon leads about two thirds of categories
+    popularity = 1.0 / np.sqrt(source_codes + 1)
+    score_sum = np.rint(rng.gamma(2.0, 150.0, len(source_codes)) * (0.5 + popularity) / 5) * 5
+    score_sum[source_codes == 0] *= rng.choice([4.0, 0.6], size=(source_codes == 0).sum(), p=[0.65, 0.35])
+    score_sum = np.maximum(score_sum, 5).astype(np.int64)
+
+    df = pd.DataFrame({
+        'Product': categories[category_codes],
+        'source_normalized': sources[source_codes],
+        'score_sum': score_sum
+    })
+    totals = df.groupby('Product', sort=False)['score_sum'].transform('sum')
+    df['score_norm'] = df['score_sum'] / totals
+    df['rank'] = df.groupby('Product', sort=False)['score_sum'].rank(method='first', ascending=False).astype(np.int64)
+    return df.sort_values(['Product', 'rank'], kind='stable').reset_index(drop=True)
+
+
+def generate_details(rng: np.random.Generator, categories: np.ndarray, sources: np.ndarray) -> pd.DataFrame:
+    """Book1-style rows: one per recommended listing in an answer"""
+    counts = _counts(rng, len(categories), DETAIL_ROWS_PER_CATEGORY)
+    n = int(counts.sum())
+    category_codes = np.repeat(np.arange(len(categories)), counts)
+
+    # Prompts and their answers are per category; product names are shared within a category
+    prompt_codes = category_codes * PROMPTS_PER_CATEGORY + rng.integers(0, PROMPTS_PER_CATEGORY, n)
+    prompts = np.array(
+        [f"Which {categories[c // PROMPTS_PER_CATEGORY].lower()} should I buy? (variant {c % PROMPTS_PER_CATEGORY + 1})"
+         for c in range(len(categories) * PROMPTS_PER_CATEGORY)],
+        dtype=object
+    )
+    prompt_ids = _hex_ids(rng, len(prompts))
+    p_numbers = np.array([f"P{i + 1}" for i in range(PROMPTS_PER_CATEGORY)], dtype=object)
+
+    models_per_category = 30
+    model_codes = category_codes * models_per_category + _zipf_choice(rng, models_per_category, n, exponent=0.8)
+    model_names = np.array(
+        [f"{categories[c // models_per_category]} Model {c % models_per_category + 1}"
+         for c in range(len(categories) * models_per_category)],
+        dtype=object
+    )
+
+    source_codes = _zipf_choice(rng, len(sources), n)
+    extras = np.array(
+        [repr([str(phrase) for phrase in rng.choice(EXTRA_PHRASES, size=4, replace=False)]) for _ in range(512)],
+        dtype=object
+    )
+
+    priced = rng.random(n) > 0.3
+    price = np.where(priced, np.round(rng.lognormal(8.5, 1.2, n), 0), -1.0)
+    delivery_known = rng.random(n) > 0.4
+    delivery_fee = np.where(delivery_known, rng.choice([0.0, 0.0, 0.0, 40.0, 99.0, 149.0], n), -1.0)
+    delivery_days = np.where(delivery_known, rng.integers(1, 15, n), -1).astype(np.int64)
+
+    ranks = 1 + np.minimum(
+        np.searchsorted(np.cumsum(DETAIL_RANK_SHARES), rng.random(n)),
+        len(DETAIL_RANK_SHARES) - 1
+    )
+    ranks[ranks == len(DETAIL_RANK_SHARES)] = rng.integers(len(DETAIL_RANK_SHARES), 29, (ranks == len(DETAIL_RANK_SHARES)).sum())
+
+    return pd.DataFrame({
+        'Product': categories[category_codes],
+        'Prompts': prompts[prompt_codes],
+        'response_id': prompt_codes.astype(np.int32),
+        'P_Number': p_numbers[prompt_codes % PROMPTS_PER_CATEGORY],
+        'p_value_id': prompt_codes.astype(np.int32),
+        'prompt_id': prompt_ids[prompt_codes],
+        'product_name': model_names[model_codes],
+        'rank': ranks.astype(np.int64),
+        'source': sources[source_codes],
+        'price': price,
+        'price_currency': np.where(priced, CURRENCIES[rng.choice(len(CURRENCIES), n, p=CURRENCY_SHARES)], '-1'),
+        'delivery_fee': delivery_fee,
+        'delivery_days': delivery_days,
+        'extra': extras[rng.integers(0, len(extras), n)],
+        'source_normalized': sources[source_codes],
+        'card_id': _hex_ids(rng, n)
+    })
+
+
+def generate_no_rank(rng: np.random.Generator, categories: np.ndarray, scale: int) -> pd.DataFrame:
+    """Products recommended where Amazon was not, with their answer citations"""
+    covered = categories[rng.random(len(categories)) < NO_RANK_CATEGORY_SHARE]
+    counts = _counts(rng, len(covered), NO_RANK_ROWS_PER_CATEGORY)
+    n = int(counts.sum())
+    category_codes = np.repeat(np.arange(len(covered)), counts)
+
+    domains = np.array(
+        [f"review-site{i}.com" for i in range(int(BASE_CITATION_DOMAINS * np.sqrt(scale)))],
+        dtype=object
+    )
+    blocks_per_category = int(np.ceil(CITATION_BLOCKS_PER_CATEGORY))
+    blocks = []
+    for _ in range(len(covered) * blocks_per_category):
+        picked = domains[_zipf_choice(rng, len(domains), int(rng.integers(3, 8)))]
+        blocks.append("\n".join(
+            f"[{i + 1}]: https://www.{domain}/article-{int(rng.integers(1e6))}?utm_source=chatgpt.com"
+            for i, domain in enumerate(picked)
+        ))
+    blocks = np.array(blocks, dtype=object)
+    block_codes = category_codes * blocks_per_category + rng.integers(0, blocks_per_category, n)
+
+    return pd.DataFrame({
+        'Product Category': covered[category_codes],
+        'Product Name': np.array([f"{covered[c]} Listing {i}" for i, c in enumerate(category_codes)], dtype=object),
+        'Citations': blocks[block_codes]
+    })
+
+
+def generate_datasets(scale: int = 1, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    Generate all three datasets at a multiple of the bundled data's size
+
+    Args:
+        scale: Size multiple (1 matches the bundled workbooks)
+        seed: Random seed; the same scale and seed always give the same frames
+
+    Returns:
+        Dict: {'rankings': ..., 'details': ..., 'no_rank': ...}
+    """
+    rng = np.random.default_rng(seed)
+    categories = category_names(scale)
+    sources = source_pool(scale)
+    return {
+        'rankings': generate_rankings(rng, categories, sources),
+        'details': generate_details(rng, categories, sources),
+        'no_rank': generate_no_rank(rng, categories, scale)
+    }
@@ -1,14 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import uvicorn
 
 from app.core.config import settings
 from app.core.logger import setup_logger, log_app_startup, log_app_shutdown
+from app.core.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.core.prerendered import PrerenderedPayloadMiddleware
+from app.core.profiling import ProfilerMiddleware
+from app.core.tracing import ServerTimingMiddleware
 from app.routers.analytics_router import router as analytics_router
 from app.routers.insights_router import router as insights_router
 from app.routers.additional_router import router as additional_router
+from app.routers.data_router import router as data_router
 
 # Setup logger
 logger = setup_logger(__name__)
@@ -32,6 +37,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Answer static dashboard requests from payloads rendered at build time (innermost,
+# so CORS and the instrumentation below still apply)
+if settings.PRERENDERED_PAYLOADS:
+    app.add_middleware(PrerenderedPayloadMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,12 +49,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Request-ID"],
 )
 
+# Admin-requested request profiling (not installed unless a token is configured)
+if settings.PROFILER_TOKEN:
+    app.add_middleware(ProfilerMiddleware)
+
+# Per-request span timings in the Server-Timing header (and per-stage latency for /metrics)
+if settings.SERVER_TIMING or settings.TRACE_LOG:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Record per-route request latency for /metrics; added last so it wraps the tracing
+# and sees each request's stage timings recorded before it flushes
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(analytics_router, prefix="/analytics", tags=["Analytics"])
 app.include_router(insights_router, prefix="/insights", tags=["Insights"])
 app.include_router(additional_router, prefix="/additional", tags=["Additional Analytics"])
+app.include_router(data_router, prefix="/data", tags=["Data Management"])
 
 
 @app.get("/")
@@ -61,7 +85,9 @@ async def root():
                 "analytics": "/analytics",
                 "insights": "/insights",
                 "additional": "/additional",
+                "data": "/data",
                 "health": "/health",
+                "metrics": "/metrics",
                 "documentation": "/docs"
             }
         }
@@ -82,6 +108,13 @@ async def health_check():
     )
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    # Rendered on the event loop so the thread-pool gauges read the server's own limiter
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,32 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import columnar
+from app.core.columnar import MSGPACK_MEDIA_TYPE
+from main import app
+
+client = TestClient(app)
+
+NEGOTIATED_ROUTES = [
+    "/analytics/ranking-table",
+    "/insights/category-heatmap",
+    "/additional/product-availability-matrix"
+]
+
+
+@pytest.mark.parametrize("path", NEGOTIATED_ROUTES)
+def test_json_responses_vary_by_accept(path):
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/json')
+    assert response.headers['vary'] == 'Accept'
+
+
+@pytest.mark.parametrize("path", NEGOTIATED_ROUTES)
+def test_columnar_responses_vary_by_accept(path):
+    response = client.get(path, headers={'Accept': MSGPACK_MEDIA_TYPE})
+
+    # Without the columnar extra the request is refused, still varying by Accept
+    assert response.status_code == (406 if columnar.msgpack is None else 200)
+    assert response.headers['vary'] == 'Accept'
@@ -0,0 +1,46 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.routers.dependencies import requested_fieldset
+from main import app
+
+client = TestClient(app)
+
+
+def test_project_trims_records_grouped_by_key():
+    fieldset = requested_fieldset(sections=None, fields="priority_categories.category")
+    value = {
+        'critical': [{'category': 'A', 'gap_percentage': 40.0}],
+        'medium': [],
+        'low': [{'category': 'B', 'gap_percentage': 5.0}]
+    }
+
+    assert fieldset.project('priority_categories', value) == {
+        'critical': [{'category': 'A'}],
+        'medium': [],
+        'low': [{'category': 'B'}]
+    }
+
+
+def test_priority_categories_fields_selection():
+    response = client.get(
+        "/insights/all-insights",
+        params={'sections': 'priority_categories', 'fields': 'priority_categories.category'}
+    )
+
+    assert response.status_code == 200
+    groups = response.json()['priority_categories']
+    assert set(groups) == {'critical', 'medium', 'low'}
+    records = [record for records in groups.values() for record in records]
+    assert records and all(set(record) == {'category'} for record in records)
+
+
+def test_unknown_fields_section_prefix_is_rejected():
+    fieldset = requested_fieldset(sections=None, fields="nosuch.category")
+    with pytest.raises(HTTPException) as error:
+        fieldset.select(['overview', 'quick_wins'])
+    assert error.value.status_code == 400
+
+    response = client.get("/insights/all-insights", params={'fields': 'nosuch.category'})
+    assert response.status_code == 400
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.analytics import load_ranking_data
+from app.services.marketplace_matrix import MarketplaceMatrix, normalize_marketplace
+
+
+def _fixture():
+    return pd.DataFrame({
+        'Product': ['Fans', 'Fans', 'Fans', 'Irons', 'Irons', 'Fans', 'Kettles', None],
+        'source_normalized': ['amazon', 'Flipkart', 'croma', 'flipkart', 'amazon', 'flipkart', 'Flipkart', 'amazon'],
+        'rank': [1, 3, 2, 1, 2, 4, 2, 1],
+        'score_norm': [0.5, 0.1, 0.3, 0.6, 0.4, 0.05, 0.7, 1.0]
+    })
+
+
+def _expected_postings(df):
+    """Best-ranked row of every (name, category), in file order, per name"""
+    rows = df.dropna(subset=['Product', 'source_normalized'])
+    best = rows.sort_values('rank', kind='stable').groupby(['source_normalized', 'Product'], sort=False).head(1).sort_index()
+    return {name: group for name, group in best.groupby('source_normalized')}
+
+
+@pytest.mark.parametrize("frame", [_fixture, load_ranking_data], ids=['fixture', 'rankings'])
+def test_postings_match_a_groupby(frame):
+    df = frame()
+    matrix = MarketplaceMatrix(df)
+
+    expected = _expected_postings(df)
+    assert set(matrix.names) == set(expected)
+    for name, rows in expected.items():
+        postings = matrix.postings(name)
+        assert matrix.categories[postings.category].tolist() == rows['Product'].tolist()
+        assert postings.rank.tolist() == rows['rank'].tolist()
+        np.testing.assert_array_equal(postings.score, rows['score_norm'].to_numpy())
+
+    assert len(matrix.postings('nosuch')) == 0
+
+
+@pytest.mark.parametrize("frame", [_fixture, load_ranking_data], ids=['fixture', 'rankings'])
+def test_views_match_a_groupby_of_the_normalized_names(frame):
+    df = frame().dropna(subset=['Product', 'source_normalized'])
+    matrix = MarketplaceMatrix(df)
+    keys = df['source_normalized'].map(normalize_marketplace)
+    best_ranks = df.groupby([df['Product'], keys])['rank'].min()
+    winners = df.sort_values('rank', kind='stable').groupby('Product', sort=False).head(1).set_index('Product')['score_norm']
+
+    for marketplace in keys.unique():
+        view = matrix.view(marketplace.upper())
+        ranks = best_ranks.xs(marketplace, level=1)
+        expected_rank = pd.Series(matrix.categories).map(ranks).fillna(0).astype(np.int64)
+        assert view.rank.tolist() == expected_rank.tolist()
+        assert view.present.tolist() == (expected_rank > 0).tolist()
+        np.testing.assert_allclose(view.gap[view.present], (winners[matrix.categories] - view.score).to_numpy()[view.present])
@@ -0,0 +1,62 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from main import app
+
+client = TestClient(app)
+
+# Beyond the largest pid Linux hands out, so never a live process
+EXITED_PID = 4194304 + 7
+
+
+def _registry():
+    registry = metrics.MetricsRegistry()
+    requests = registry.register(metrics.Counter("requests_total", "Requests", ("route",)))
+    latency = registry.register(metrics.Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    rss = registry.register(metrics.Gauge("rss_bytes", "Resident memory"))
+    return registry, requests, latency, rss
+
+
+def _snapshot(registry):
+    return {metric.name: [[list(key), value] for key, value in metric.items()] for metric in registry}
+
+
+def test_snapshots_of_several_processes_are_merged():
+    registry, requests, latency, rss = _registry()
+    requests.inc(2, route="/a")
+    latency.observe(0.05)
+    rss.set(100)
+    live = _snapshot(registry)
+
+    exited, requests, latency, rss = _registry()
+    requests.inc(3, route="/a")
+    requests.inc(1, route="/b")
+    latency.observe(0.5)
+    latency.observe(5)
+    rss.set(200)
+
+    lines = registry.render_merged({os.getpid(): live, EXITED_PID: _snapshot(exited)}).splitlines()
+
+    # Counters and histograms add up over every process, exited ones included
+    assert 'requests_total{route="/a"} 5' in lines
+    assert 'requests_total{route="/b"} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'latency_seconds_count 3' in lines
+    # Gauges are per live process
+    assert f'rss_bytes{{pid="{os.getpid()}"}} 100' in lines
+    assert not any(line.startswith('rss_bytes{') and str(EXITED_PID) in line for line in lines)
+
+
+def test_requests_feed_the_stage_histogram():
+    before = {key: series[-1] for key, series in metrics.REQUEST_STAGE_LATENCY.items()}
+
+    # A parameter keeps the request off the pre-rendered payloads
+    assert client.get("/insights/overview", params={'focus': 'flipkart'}).status_code == 200
+
+    after = {key: series[-1] for key, series in metrics.REQUEST_STAGE_LATENCY.items()}
+    for stage in ('compute', 'validate', 'serialize'):
+        assert after[(stage,)] == before.get((stage,), 0) + 1
@@ -0,0 +1,66 @@
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from app.services.analytics import load_product_details_data
+from app.services.insights_service import build_missing_products, load_no_rank_data
+from main import app
+
+client = TestClient(app)
+
+
+def _details_missing(focus):
+    """Products of each category listed by other marketplaces but not by the focus"""
+    details = load_product_details_data().dropna(subset=['product_name'])
+    is_focus = details['source_normalized'].str.strip().str.lower() == focus
+    return {
+        category: set(group['product_name']) - set(details.loc[is_focus & (details['Product'] == category), 'product_name'])
+        for category, group in details.groupby('Product')
+    }
+
+
+def test_build_missing_products_excludes_products_the_focus_lists():
+    details = pd.DataFrame({
+        'Product': ['Fans', 'Fans', 'Fans', 'Fans', 'Irons'],
+        'source_normalized': ['Flipkart ', 'amazon', 'croma', 'croma', 'amazon'],
+        'product_name': ['Fan A', 'Fan A', 'Fan B', 'Fan B', 'Iron A']
+    })
+
+    missing = build_missing_products(details, 'flipkart')
+
+    assert missing[['Product Category', 'Product Name']].values.tolist() == [['Fans', 'Fan B'], ['Irons', 'Iron A']]
+    assert missing['Citations'].isna().all()
+
+
+def test_missing_products_follow_the_focus_marketplace():
+    expected = _details_missing('flipkart')
+
+    availability = client.get("/additional/product-availability-matrix", params={'focus': 'flipkart'}).json()
+    assert availability
+    for row in availability:
+        assert set(row['missing_products']) <= expected[row['category']]
+        assert row['revenue_opportunity'] == len(expected[row['category']]) * 5000
+
+    niches = client.get("/additional/niche-opportunities", params={'focus': 'flipkart'}).json()
+    assert niches
+    for row in niches:
+        assert row['product_count_gap'] == len(expected[row['category']])
+
+    category = availability[0]['category']
+    battle = client.get(f"/insights/category-battle/{category}", params={'focus': 'flipkart'}).json()
+    assert battle['missing_product_count'] == len(expected[category])
+
+    sections = client.get("/insights/all-insights", params={'focus': 'flipkart', 'sections': 'no_rank_analysis,citation_sources'}).json()
+    assert sections['no_rank_analysis']['total_missing_products'] == sum(len(products) for products in expected.values())
+    assert sections['citation_sources'] == []
+
+
+def test_amazon_missing_products_come_from_the_no_rank_data():
+    counts = load_no_rank_data()['Product Category'].value_counts()
+
+    niches = client.get("/additional/niche-opportunities").json()
+    assert niches
+    for row in niches:
+        assert row['product_count_gap'] == counts.get(row['category'], 0)
+
+    analysis = client.get("/insights/no-rank-analysis").json()
+    assert analysis['total_missing_products'] == len(load_no_rank_data())
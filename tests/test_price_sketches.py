@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.core.prerendered import payload_key
+from app.services import additional_service
+from app.services.price_sketches import PriceSketches
+
+
+def _details(**columns):
+    rows = {
+        'Product': ['Fans', 'Fans', None, 'Fans'],
+        'source_normalized': ['Amazon', 'croma', 'croma', None],
+        'price': [1000, 2000, 3000, 4000],
+        'price_currency': ['INR', 'inr', 'INR', 'INR'],
+        'delivery_fee': [0, 50, 60, 70],
+        'delivery_days': [1, 3, 5, 7]
+    }
+    rows.update(columns)
+    return pd.DataFrame(rows)
+
+
+def test_rows_without_category_or_marketplace_are_skipped():
+    sketches = PriceSketches(0.01)
+    sketches.add_rows(_details())
+
+    assert len(sketches) == 4
+    assert sketches.categories == ['Fans']
+    assert sketches.marketplaces('Fans') == ['amazon', 'croma']
+    assert not sketches.has_category('nan')
+    assert len(sketches.merged('Fans', 'price', 'INR', ['amazon', 'croma'])) == 2
+    assert len(sketches.merged('Fans', 'delivery_days', 'INR', ['amazon', 'croma'])) == 2
+
+
+def test_missing_values_and_currencies_are_not_counted():
+    sketches = PriceSketches(0.01)
+    sketches.add_rows(_details(price=[1000, -1, np.nan, 4000], price_currency=['INR', 'INR', 'INR', '-1']))
+
+    assert len(sketches.merged('Fans', 'price', 'inr', ['amazon', 'croma'])) == 1
+    assert sketches.merged('Fans', 'delivery_fee', 'INR', ['amazon']).quantile(0.5) == 0.0
+
+
+def test_payload_key_changes_with_the_price_currency(monkeypatch):
+    key = payload_key()
+    monkeypatch.setattr(settings, 'PRICE_CURRENCY', 'USD')
+
+    assert payload_key() != key
+
+
+def test_price_delivery_comparison(monkeypatch):
+    details = pd.DataFrame({
+        'Product': ['Fans'] * 6 + ['Irons'],
+        'source_normalized': ['amazon', 'Amazon', 'amazon', 'croma', 'croma', 'flipkart', 'croma'],
+        'price': [100, 200, 300, 400, 500, 600, 50],
+        'price_currency': ['INR'] * 6 + ['USD'],
+        'delivery_fee': [0, 0, 0, 40, 40, 40, 5],
+        'delivery_days': [1, 2, 3, 4, 5, 6, 2]
+    })
+    sketches = PriceSketches(0.01)
+    sketches.add_rows(details)
+    monkeypatch.setattr(additional_service, 'load_price_sketches', lambda: sketches)
+
+    fans, irons = additional_service.calculate_price_delivery_comparison('amazon', 'inr')
+
+    assert fans['category'] == 'Fans' and fans['currency'] == 'INR'
+    assert fans['competitor_count'] == 2
+    assert fans['focus']['price']['count'] == 3
+    assert fans['focus']['price']['median'] == pytest.approx(200, rel=0.01)
+    assert fans['competitors']['price']['median'] == pytest.approx(500, rel=0.01)
+    assert fans['price_index'] == pytest.approx(40, rel=0.02)
+    assert fans['focus']['delivery_fee']['median'] == 0.0
+    assert fans['delivery_days_gap'] == pytest.approx(-3, abs=0.1)
+
+    # Irons is only priced in USD and has no focus listing
+    assert irons['competitors']['price']['count'] == 0
+    assert irons['competitors']['delivery_days']['count'] == 1
+    assert irons['price_index'] is None and irons['delivery_days_gap'] is None
+
+    category = additional_service.get_category_price_delivery('Fans', 'amazon', 'INR')
+    assert [row['marketplace'] for row in category['marketplaces']] == ['amazon', 'croma', 'flipkart']
+    assert [row['is_focus'] for row in category['marketplaces']] == [True, False, False]
+    with pytest.raises(ValueError):
+        additional_service.get_category_price_delivery('Toasters', 'amazon', 'INR')
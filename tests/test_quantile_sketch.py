@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.services.quantile_sketch import QuantileSketch
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+@pytest.mark.parametrize("relative_accuracy", [0.01, 0.05])
+def test_quantiles_are_within_the_relative_accuracy(relative_accuracy):
+    values = np.random.default_rng(7).lognormal(mean=6, sigma=1.5, size=20000)
+    values[:500] = 0
+    sketch = QuantileSketch(relative_accuracy)
+    sketch.add(values)
+
+    exact = np.quantile(values, QUANTILES, method='lower')
+    for q, estimate, value in zip(QUANTILES, sketch.quantiles(QUANTILES), exact):
+        assert abs(estimate - value) <= relative_accuracy * value + 1e-9, q
+
+
+def test_merge_matches_a_sketch_of_the_union():
+    rng = np.random.default_rng(11)
+    a_values, b_values = rng.exponential(300, size=5000), rng.uniform(0, 50, size=3000)
+
+    a, b, union = QuantileSketch(0.01), QuantileSketch(0.01), QuantileSketch(0.01)
+    a.add(a_values)
+    b.add(b_values)
+    union.add(np.concatenate([a_values, b_values]))
+    a.merge(b)
+
+    assert len(a) == len(union) == 8000
+    assert (a.min, a.max) == (union.min, union.max)
+    assert a.quantiles(QUANTILES) == union.quantiles(QUANTILES)
+    assert QuantileSketch.merged([b, QuantileSketch(0.01)], 0.01).quantiles(QUANTILES) == b.quantiles(QUANTILES)
+
+
+def test_invalid_values_and_mismatched_accuracies():
+    sketch = QuantileSketch(0.01)
+    sketch.add([np.nan, -1, np.inf])
+
+    assert len(sketch) == 0
+    assert sketch.quantile(0.5) is None
+    with pytest.raises(ValueError):
+        sketch.merge(QuantileSketch(0.02))
@@ -0,0 +1,40 @@
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.logger import _shared_handler, add_record_filter, setup_logger
+from app.core.tracing import ServerTimingMiddleware
+
+logger = setup_logger('tests.request_id_logging')
+
+
+class _Capture(logging.Filter):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        self.records.append(record)
+        return False
+
+
+def test_records_carry_the_request_id():
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/ping")
+    def ping():
+        logger.warning("ping")
+        return {}
+
+    capture = _Capture()
+    add_record_filter(capture)
+    try:
+        response = TestClient(app).get("/ping", headers={'X-Request-ID': 'abc123'})
+        logger.warning("outside")
+    finally:
+        _shared_handler().removeFilter(capture)
+
+    assert response.headers['x-request-id'] == 'abc123'
+    assert [(record.getMessage(), record.request_id) for record in capture.records] == [('ping', 'abc123'), ('outside', '-')]
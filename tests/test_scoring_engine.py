@@ -0,0 +1,44 @@
+import pandas as pd
+
+from app.services.scoring_engine import SCORE_COLUMNS, compute_scores, get_position_weights
+
+
+def _answers(rows):
+    return pd.DataFrame(rows, columns=['Product', 'source_normalized', 'rank'])
+
+
+def test_ranks_follow_points_with_ties_broken_by_name():
+    answers = _answers([
+        ('Fans', 'amazon', 1), ('Fans', 'croma', 2), ('Fans', 'amazon', 3), ('Fans', 'flipkart', 1),
+        ('Irons', 'zepto', 1), ('Irons', 'croma', 1),
+        ('Irons', None, 1), (None, 'amazon', 1)
+    ])
+
+    scores = compute_scores(answers, weights=[3, 2, 1])
+
+    assert list(scores.columns) == SCORE_COLUMNS
+    assert scores[['Product', 'source_normalized', 'score_sum', 'rank']].values.tolist() == [
+        ['Fans', 'amazon', 4, 1],
+        ['Fans', 'flipkart', 3, 2],
+        ['Fans', 'croma', 2, 3],
+        ['Irons', 'croma', 3, 1],
+        ['Irons', 'zepto', 3, 2]
+    ]
+    assert scores['score_norm'].round(4).tolist() == [0.4444, 0.3333, 0.2222, 0.5, 0.5]
+
+
+def test_default_weights_are_linear_and_never_negative():
+    table = get_position_weights(25, weights=[])
+
+    assert table[:3].tolist() == [0, 100, 95]
+    assert table[21:].tolist() == [0] * 5
+
+    scores = compute_scores(_answers([('Fans', 'amazon', 1), ('Fans', 'croma', 30)]), weights=[])
+    assert scores['score_sum'].tolist() == [100, 0]
+    assert scores['rank'].tolist() == [1, 2]
+
+
+def test_no_answers():
+    scores = compute_scores(_answers([(None, 'amazon', 1)]))
+
+    assert scores.empty and list(scores.columns) == SCORE_COLUMNS
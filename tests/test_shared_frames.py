@@ -0,0 +1,65 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services import shared_frames
+
+
+@pytest.fixture
+def shared_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'SHARED_DATASET_DIR_NAME', str(tmp_path / "shared"))
+    monkeypatch.setattr(shared_frames, '_attached', {})
+    yield settings.SHARED_DATASET_DIR
+    shared_frames.release_all()
+
+
+def _frame():
+    return pd.DataFrame({
+        'rank': np.array([1, 2, 3], dtype=np.int64),
+        'score_norm': [0.5, 0.25, np.nan],
+        'seen': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-03']),
+        'Product': ['Fans', np.nan, 'Fans'],
+        'mixed': ['a', 1, None]
+    })
+
+
+def test_frames_round_trip_through_the_shared_columns(shared_dir):
+    frame = _frame()
+
+    shared = shared_frames.load_shared('rankings', ('v1',), lambda: frame)
+
+    pd.testing.assert_frame_equal(shared, frame)
+    directory = shared_frames.shared_frame_path('rankings', ('v1',))
+    manifest = json.loads((directory / "manifest.json").read_text())
+    assert [column['kind'] for column in manifest['columns']] == ['array', 'array', 'array', 'dictionary', 'pickle']
+    assert (directory / "leases" / str(os.getpid())).exists()
+    with pytest.raises(ValueError):
+        shared['rank'].to_numpy()[0] = 5
+
+
+def test_later_loads_attach_instead_of_loading(shared_dir):
+    shared_frames.load_shared('rankings', ('v1',), _frame)
+
+    def fail():
+        raise AssertionError("loader called for a shared dataset")
+
+    pd.testing.assert_frame_equal(shared_frames.load_shared('rankings', ('v1',), fail), _frame())
+
+
+def test_unshareable_objects_are_returned_as_loaded(shared_dir):
+    indexed = _frame().set_index('Product')
+
+    assert shared_frames.load_shared('indexed', ('v1',), lambda: indexed) is indexed
+    assert not shared_frames.shared_frame_path('indexed', ('v1',)).exists()
+
+
+def test_old_generations_are_removed_once_released(shared_dir):
+    shared_frames.load_shared('rankings', ('v1',), _frame)
+    shared_frames.load_shared('rankings', ('v2',), _frame)
+
+    assert not shared_frames.shared_frame_path('rankings', ('v1',)).exists()
+    assert shared_frames.shared_frame_path('rankings', ('v2',)).exists()
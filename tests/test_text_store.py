@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.services.text_store import (
+    MISSING_TEXT_ID,
+    TextStore,
+    TextStoreBuilder,
+    intern_text_columns,
+    text_store_path,
+    write_text_values
+)
+
+VALUES = ['## Best fans', np.nan, 'Ventilateur à pièces ✓', '## Best fans', '', None, 'Ventilateur à pièces ✓']
+
+
+@pytest.fixture(autouse=True)
+def text_store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'TEXT_STORE_DIR_NAME', str(tmp_path / "text_store"))
+    return settings.TEXT_STORE_DIR
+
+
+def test_values_round_trip_through_the_store():
+    builder = TextStoreBuilder()
+    text_ids = builder.add_series(pd.Series(VALUES, dtype=object))
+    store = builder.finish(text_store_path('Response', ('v1',)))
+
+    assert len(store) == 3
+    assert store.nbytes == sum(len(value.encode('utf-8')) for value in ['## Best fans', 'Ventilateur à pièces ✓', ''])
+    assert text_ids[1] == text_ids[5] == MISSING_TEXT_ID
+    assert store.decode(text_ids) == [None if not isinstance(value, str) else value for value in VALUES]
+
+
+def test_text_columns_are_swapped_for_id_columns():
+    chunk = pd.DataFrame({'Product': ['Fans'] * len(VALUES), 'Response': VALUES})
+    builders = {'Response': TextStoreBuilder()}
+
+    interned = intern_text_columns(chunk, {'Response': 'response_id'}, builders)
+    store = builders['Response'].finish(text_store_path('Response', ('v1',)))
+
+    assert list(interned.columns) == ['Product', 'response_id']
+    assert store.decode(interned['response_id'])[:3] == ['## Best fans', None, 'Ventilateur à pièces ✓']
+
+
+def test_finishing_an_existing_store_opens_it():
+    directory = text_store_path('Response', ('v1',))
+    first = TextStoreBuilder()
+    first.add('## Best fans')
+    first.finish(directory)
+
+    second = TextStoreBuilder()
+    second.add('## Best fans')
+    store = second.finish(directory)
+
+    assert store.decode([0]) == ['## Best fans']
+    assert [path.name for path in settings.TEXT_STORE_DIR.iterdir()] == [directory.name]
+
+
+def test_failed_moves_remove_the_temporary_store():
+    builder = TextStoreBuilder()
+    builder.add('## Best fans')
+
+    with pytest.raises(OSError):
+        builder.finish(settings.TEXT_STORE_DIR / "missing" / "Response-0")
+    assert list(settings.TEXT_STORE_DIR.iterdir()) == []
+
+
+def test_written_values_keep_their_order(tmp_path):
+    write_text_values(tmp_path / "values", ['b', 'a', ''])
+
+    assert TextStore(tmp_path / "values").decode([0, 1, 2, -1]) == ['b', 'a', '', None]
@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from main import app
+
+client = TestClient(app)
+
+TOKEN = {'X-Admin-Token': 'secret'}
+
+
+@pytest.fixture(autouse=True)
+def upload_settings(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, 'UPLOAD_TOKEN', 'secret')
+    monkeypatch.setattr(settings, 'UPLOAD_MAX_BYTES', 2000)
+    monkeypatch.setattr(settings, 'UPLOAD_DIR_NAME', str(tmp_path / "uploads"))
+    return settings.UPLOAD_DIR
+
+
+def _csv(size=0):
+    return {'file': ('no_rank.csv', b'x,y\n1,2\n' + b'3,4\n' * size)}
+
+
+def test_uploads_are_disabled_without_a_token(monkeypatch):
+    monkeypatch.setattr(settings, 'UPLOAD_TOKEN', '')
+
+    assert client.post("/data/upload/no-rank", headers=TOKEN, files=_csv()).status_code == 404
+
+
+@pytest.mark.parametrize("headers", [{}, {'X-Admin-Token': 'wrong'}])
+def test_bad_tokens_are_rejected(headers):
+    assert client.post("/data/upload/no-rank", headers=headers, files=_csv()).status_code == 401
+    assert client.get("/data/jobs", headers=headers).status_code == 401
+
+
+def test_oversized_uploads_are_rejected_by_content_length(upload_settings):
+    response = client.post("/data/upload/no-rank", headers=TOKEN, files=_csv(size=1000))
+
+    assert response.status_code == 413
+    assert not any(upload_settings.glob("*"))
+
+
+def test_oversized_uploads_without_content_length_stop_at_the_limit(upload_settings):
+    body = b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.csv"\r\n\r\n' + b'x' * 5000 + b'\r\n--b--\r\n'
+    chunks = (body[i:i + 500] for i in range(0, len(body), 500))
+
+    response = client.post(
+        "/data/upload/no-rank",
+        headers={**TOKEN, 'Content-Type': 'multipart/form-data; boundary=b'},
+        content=chunks
+    )
+
+    assert response.status_code == 413
+    assert not any(upload_settings.glob("*"))
+
+
+@pytest.mark.parametrize("files, status", [
+    ({'file': ('no_rank.txt', b'x')}, 400),
+    ({'other': ('no_rank.csv', b'x')}, 422)
+])
+def test_bad_files_are_rejected(files, status):
+    assert client.post("/data/upload/no-rank", headers=TOKEN, files=files).status_code == status
+
+
+def test_unknown_datasets_are_rejected():
+    assert client.post("/data/upload/nosuch", headers=TOKEN, files=_csv()).status_code == 404
+
+
+def test_uploads_missing_required_columns_fail_their_job(upload_settings):
+    response = client.post("/data/upload/no-rank", headers=TOKEN, files=_csv())
+    assert response.status_code == 202
+
+    job = client.get(f"/data/jobs/{response.json()['job_id']}", headers=TOKEN).json()
+    assert job['status'] == 'failed'
+    assert job['error'].startswith("Missing required columns")
+    assert not any(path.is_file() for path in upload_settings.rglob("*"))